@@ -0,0 +1,130 @@
+from django.test import TestCase
+from custom_account.models import (CustomUser, RecruiterUserProfile,
+                                   TechUserProfile)
+from job_post.models import JobPost
+from project.models import Project
+from technology.catalogue import get_tech_catalogue
+from technology.models import Tech
+
+
+class ApiTests(TestCase):
+    """
+    Tests for the read-only JSON API.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='apiuser',
+            first_name='Api',
+            last_name='User',
+            email='apiuser@example.com',
+            password='password',
+            phone_number='0123456789',
+        )
+        TechUserProfile.objects.create(user=self.user)
+        self.django = Tech.objects.create(
+            tech_name='Django', is_approved=True)
+        self.projects = []
+        for i in range(5):
+            project = Project.objects.create(
+                name=f'Project {i}', user=self.user)
+            project.technologies.add(self.django)
+            self.projects.append(project)
+        Project.objects.create(
+            name='Hidden', user=self.user, active=False)
+        recruiter = CustomUser.objects.create_user(
+            username='apirecruiter',
+            first_name='Api',
+            last_name='Recruiter',
+            email='apirecruiter@example.com',
+            password='password',
+        )
+        RecruiterUserProfile.objects.create(user=recruiter)
+        JobPost.objects.create(name='Developer', user=recruiter)
+
+    def test_project_list_pages_newest_first(self):
+        """
+        Test that projects are listed a page at a time, and that
+        inactive projects aren't listed.
+        """
+        response = self.client.get(
+            '/api/v1/projects/', {'page_size': 3})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [project['name'] for project in data['results']],
+            ['Project 4', 'Project 3', 'Project 2'])
+        self.assertIsNone(data['previous'])
+
+        data = self.client.get(data['next']).json()
+        self.assertEqual(
+            [project['name'] for project in data['results']],
+            ['Project 1', 'Project 0'])
+        self.assertIsNone(data['next'])
+        self.assertIsNotNone(data['previous'])
+
+    def test_fields_select_the_serialized_fields(self):
+        """
+        Test that only the requested fields are returned, and that
+        the page takes a fixed number of queries.
+        """
+        get_tech_catalogue()
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                '/api/v1/projects/', {'fields': 'name,user,technologies'})
+        self.assertEqual(response.json()['results'][0], {
+            'name': 'Project 4',
+            'user': self.user.slug,
+            'technologies': [{'id': self.django.pk, 'name': 'Django'}],
+        })
+
+        response = self.client.get(
+            '/api/v1/projects/', {'fields': 'name,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail_views(self):
+        """
+        Test that a single project, job post, user and tech can be
+        fetched, and that contact details aren't exposed.
+        """
+        response = self.client.get(
+            f'/api/v1/projects/{self.projects[0].pk}/')
+        self.assertEqual(response.json()['name'], 'Project 0')
+
+        response = self.client.get('/api/v1/jobs/')
+        self.assertEqual(response.json()['results'][0]['name'], 'Developer')
+
+        response = self.client.get(f'/api/v1/users/{self.user.slug}/')
+        self.assertEqual(response.json()['first_name'], 'Api')
+        self.assertNotIn('phone_number', response.json())
+        self.assertNotIn('email', response.json())
+
+        response = self.client.get(f'/api/v1/tech/{self.django.pk}/')
+        self.assertEqual(response.json(), {
+            'id': self.django.pk, 'name': 'Django'})
+
+        response = self.client.get('/api/v1/projects/0/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_etag(self):
+        """
+        Test that an unchanged response isn't sent again.
+        """
+        response = self.client.get('/api/v1/tech/')
+        etag = response['ETag']
+
+        response = self.client.get(
+            '/api/v1/tech/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Tech.objects.create(tech_name='Python', is_approved=True)
+        response = self.client.get(
+            '/api/v1/tech/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_cursor(self):
+        """
+        Test that a bad cursor is a bad request.
+        """
+        response = self.client.get('/api/v1/projects/', {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,24 @@
+from django.urls import path
+from . import views
+
+
+app_name = 'api'
+
+urlpatterns = [
+    path('projects/', views.ProjectListApiView.as_view(),
+         name='project_list'),
+    path('projects/<int:pk>/', views.ProjectDetailApiView.as_view(),
+         name='project_detail'),
+    path('jobs/', views.JobPostListApiView.as_view(),
+         name='job_post_list'),
+    path('jobs/<int:pk>/', views.JobPostDetailApiView.as_view(),
+         name='job_post_detail'),
+    path('users/', views.UserListApiView.as_view(),
+         name='user_list'),
+    path('users/<slug:slug>/', views.UserDetailApiView.as_view(),
+         name='user_detail'),
+    path('tech/', views.TechListApiView.as_view(),
+         name='tech_list'),
+    path('tech/<int:pk>/', views.TechDetailApiView.as_view(),
+         name='tech_detail'),
+]
@@ -0,0 +1,312 @@
+import hashlib
+import json
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views import View
+from custom_account.models import CustomUser
+from job_post.models import JobPost
+from project.models import Project
+from stackportfolio.pagination import CursorPaginator, InvalidCursor
+from technology.catalogue import get_tech_catalogue
+from technology.index import INDEXED_RELATIONS
+from technology.models import Tech
+
+
+class ApiError(Exception):
+    """
+    Raised for a bad request, sent back as JSON with the message.
+    """
+    status = 400
+
+
+class ApiNotFound(ApiError):
+    status = 404
+
+
+class ApiResourceMixin:
+    """
+    Serializes rows of a model for the API straight from values(),
+    without creating model instances.
+
+    fields maps each field name in the API to the lookup it is read
+    from. A request can ask for some of them with ?fields=a,b. The
+    technologies field is filled in with one query on the tech
+    through table for tech_kind, and named from the tech catalogue.
+    """
+    model = None
+    fields = {}
+    image_fields = ()
+    tech_kind = None
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    def get_fields(self):
+        requested = self.request.GET.get('fields')
+        if not requested:
+            return list(self.fields) + (['technologies']
+                                        if self.tech_kind else [])
+
+        names = list(dict.fromkeys(
+            name.strip() for name in requested.split(',') if name.strip()))
+        unknown = [name for name in names
+                   if name not in self.fields and not (
+                       name == 'technologies' and self.tech_kind)]
+        if unknown:
+            raise ApiError(f'Unknown fields: {", ".join(unknown)}')
+        return names
+
+    def get_lookups(self, names):
+        """
+        Returns the columns to select for the requested fields, plus
+        the pk and any extra columns needed to page through rows.
+        """
+        lookups = ['pk']
+        lookups.extend(self.fields[name] for name in names
+                       if name in self.fields)
+        return list(dict.fromkeys(lookups))
+
+    def serialize(self, rows, names):
+        techs = {}
+        if 'technologies' in names:
+            techs = self.get_technologies([row['pk'] for row in rows])
+
+        results = []
+        for row in rows:
+            result = {}
+            for name in names:
+                if name == 'technologies':
+                    result[name] = techs.get(row['pk'], [])
+                elif name in self.image_fields:
+                    result[name] = self.image_url(
+                        name, row[self.fields[name]])
+                else:
+                    result[name] = row[self.fields[name]]
+            results.append(result)
+        return results
+
+    def get_technologies(self, row_ids):
+        """
+        Returns each row's tech as a list of ids and names.
+        """
+        model_label, field_name, row_column = INDEXED_RELATIONS[
+            self.tech_kind]
+        through = getattr(apps.get_model(model_label), field_name).through
+        catalogue = get_tech_catalogue()
+
+        techs = {}
+        for row_id, tech_id in through.objects.filter(**{
+                f'{row_column}__in': row_ids}).values_list(
+                    row_column, 'tech_id').order_by('pk'):
+            tech = catalogue.get(tech_id)
+            if tech:
+                techs.setdefault(row_id, []).append(
+                    {'id': tech.id, 'name': tech.tech_name})
+        return techs
+
+    def image_url(self, name, value):
+        if not value:
+            return None
+        field = self.model._meta.get_field(self.fields[name])
+        return field.to_python(value).build_url(secure=True)
+
+    def render(self, data):
+        """
+        Returns the data as JSON with an ETag of its content, or a
+        304 if the client already has it.
+        """
+        content = json.dumps(data, cls=DjangoJSONEncoder)
+        etag = quote_etag(hashlib.md5(content.encode()).hexdigest())
+        response = get_conditional_response(self.request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                content, content_type='application/json')
+        response['ETag'] = etag
+        return response
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return self.render(self.get_data())
+        except ApiError as e:
+            return JsonResponse({'error': str(e)}, status=e.status)
+
+
+class ApiListView(ApiResourceMixin, View):
+    """
+    Lists the rows of a model a page at a time, newest first, using
+    the same cursor pagination as the HTML lists.
+    """
+    cursor_field = 'date_created'
+
+    def get_page_size(self):
+        default = getattr(settings, 'API_PAGE_SIZE', 20)
+        try:
+            page_size = int(self.request.GET.get('page_size', default))
+        except ValueError:
+            raise ApiError('page_size must be a number')
+        return min(max(page_size, 1), getattr(
+            settings, 'API_MAX_PAGE_SIZE', 100))
+
+    def get_lookups(self, names):
+        lookups = super().get_lookups(names)
+        if self.cursor_field and self.cursor_field not in lookups:
+            lookups.append(self.cursor_field)
+        return lookups
+
+    def page_url(self, cursor):
+        params = self.request.GET.copy()
+        params['cursor'] = cursor
+        return self.request.build_absolute_uri(
+            f'{self.request.path}?{params.urlencode()}')
+
+    def get_data(self):
+        names = self.get_fields()
+        queryset = self.get_queryset().values(*self.get_lookups(names))
+        paginator = CursorPaginator(
+            queryset, self.get_page_size(), field=self.cursor_field)
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise ApiError('Invalid cursor')
+
+        return {
+            'results': self.serialize(page.object_list, names),
+            'next': (self.page_url(page.next_cursor)
+                     if page.has_next() else None),
+            'previous': (self.page_url(page.previous_cursor)
+                         if page.has_previous() else None),
+        }
+
+
+class ApiDetailView(ApiResourceMixin, View):
+    """
+    Returns a single row of a model, found by the url's lookup_field.
+    """
+    lookup_field = 'pk'
+
+    def get_data(self):
+        names = self.get_fields()
+        rows = list(self.get_queryset().filter(**{
+            self.lookup_field: self.kwargs[self.lookup_field]
+        }).values(*self.get_lookups(names))[:1])
+        if not rows:
+            raise ApiNotFound('Not found')
+        return self.serialize(rows, names)[0]
+
+
+class ProjectApiMixin:
+    model = Project
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'slug': 'slug',
+        'user': 'user__slug',
+        'description': 'description',
+        'github_repo_url': 'github_repo_url',
+        'deployed_url': 'deployed_url',
+        'image': 'image',
+        'view_count': 'view_count',
+        'date_created': 'date_created',
+        'date_updated': 'date_updated',
+    }
+    image_fields = ('image',)
+    tech_kind = 'projects'
+
+    def get_queryset(self):
+        return Project.objects.filter(active=True)
+
+
+class JobPostApiMixin:
+    model = JobPost
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'user': 'user__slug',
+        'company': 'company',
+        'location': 'location',
+        'description': 'description',
+        'salary_from': 'salary_from',
+        'salary_to': 'salary_to',
+        'salary_currency': 'salary_currency',
+        'view_count': 'view_count',
+        'date_created': 'date_created',
+        'date_updated': 'date_updated',
+    }
+    tech_kind = 'job_posts'
+
+    def get_queryset(self):
+        return JobPost.objects.filter(active=True)
+
+
+class UserApiMixin:
+    """
+    Only the public profile fields are served, never contact
+    details.
+    """
+    model = CustomUser
+    fields = {
+        'id': 'id',
+        'slug': 'slug',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'work_title': 'work_title',
+        'company': 'company',
+        'country': 'country',
+        'bio': 'bio',
+        'website': 'website',
+        'linkedin_username': 'linkedin_username',
+        'twitter_handle': 'twitter_handle',
+        'profile_image': 'profile_image',
+    }
+    image_fields = ('profile_image',)
+    tech_kind = 'users'
+
+    def get_queryset(self):
+        return CustomUser.objects.filter(is_active=True)
+
+
+class TechApiMixin:
+    model = Tech
+    fields = {
+        'id': 'id',
+        'name': 'tech_name',
+    }
+
+    def get_queryset(self):
+        return Tech.objects.filter(is_approved=True)
+
+
+class ProjectListApiView(ProjectApiMixin, ApiListView):
+    pass
+
+
+class ProjectDetailApiView(ProjectApiMixin, ApiDetailView):
+    pass
+
+
+class JobPostListApiView(JobPostApiMixin, ApiListView):
+    pass
+
+
+class JobPostDetailApiView(JobPostApiMixin, ApiDetailView):
+    pass
+
+
+class UserListApiView(UserApiMixin, ApiListView):
+    cursor_field = None
+
+
+class UserDetailApiView(UserApiMixin, ApiDetailView):
+    lookup_field = 'slug'
+
+
+class TechListApiView(TechApiMixin, ApiListView):
+    cursor_field = None
+
+
+class TechDetailApiView(TechApiMixin, ApiDetailView):
+    pass
@@ -1,5 +1,8 @@
 from django.contrib import admin
+from django.db.models import Case, Count, Value, When
 from django.utils.translation import gettext_lazy as _
+from stackportfolio.card_cache import bump_user_card_versions
+from stackportfolio.page_cache import bump_page_tags, user_tag
 from .models import CustomUser, TechUserProfile, RecruiterUserProfile
 
 
@@ -38,6 +41,9 @@ class CustomUserAdmin(admin.ModelAdmin):
     search_fields = ('email', 'first_name', 'last_name')
     ordering = ('email', 'first_name', 'last_name')
     actions = ['toggle_active_users', 'toggle_staff_users']
+    # Joining the profiles caches a missing profile as well, so the
+    # hasattr() checks in user_profile_type don't query per row.
+    list_select_related = ('tech_profile', 'recruiter_profile')
 
     def user_profile_type(self, obj):
         if hasattr(obj, 'tech_profile') and hasattr(obj, 'recruiter_profile'):
@@ -50,13 +56,25 @@ class CustomUserAdmin(admin.ModelAdmin):
 
     user_profile_type.short_description = 'Profile Type'
 
+    def toggle_users(self, queryset, field_name):
+        """
+        Flips a boolean field on each selected user with one UPDATE.
+        The update skips the save signals, so the users' cached cards
+        and pages are dropped here instead.
+        """
+        user_ids = list(queryset.values_list('pk', flat=True))
+        queryset.update(**{
+            field_name: Case(
+                When(**{field_name: True}, then=Value(False)),
+                default=Value(True))})
+        bump_user_card_versions(user_ids)
+        bump_page_tags(*(user_tag(user_id) for user_id in user_ids))
+
     def toggle_active_users(self, request, queryset):
         """
         Toggle the active status of users.
         """
-        for user in queryset:
-            user.is_active = not user.is_active
-            user.save()
+        self.toggle_users(queryset, 'is_active')
 
     toggle_active_users.short_description = 'Toggle Active Status'
 
@@ -64,9 +82,7 @@ class CustomUserAdmin(admin.ModelAdmin):
         """
         Toggle the staff status of users.
         """
-        for user in queryset:
-            user.is_staff = not user.is_staff
-            user.save()
+        self.toggle_users(queryset, 'is_staff')
 
     toggle_staff_users.short_description = 'Toggle Staff Status'
 
@@ -78,6 +94,7 @@ class TechUserProfileAdmin(admin.ModelAdmin):
     search_fields = ('user__email', 'user__first_name',
                      'user__last_name', 'github_username')
     list_filter = ('seeking_employment',)
+    list_select_related = ('user',)
 
     def user_email(self, obj):
         return obj.user.email
@@ -89,12 +106,22 @@ class TechUserProfileAdmin(admin.ModelAdmin):
         return obj.user.last_name
 
     def num_projects(self, obj):
-        return obj.user.projects.count()
+        return obj.project_count
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        queryset = queryset.annotate(
+            project_count=Count('user__projects', distinct=True))
+        return queryset
 
     user_email.short_description = 'Email'
     user_first_name.short_description = 'First Name'
     user_last_name.short_description = 'Last Name'
     num_projects.short_description = 'Number of Projects'
+    user_email.admin_order_field = 'user__email'
+    user_first_name.admin_order_field = 'user__first_name'
+    user_last_name.admin_order_field = 'user__last_name'
+    num_projects.admin_order_field = 'project_count'
 
 
 @admin.register(RecruiterUserProfile)
@@ -102,6 +129,7 @@ class RecruiterUserProfileAdmin(admin.ModelAdmin):
     list_display = ('user_email', 'user_first_name',
                     'user_last_name', 'num_job_posts')
     search_fields = ('user__email', 'user__first_name', 'user__last_name')
+    list_select_related = ('user',)
 
     def user_email(self, obj):
         return obj.user.email
@@ -113,9 +141,19 @@ class RecruiterUserProfileAdmin(admin.ModelAdmin):
         return obj.user.last_name
 
     def num_job_posts(self, obj):
-        return obj.user.job_posts.count()
+        return obj.job_post_count
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        queryset = queryset.annotate(
+            job_post_count=Count('user__job_posts', distinct=True))
+        return queryset
 
     user_email.short_description = 'Email'
     user_first_name.short_description = 'First Name'
     user_last_name.short_description = 'Last Name'
     num_job_posts.short_description = 'Number of Job Posts'
+    user_email.admin_order_field = 'user__email'
+    user_first_name.admin_order_field = 'user__first_name'
+    user_last_name.admin_order_field = 'user__last_name'
+    num_job_posts.admin_order_field = 'job_post_count'
@@ -1,7 +1,7 @@
 from allauth.account.forms import SignupForm
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from stackportfolio.utils import upload_to_cloudinary
+from image_queue.queue import queue_image_upload
 from django import forms
 from .models import TechUserProfile, RecruiterUserProfile, CustomUser
 
@@ -277,19 +277,20 @@ class CustomUserForm(SignupForm):
         user.phone_number = self.cleaned_data['phone_number']
         user.display_phone_number = self.cleaned_data.get(
             'display_phone_number', False)
-        user.profile_image = self.cleaned_data['profile_image']
         user.bio = self.cleaned_data['bio']
         user.work_title = self.cleaned_data['work_title']
         user.company = self.cleaned_data['company']
         user.linkedin_username = self.cleaned_data['linkedin_username']
         user.twitter_handle = self.cleaned_data['twitter_handle']
 
+        # The image is uploaded in the background once the user
+        # is saved.
         profile_image = self.cleaned_data.get('profile_image')
-        if profile_image:
-            profile_image_url, _ = upload_to_cloudinary(profile_image)
-            user.profile_image = profile_image_url
+        user.profile_image = None
 
         user.save()
+        if profile_image:
+            queue_image_upload(user, 'profile_image', profile_image, 'profile')
         return user
 
 
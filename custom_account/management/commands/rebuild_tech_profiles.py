@@ -0,0 +1,103 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.core.management.base import BaseCommand
+from custom_account.models import TechUserProfile
+from custom_account.tech_profiles import recompute_tech_profiles
+
+
+def rebuild_chunk(profile_ids):
+    """
+    Recomputes a chunk of profiles, in a worker process when the
+    command runs with more than one.
+    """
+    # The tech index lives in each web process's memory, so updating
+    # the one in this process would be thrown away.
+    return recompute_tech_profiles(profile_ids, update_index=False)
+
+
+def profile_chunks(chunk_size):
+    """
+    Yields the profile ids in chunks, each chunk fetched after the
+    last id of the one before, so they're never all in memory.
+    """
+    last_id = 0
+    while True:
+        chunk = list(TechUserProfile.objects.filter(
+            pk__gt=last_id).order_by('pk').values_list(
+                'pk', flat=True)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the tech on every tech profile from the approved tech
+    on the user's projects, a chunk of profiles at a time. Each chunk
+    is one delete and one insert, and chunks can be spread over
+    several processes.
+
+    The users tech index held by each web process isn't updated, so
+    tech filters on users catch up once their index is older than
+    TECH_INDEX_MAX_AGE and is rebuilt.
+    """
+    help = ('Recompute the tech on every tech profile. Tech filters on '
+            'users catch up within TECH_INDEX_MAX_AGE seconds.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of profiles recomputed at a time.')
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Number of processes to spread the chunks over.')
+
+    def handle(self, *args, **options):
+        total = TechUserProfile.objects.count()
+        chunks = profile_chunks(options['chunk_size'])
+        if options['processes'] > 1:
+            results = self.rebuild_in_processes(
+                chunks, options['processes'])
+        else:
+            results = ((chunk, rebuild_chunk(chunk)) for chunk in chunks)
+
+        done = removed = added = 0
+        for chunk, (chunk_removed, chunk_added) in results:
+            done += len(chunk)
+            removed += chunk_removed
+            added += chunk_added
+            self.stdout.write(
+                f'{done}/{total} profiles, '
+                f'{removed} tech removed, {added} added')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {done} tech profiles.'))
+
+    def rebuild_in_processes(self, chunks, processes):
+        """
+        Yields each chunk with its result, in order, keeping a couple
+        of chunks per process queued so only those are in memory.
+        """
+        # Spawned rather than forked, so the workers don't share the
+        # connection this process reads the chunks with.
+        executor = ProcessPoolExecutor(
+            processes, mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup)
+        queued = deque()
+        try:
+            for chunk in chunks:
+                queued.append(
+                    (chunk, executor.submit(rebuild_chunk, chunk)))
+                if len(queued) >= processes * 2:
+                    chunk, future = queued.popleft()
+                    yield chunk, future.result()
+            while queued:
+                chunk, future = queued.popleft()
+                yield chunk, future.result()
+        finally:
+            for _, future in queued:
+                future.cancel()
+            executor.shutdown()
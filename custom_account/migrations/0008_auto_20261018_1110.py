@@ -0,0 +1,24 @@
+# Generated by Django 3.2.22 on 2026-10-18 11:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custom_account', '0007_techuserprofile_work_location_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='custom_acco_search__7b539e_gin'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.22 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custom_account', '0008_auto_20261018_1110'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-id'], name='user_active_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.22 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custom_account', '0009_customuser_user_active_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TechUserProfileTechLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'db_table': 'custom_account_techuserprofile_technologies',
+                'managed': False,
+            },
+        ),
+    ]
@@ -5,6 +5,8 @@ from django.contrib.auth.models import (AbstractBaseUser,
                                         PermissionsMixin,
                                         BaseUserManager)
 from django.utils.text import slugify
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from cloudinary.models import CloudinaryField
 from technology.models import Tech
 from work_location_type.models import WorkLocationType
@@ -135,11 +137,24 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     slug = models.SlugField(unique=True, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     USERNAME_FIELD = 'email'
 
     objects = CustomUserManager()
 
+    class Meta:
+        """
+        Meta class for the custom user model.
+        """
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            models.Index(
+                fields=["-id"],
+                condition=models.Q(is_active=True),
+                name="user_active_idx"),
+        ]
+
     def get_full_name(self):
         """
         Return the full name of a user.
@@ -167,21 +182,31 @@ class TechUserProfile(models.Model):
     def update_tech_with_approved(self):
         """
         Update the tech profile to include only approved technologies
-        from the user's projects.
+        from the user's projects. The update runs once when the
+        current transaction commits, however often it's called.
         """
-        approved_project_techs = Tech.objects.filter(
-            projects__user=self.user, is_approved=True).distinct()
+        from .tech_profiles import schedule_tech_profile_update
+        schedule_tech_profile_update(self.pk)
 
-        # Add new approved techs and remove unapproved or old techs
-        current_techs = set(self.technologies.all())
 
-        for tech in approved_project_techs:
-            if tech not in current_techs:
-                self.technologies.add(tech)
+class TechUserProfileTechLink(models.Model):
+    """
+    A read-only view of the table Django created for
+    TechUserProfile.technologies. Links are still added and removed
+    through TechUserProfile.technologies.
+    """
+    techuserprofile = models.ForeignKey(
+        TechUserProfile, on_delete=models.DO_NOTHING,
+        related_name='tech_links')
+    tech = models.ForeignKey(
+        Tech, on_delete=models.DO_NOTHING, related_name='+')
 
-        for tech in current_techs:
-            if tech not in approved_project_techs:
-                self.technologies.remove(tech)
+    class Meta:
+        """
+        Meta class for the tech user profile tech link model.
+        """
+        managed = False
+        db_table = 'custom_account_techuserprofile_technologies'
 
 
 class RecruiterUserProfile(models.Model):
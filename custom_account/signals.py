@@ -0,0 +1,57 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from custom_account.models import CustomUser, TechUserProfile
+from technology.index import (apply_m2m_change, invalidate_tech_index,
+                              remove_from_tech_index)
+from stackportfolio.card_cache import bump_user_card_version
+from stackportfolio.page_cache import bump_page_tags, user_tag
+from image_queue.deletions import queue_image_deletion
+
+
+@receiver(m2m_changed, sender=TechUserProfile.technologies.through)
+def update_tech_index_on_profile_tech_change(
+        sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep the tech filter index in step with the tech on a user's
+    profile. The index is keyed by user id, so changes made from the
+    Tech side (where pk_set holds profile ids) trigger a rebuild.
+    """
+    if reverse:
+        if action.startswith('post_'):
+            invalidate_tech_index('users')
+        return
+    apply_m2m_change('users', instance.user_id, action, reverse, pk_set)
+
+
+@receiver(post_delete, sender=TechUserProfile)
+def remove_profile_from_tech_index(sender, instance, **kwargs):
+    """
+    Remove a deleted tech profile from the tech filter index.
+    """
+    remove_from_tech_index('users', instance.user_id)
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_cards(sender, instance, **kwargs):
+    """
+    Cards can show the owner's name, title and image, so drop the
+    user's cached cards when their details change.
+    """
+    bump_user_card_version(instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_pages(sender, instance, **kwargs):
+    """
+    Drop the cached pages showing the user's projects or job posts.
+    """
+    bump_page_tags(user_tag(instance.pk))
+
+
+@receiver(post_delete, sender=CustomUser)
+def delete_profile_image(sender, instance, **kwargs):
+    """
+    Queue a deleted user's profile image to be deleted from Cloudinary.
+    """
+    queue_image_deletion(instance.profile_image)
@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from technology.index import get_tech_index
+from .models import TechUserProfile
+
+
+class PendingProfileUpdates:
+    """
+    The tech profiles waiting to be recomputed when the current
+    transaction commits.
+    """
+
+    def __init__(self):
+        self.profile_ids = set()
+        self.flushed = False
+
+    def flush(self):
+        if self.flushed:
+            return
+        self.flushed = True
+        recompute_tech_profiles(self.profile_ids)
+
+
+def schedule_tech_profile_update(profile_id):
+    """
+    Recomputes a tech profile once the current transaction commits,
+    or straight away outside a transaction. However many times a
+    profile is scheduled in a transaction, it is only recomputed once.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        recompute_tech_profiles([profile_id])
+        return
+
+    pending = getattr(connection, 'pending_profile_updates', None)
+    if pending is None or pending.flushed:
+        pending = PendingProfileUpdates()
+        connection.pending_profile_updates = pending
+    pending.profile_ids.add(profile_id)
+    # Registered on every call, as the callbacks of a savepoint that is
+    # rolled back are dropped. Only the first one to run does anything.
+    transaction.on_commit(pending.flush)
+
+
+def recompute_tech_profiles(profile_ids=None, tech_ids=None,
+                            update_index=True):
+    """
+    Brings each profile's tech in line with the approved tech on the
+    user's projects. The difference is worked out in the database and
+    applied with one delete and one bulk insert on the through table,
+    however many profiles and tech there are.
+
+    Only the given profiles are recomputed, or every profile when
+    profile_ids is None. With tech_ids, only those tech are checked,
+    e.g. after they were approved or unapproved.
+
+    The bulk queries don't send m2m_changed, so the users tech index
+    of this process is updated here once the transaction commits,
+    unless update_index is False.
+    """
+    from project.models import Project
+    profile_tech = TechUserProfile.technologies.through
+    project_tech = Project.technologies.through
+
+    stale_rows = profile_tech.objects.all()
+    candidates = project_tech.objects.filter(
+        tech__is_approved=True, project__user__tech_profile__isnull=False)
+    if profile_ids is not None:
+        profile_ids = list(profile_ids)
+        if not profile_ids:
+            return 0, 0
+        stale_rows = stale_rows.filter(techuserprofile_id__in=profile_ids)
+        candidates = candidates.filter(
+            project__user__tech_profile__in=profile_ids)
+    if tech_ids is not None:
+        tech_ids = list(tech_ids)
+        if not tech_ids:
+            return 0, 0
+        stale_rows = stale_rows.filter(tech_id__in=tech_ids)
+        candidates = candidates.filter(tech_id__in=tech_ids)
+
+    stale_rows = stale_rows.exclude(
+        Exists(project_tech.objects.filter(
+            project__user_id=OuterRef('techuserprofile__user_id'),
+            tech_id=OuterRef('tech_id'),
+            tech__is_approved=True)))
+
+    with transaction.atomic():
+        stale = list(stale_rows.values_list(
+            'id', 'techuserprofile__user_id', 'tech_id'))
+        if stale:
+            # One DELETE with the same conditions, rather than a list
+            # of ids that could be longer than the database allows.
+            stale_rows.delete()
+
+        missing = list(candidates.exclude(
+            Exists(profile_tech.objects.filter(
+                techuserprofile_id=OuterRef('project__user__tech_profile'),
+                tech_id=OuterRef('tech_id')))
+        ).values_list(
+            'project__user__tech_profile', 'project__user_id', 'tech_id'
+        ).distinct())
+        profile_tech.objects.bulk_create(
+            [profile_tech(techuserprofile_id=profile_id, tech_id=tech_id)
+             for profile_id, _, tech_id in missing],
+            ignore_conflicts=True)
+
+    if update_index:
+        transaction.on_commit(lambda: update_users_index(stale, missing))
+    return len(stale), len(missing)
+
+
+def update_users_index(stale, missing):
+    index = get_tech_index('users')
+    for _, user_id, tech_id in stale:
+        index.remove(user_id, [tech_id])
+    for _, user_id, tech_id in missing:
+        index.add(user_id, [tech_id])
@@ -1,10 +1,24 @@
 """
 Account app tests.
 """
-from django.db import IntegrityError
+from io import StringIO
+from unittest import mock
+from django.contrib.admin import AdminSite
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, transaction
 from django.test import TestCase
 from django.apps import apps
-from custom_account.models import CustomUser
+from custom_account.admin import CustomUserAdmin
+from custom_account.models import (CustomUser, RecruiterUserProfile,
+                                   TechUserProfile)
+from job_post.models import JobPost
+from project.models import Project
+from stackportfolio.card_cache import user_version_key
+from technology.admin import TechAdmin
+from technology.models import Tech
+from custom_account.tech_profiles import (PendingProfileUpdates,
+                                         recompute_tech_profiles)
 
 
 class AccountTests(TestCase):
@@ -355,3 +369,363 @@ class AccountDeleteTests(TestCase):
         self.user.delete()
         with self.assertRaises(CustomUser.DoesNotExist):  # pylint: disable=no-member
             CustomUser.objects.get(id=user_id)
+
+
+class UserProfileDetailTests(TestCase):
+    """
+    Tests for the user profile page.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='profileuser',
+            first_name='Profile',
+            last_name='User',
+            email='profileuser@example.com',
+            password='password',
+        )
+        TechUserProfile.objects.create(user=self.user)
+        techs = [
+            Tech.objects.create(tech_name=f'Tech {i}', is_approved=True)
+            for i in range(12)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(9):
+                project = Project.objects.create(
+                    name=f'Project {i}', user=self.user)
+                project.technologies.add(*techs)
+
+    def test_user_profile_query_budget(self):
+        """
+        Test that the profile page doesn't run queries per project.
+        """
+        with self.assertNumQueries(7):
+            response = self.client.get('/user/profileuser/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_unchanged_profile_is_not_sent_again(self):
+        """
+        Test that the profile answers a current ETag with a 304, and
+        that deleting one of the user's projects changes the ETag.
+        """
+        etag = self.client.get('/user/profileuser/')['ETag']
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                '/user/profileuser/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Project.objects.get(name='Project 4').delete()
+        response = self.client.get(
+            '/user/profileuser/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class TechProfileUpdateTests(TestCase):
+    """
+    Tests for keeping a tech profile's tech in line with the approved
+    tech on the user's projects.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            first_name='Test',
+            last_name='User',
+            email='testuser@example.com',
+            password='password',
+        )
+        self.profile = TechUserProfile.objects.create(user=self.user)
+        self.django = Tech.objects.create(tech_name='Django', is_approved=True)
+        self.flask = Tech.objects.create(tech_name='Flask', is_approved=True)
+        self.unapproved = Tech.objects.create(tech_name='Unapproved')
+
+    def profile_tech(self):
+        return set(self.profile.technologies.all())
+
+    def test_profile_gets_approved_project_tech(self):
+        """
+        Test that the profile picks up approved tech when a project's
+        tech changes, and loses it when no project uses it.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.create(name='Project', user=self.user)
+            project.technologies.add(
+                self.django, self.flask, self.unapproved)
+        self.assertEqual(self.profile_tech(), {self.django, self.flask})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.technologies.remove(self.flask)
+        self.assertEqual(self.profile_tech(), {self.django})
+
+    def test_updates_in_a_transaction_are_coalesced(self):
+        """
+        Test that many tech changes in one transaction recompute the
+        profile once, with a fixed number of queries.
+        """
+        with self.captureOnCommitCallbacks() as callbacks:
+            project = Project.objects.create(name='Project', user=self.user)
+            project.technologies.clear()
+            for tech in (self.django, self.flask, self.unapproved):
+                project.technologies.add(tech)
+        profile_updates = {
+            callback.__self__ for callback in callbacks
+            if isinstance(getattr(callback, '__self__', None),
+                          PendingProfileUpdates)}
+        self.assertEqual(len(profile_updates), 1)
+
+        with self.assertNumQueries(5):
+            for callback in callbacks:
+                if getattr(callback, '__self__', None) in profile_updates:
+                    callback()
+        self.assertEqual(self.profile_tech(), {self.django, self.flask})
+
+    def test_update_survives_a_rolled_back_savepoint(self):
+        """
+        Test that a profile scheduled before and after a savepoint
+        that is rolled back is still recomputed on commit.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.create(name='Project', user=self.user)
+            try:
+                with transaction.atomic():
+                    project.technologies.add(self.flask)
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+            project.technologies.add(self.django)
+        self.assertEqual(self.profile_tech(), {self.django})
+
+    def test_recompute_removes_unapproved_tech(self):
+        """
+        Test that tech unapproved since the last update is removed.
+        """
+        project = Project.objects.create(name='Project', user=self.user)
+        project.technologies.add(self.django, self.flask)
+        recompute_tech_profiles([self.profile.pk])
+        Tech.objects.filter(pk=self.flask.pk).update(is_approved=False)
+
+        recompute_tech_profiles([self.profile.pk])
+        self.assertEqual(self.profile_tech(), {self.django})
+
+    def test_admin_approval_updates_every_affected_profile(self):
+        """
+        Test that approving and unapproving tech in the admin updates
+        the profiles using it, with the same number of queries however
+        many profiles there are.
+        """
+        users = [self.user] + [
+            CustomUser.objects.create_user(
+                username=f'otheruser{i}',
+                first_name='Other',
+                last_name='User',
+                email=f'other{i}@example.com',
+                password='password',
+            ) for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for user in users[1:]:
+                TechUserProfile.objects.create(user=user)
+            for user in users:
+                project = Project.objects.create(name='Project', user=user)
+                project.technologies.add(self.django, self.unapproved)
+
+        tech_admin = TechAdmin(Tech, AdminSite())
+        with self.assertNumQueries(7):
+            tech_admin.approve_tech(
+                None, Tech.objects.filter(pk=self.unapproved.pk))
+        for user in users:
+            self.assertEqual(
+                set(user.tech_profile.technologies.all()),
+                {self.django, self.unapproved})
+
+        with self.assertNumQueries(7):
+            tech_admin.unapprove_tech(
+                None, Tech.objects.filter(pk=self.unapproved.pk))
+        for user in users:
+            self.assertEqual(
+                set(user.tech_profile.technologies.all()), {self.django})
+
+    def test_rebuild_tech_profiles_command(self):
+        """
+        Test that the command fixes every profile, chunk by chunk.
+        """
+        project = Project.objects.create(name='Project', user=self.user)
+        project.technologies.add(self.django)
+        TechUserProfile.technologies.through.objects.all().delete()
+        self.profile.technologies.through.objects.create(
+            techuserprofile=self.profile, tech=self.unapproved)
+
+        out = StringIO()
+        call_command('rebuild_tech_profiles', chunk_size=1, stdout=out)
+        self.assertEqual(self.profile_tech(), {self.django})
+        self.assertIn('1/1 profiles, 1 tech removed, 1 added',
+                      out.getvalue())
+
+    def test_rebuild_walks_the_profiles_in_chunks(self):
+        """
+        Test that every profile is rebuilt when they don't fill the
+        last chunk, and that the command leaves the tech index alone.
+        """
+        for i in range(2):
+            user = CustomUser.objects.create_user(
+                username=f'otheruser{i}',
+                first_name='Other',
+                last_name='User',
+                email=f'other{i}@example.com',
+                password='password',
+            )
+            TechUserProfile.objects.create(user=user)
+            project = Project.objects.create(name='Project', user=user)
+            project.technologies.add(self.django)
+        TechUserProfile.technologies.through.objects.all().delete()
+
+        out = StringIO()
+        with mock.patch(
+                'custom_account.tech_profiles.get_tech_index') as get_index:
+            call_command('rebuild_tech_profiles', chunk_size=2, stdout=out)
+        get_index.assert_not_called()
+        self.assertIn('2/3 profiles, 0 tech removed, 1 added',
+                      out.getvalue())
+        self.assertIn('3/3 profiles, 0 tech removed, 2 added',
+                      out.getvalue())
+        self.assertIn('Rebuilt 3 tech profiles.', out.getvalue())
+
+
+class AdminChangelistTests(TestCase):
+    """
+    Tests for the number of queries the account changelists run.
+    """
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(
+            email='admin@example.com',
+            username='adminuser',
+            password='password',
+        )
+        self.client.force_login(self.admin)
+        for number in range(5):
+            self.add_users(number)
+
+    def add_users(self, number):
+        """
+        Adds a tech user with two projects and a recruiter user with
+        a job post.
+        """
+        tech_user = CustomUser.objects.create_user(
+            email=f'tech{number}@example.com',
+            username=f'techuser{number}',
+            first_name='Tech',
+            last_name='User',
+            password='password',
+        )
+        TechUserProfile.objects.create(user=tech_user)
+        for name in ('First', 'Second'):
+            Project.objects.create(name=f'{name} {number}', user=tech_user)
+        recruiter = CustomUser.objects.create_user(
+            email=f'recruiter{number}@example.com',
+            username=f'recruiter{number}',
+            first_name='Recruiter',
+            last_name='User',
+            password='password',
+        )
+        RecruiterUserProfile.objects.create(user=recruiter)
+        JobPost.objects.create(name=f'Job {number}', user=recruiter)
+
+    def assertChangelistQueries(self, url, num):
+        """
+        Checks the changelist runs num queries, however many rows it
+        shows.
+        """
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for number in range(5, 10):
+            self.add_users(number)
+        with self.assertNumQueries(num):
+            self.client.get(url)
+        return response
+
+    def test_user_changelist_query_budget(self):
+        """
+        Test that the users' profile types come from one query.
+        """
+        response = self.assertChangelistQueries(
+            '/admin/custom_account/customuser/', 5)
+        self.assertContains(response, 'Tech User')
+        self.assertContains(response, 'Recruiter User')
+
+    def test_tech_profile_changelist_query_budget(self):
+        """
+        Test that the tech profiles' users and project counts come
+        from one query, and the count can be sorted.
+        """
+        self.assertChangelistQueries(
+            '/admin/custom_account/techuserprofile/', 5)
+        response = self.client.get(
+            '/admin/custom_account/techuserprofile/?o=-4')
+        self.assertEqual(
+            response.context['cl'].result_list[0].project_count, 2)
+
+    def test_recruiter_profile_changelist_query_budget(self):
+        """
+        Test that the recruiter profiles' users and job post counts
+        come from one query, and the count can be sorted.
+        """
+        self.assertChangelistQueries(
+            '/admin/custom_account/recruiteruserprofile/', 5)
+        response = self.client.get(
+            '/admin/custom_account/recruiteruserprofile/?o=-4')
+        self.assertEqual(
+            response.context['cl'].result_list[0].job_post_count, 1)
+
+
+class UserAdminActionTests(TestCase):
+    """
+    Tests for the admin actions toggling users in bulk.
+    """
+
+    def setUp(self):
+        self.active = CustomUser.objects.create_user(
+            email='active@example.com',
+            username='activeuser',
+            first_name='Active',
+            last_name='User',
+            password='password',
+        )
+        self.inactive = CustomUser.objects.create_user(
+            email='inactive@example.com',
+            username='inactiveuser',
+            first_name='Inactive',
+            last_name='User',
+            password='password',
+        )
+        self.inactive.is_active = False
+        self.inactive.is_staff = True
+        self.inactive.save()
+        self.user_admin = CustomUserAdmin(CustomUser, AdminSite())
+
+    def test_toggles_flip_each_user(self):
+        """
+        Test that each selected user's status is flipped with one
+        UPDATE, whatever the status of the others.
+        """
+        users = CustomUser.objects.filter(
+            pk__in=[self.active.pk, self.inactive.pk])
+        with self.assertNumQueries(2):
+            self.user_admin.toggle_active_users(None, users)
+        self.user_admin.toggle_staff_users(None, users)
+        self.active.refresh_from_db()
+        self.inactive.refresh_from_db()
+        self.assertFalse(self.active.is_active)
+        self.assertTrue(self.active.is_staff)
+        self.assertTrue(self.inactive.is_active)
+        self.assertFalse(self.inactive.is_staff)
+
+    def test_toggles_drop_cached_cards(self):
+        """
+        Test that the users' card versions change, as they would have
+        if each user had been saved.
+        """
+        key = user_version_key(self.active.pk)
+        cache.set(key, 'old', None)
+        self.user_admin.toggle_active_users(
+            None, CustomUser.objects.filter(pk=self.active.pk))
+        self.assertNotEqual(cache.get(key), 'old')
@@ -1,5 +1,4 @@
 
-import random
 from allauth.account.views import SignupView
 from django.views.generic import TemplateView, UpdateView, DetailView
 from django.shortcuts import reverse, redirect
@@ -8,39 +7,32 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.utils.text import slugify
-from stackportfolio.utils import upload_to_cloudinary
-import cloudinary.uploader
-import cloudinary
+from image_queue.deletions import cloudinary_public_id, queue_image_deletion
+from image_queue.queue import queue_image_upload
+from stackportfolio.card_cache import card_versions
+from stackportfolio.conditional import ConditionalDetailMixin
+from stackportfolio.loaders import project_cards, job_post_cards
+from stackportfolio.page_cache import add_post_tags
 from allauth.socialaccount import providers
 from .forms import (CustomUserEditForm, TechUserForm,
                     RecruiterUserForm, TechUserProfileEditForm,
                     RecruiterUserProfileEditForm, UserSettingsForm
                     )
 from .models import CustomUser
-from project.models import Project
+from project.featured import get_featured_projects
 
 
 class IndexView(TemplateView):
     """
-    To output users for testing on the homepage.
+    The homepage, with a carousel of random featured projects.
     """
     template_name = 'index.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        valid_projects_id_list = Project.objects.filter(
-            active=True,
-            image__isnull=False).values_list(
-            'id',
-            flat=True)
-
-        random_projects_id_list = random.sample(
-            list(valid_projects_id_list), min(len(valid_projects_id_list), 6))
-
-        query_set = Project.objects.filter(id__in=random_projects_id_list)
-
-        context['users'] = CustomUser.objects.all()
-        context['randomProjects'] = query_set
+        context['randomProjects'] = list(get_featured_projects(6))
+        for project in context['randomProjects']:
+            add_post_tags(project)
         return context
 
 
@@ -64,7 +56,7 @@ class RecruiterUserSignupView(SignupView):
     view_name = 'recruiteruser_signup'
 
 
-class UserProfileDetailView(DetailView):
+class UserProfileDetailView(ConditionalDetailMixin, DetailView):
     """
     View to display user profiles.
     """
@@ -74,12 +66,40 @@ class UserProfileDetailView(DetailView):
     slug_field = 'slug'
     slug_url_kwarg = 'slug'
 
+    def get_queryset(self):
+        return CustomUser.objects.select_related(
+            'tech_profile', 'recruiter_profile')
+
+    def get_object_validator(self, obj):
+        """
+        The profile shows the user's projects or job posts, so the
+        validator covers those as well as the user.
+        """
+        if hasattr(obj, 'tech_profile'):
+            posts = obj.projects.all()
+        else:
+            posts = obj.job_posts.all()
+        rows = list(posts.values_list('pk', 'date_updated'))
+        label = posts.model._meta.label_lower
+
+        self.last_modified = max(
+            (updated for _, updated in rows if updated), default=None)
+        return [
+            obj.pk,
+            sorted(rows),
+            card_versions(
+                objects=[(label, pk) for pk, _ in rows],
+                user_ids=[obj.pk]),
+        ]
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if hasattr(self.object, 'tech_profile'):
-            context['user_projects'] = self.object.projects.all()
+            context['user_projects'] = project_cards(
+                self.object.projects.all())
         elif hasattr(self.object, 'recruiter_profile'):
-            context['user_job_posts'] = self.object.job_posts.all()
+            context['user_job_posts'] = job_post_cards(
+                self.object.job_posts.all())
 
         return context
 
@@ -121,34 +141,28 @@ class UserProfileEditView(LoginRequiredMixin, UpdateView):
 
     def form_valid(self, form):
         current_profile = CustomUser.objects.get(pk=self.object.pk)
-        old_image_public_id = None
-
         # Capture the public_id of the existing image
-        if hasattr(current_profile.profile_image, 'public_id'):
-            if ("http://res.cloudinary.com/nvmind/image/upload/" in
-                    current_profile.profile_image.public_id):
-                old_image_public_id = (
-                    current_profile.profile_image.public_id.split(
-                        '/')[-1]
-                )
-            else:
-                old_image_public_id = current_profile.profile_image.public_id
+        old_image_public_id = cloudinary_public_id(
+            current_profile.profile_image)
 
         image_updated = False
+        new_image = None
         # Process new image upload
         if 'profile_image' in form.changed_data:
             new_image = form.cleaned_data['profile_image']
-            if new_image:
-                new_image_url, new_public_id = upload_to_cloudinary(new_image)
-                self.object.profile_image = new_image_url
-                image_updated = True
-            else:
-                self.object.profile_image = None
-                image_updated = True
+            # A new image is uploaded in the background, and the old
+            # one is shown until the upload replaces and deletes it.
+            self.object.profile_image = (
+                current_profile.profile_image if new_image else None)
+            image_updated = True
 
         # Save the form and the model
         response = super(UserProfileEditView, self).form_valid(form)
 
+        if image_updated and new_image:
+            queue_image_upload(
+                self.object, 'profile_image', new_image, 'profile')
+
         if hasattr(self.object, 'tech_profile'):
             tech_profile_form = TechUserProfileEditForm(
                 self.request.POST, instance=self.object.tech_profile)
@@ -161,17 +175,9 @@ class UserProfileEditView(LoginRequiredMixin, UpdateView):
             if recruiter_profile_form.is_valid():
                 recruiter_profile_form.save()
 
-        if image_updated and old_image_public_id:
-            current_public_id = None
-            if hasattr(self.object.profile_image, 'public_id'):
-                current_public_id = self.object.profile_image.public_id
-
-            if old_image_public_id != current_public_id:
-                try:
-                    cloudinary.uploader.destroy(
-                        old_image_public_id, invalidate=True)
-                except Exception as e:
-                    print(f"Error deleting old photo: {e}")
+        # A cleared image is deleted straight away.
+        if image_updated and not new_image:
+            queue_image_deletion(old_image_public_id)
 
         messages.success(self.request, "Profile successfully updated.")
 
@@ -240,19 +246,8 @@ class UserSettingsView(LoginRequiredMixin, UpdateView):
 def delete_user(request, slug):
     user = request.user
     if user.slug == slug:
-        if user.profile_image:
-            if ("http://res.cloudinary.com/nvmind/image/upload/" in
-                    user.profile_image.public_id):
-                photo_public_id = user.profile_image.public_id.split(
-                    '/')[-1]
-            else:
-                photo_public_id = user.profile_image.public_id
-
-            try:
-                cloudinary.uploader.destroy(photo_public_id, invalidate=True)
-            except Exception as e:
-                print(f"Error deleting profile photo: {e}")
-
+        # The profile image is queued for deletion by the post_delete
+        # signal.
         try:
             if hasattr(user, 'tech_profile'):
                 pass
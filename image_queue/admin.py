@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import PendingImageDeletion, PendingUpload
+
+
+@admin.register(PendingUpload)
+class PendingUploadAdmin(admin.ModelAdmin):
+    list_display = ('content_type', 'object_id', 'field_name', 'status',
+                    'attempts', 'date_updated')
+    list_filter = ('status',)
+    readonly_fields = ('last_error',)
+
+
+@admin.register(PendingImageDeletion)
+class PendingImageDeletionAdmin(admin.ModelAdmin):
+    list_display = ('public_id', 'attempts', 'next_attempt_at')
+    search_fields = ('public_id',)
+    readonly_fields = ('last_error',)
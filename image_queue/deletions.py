@@ -0,0 +1,155 @@
+import logging
+import re
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from stackportfolio.periodic import start_periodic_task
+from .models import PendingImageDeletion
+from .uploaders import get_uploader
+
+logger = logging.getLogger('image_queue.deletions')
+
+
+# Images saved by url have the whole url as their public_id.
+UPLOAD_URL_RE = re.compile(
+    r'/(?:image|raw|video)/(?:upload|private|authenticated)/'
+    r'(?:v\d+/)?(?P<public_id>.+?)(?:\.[^./]+)?$')
+
+
+def cloudinary_public_id(image):
+    """
+    Returns the Cloudinary public_id of an image field value, a
+    public_id or an image url.
+    """
+    if not image:
+        return None
+    public_id = str(getattr(image, 'public_id', image) or '')
+    if '://' in public_id:
+        match = UPLOAD_URL_RE.search(public_id)
+        if match:
+            return match['public_id']
+    return public_id or None
+
+
+def queue_image_deletion(*images):
+    """
+    Queues images to be deleted from Cloudinary. Queuing an image
+    that's already queued does nothing.
+    """
+    public_ids = {cloudinary_public_id(image) for image in images}
+    public_ids.discard(None)
+    if not public_ids:
+        return
+    PendingImageDeletion.objects.bulk_create(
+        [PendingImageDeletion(public_id=public_id)
+         for public_id in public_ids],
+        ignore_conflicts=True)
+
+    mode = getattr(settings, 'IMAGE_UPLOAD_MODE', 'thread')
+    if mode == 'sync':
+        process_pending_deletions()
+    elif mode == 'thread':
+        # Imported here as the upload queue deletes orphaned images.
+        from .queue import get_executor
+        transaction.on_commit(
+            lambda: get_executor().submit(process_deletions_in_thread))
+
+
+def retry_delay(attempts):
+    """
+    Doubles the wait after each failed attempt, up to
+    IMAGE_DELETE_MAX_DELAY.
+    """
+    base = getattr(settings, 'IMAGE_DELETE_RETRY_DELAY', 60)
+    longest = getattr(settings, 'IMAGE_DELETE_MAX_DELAY', 60 * 60 * 24)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), longest))
+
+
+def claim_deletions(batch_size):
+    """
+    Takes a batch of deletions that are due, pushing their next
+    attempt back so other workers skip them while they're deleted.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = PendingImageDeletion.objects.filter(
+            next_attempt_at__lte=now).order_by('next_attempt_at')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        PendingImageDeletion.objects.filter(
+            pk__in=[deletion.pk for deletion in batch]).update(
+            next_attempt_at=now + retry_delay(1))
+    return batch
+
+
+def process_pending_deletions(batch_size=None):
+    """
+    Deletes due images from Cloudinary in batches and returns how many
+    were deleted. Deleting is idempotent, so an image deleted twice
+    by racing workers is harmless.
+    """
+    if batch_size is None:
+        # Cloudinary deletes at most 100 images per request.
+        batch_size = getattr(settings, 'IMAGE_DELETE_BATCH_SIZE', 100)
+
+    deleted_count = 0
+    while True:
+        batch = claim_deletions(batch_size)
+        if not batch:
+            return deleted_count
+
+        try:
+            deleted = get_uploader().delete(
+                [deletion.public_id for deletion in batch])
+            error = 'Not deleted by Cloudinary'
+        except Exception as e:
+            deleted, error = set(), str(e)
+
+        PendingImageDeletion.objects.filter(public_id__in=deleted).delete()
+        deleted_count += len(deleted)
+
+        # Reschedule what's left, with one update per attempt count.
+        failed = {}
+        for deletion in batch:
+            if deletion.public_id not in deleted:
+                logger.warning(
+                    'Error deleting image %s from Cloudinary on attempt '
+                    '%s: %s', deletion.public_id, deletion.attempts + 1,
+                    error)
+                failed.setdefault(deletion.attempts + 1, []).append(
+                    deletion.pk)
+        now = timezone.now()
+        for attempts, pks in failed.items():
+            PendingImageDeletion.objects.filter(pk__in=pks).update(
+                attempts=attempts,
+                last_error=error,
+                next_attempt_at=now + retry_delay(attempts))
+
+        if len(batch) < batch_size:
+            return deleted_count
+
+
+def process_deletions_in_thread():
+    try:
+        process_pending_deletions()
+    except Exception:
+        logger.exception('Error processing image deletions')
+    finally:
+        connection.close()
+
+
+def start_deletion_drain():
+    """
+    In thread mode, deletions are only processed when one is queued,
+    so failed deletions backing off would wait for the next one. The
+    drain processes those that are due every IMAGE_DELETE_DRAIN_INTERVAL
+    seconds instead.
+    """
+    if getattr(settings, 'IMAGE_UPLOAD_MODE', 'thread') != 'thread':
+        return None
+    return start_periodic_task(
+        'image-deletion-drain',
+        getattr(settings, 'IMAGE_DELETE_DRAIN_INTERVAL', 60 * 5),
+        process_pending_deletions)
@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from image_queue.deletions import process_pending_deletions
+
+
+class Command(BaseCommand):
+    """
+    Deletes queued images from Cloudinary. Runs until stopped, or
+    once with --once, e.g. from a scheduler.
+    """
+    help = 'Delete queued images from Cloudinary.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process the queue once and exit.')
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of images to delete per request.')
+        parser.add_argument(
+            '--interval', type=float, default=30,
+            help='Seconds to wait between runs.')
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = process_pending_deletions(options['batch_size'])
+            if deleted:
+                self.stdout.write(f'Deleted {deleted} images.')
+            if options['once']:
+                break
+            time.sleep(options['interval'])
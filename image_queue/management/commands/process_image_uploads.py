@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from image_queue.queue import process_pending_uploads
+
+
+class Command(BaseCommand):
+    """
+    Uploads queued images to Cloudinary. Runs until stopped, or
+    once with --once, e.g. from a scheduler.
+    """
+    help = 'Upload queued images to Cloudinary.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process the queue once and exit.')
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='Number of uploads to claim at a time.')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds to wait when the queue is empty.')
+
+    def handle(self, *args, **options):
+        while True:
+            uploaded = process_pending_uploads(options['batch_size'])
+            if uploaded:
+                self.stdout.write(f'Uploaded {uploaded} images.')
+            if options['once']:
+                break
+            if not uploaded:
+                time.sleep(options['interval'])
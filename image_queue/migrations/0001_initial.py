@@ -0,0 +1,45 @@
+# Generated by Django 3.2.22 on 2026-10-18 11:25
+
+import django.core.files.storage
+from django.db import migrations, models
+import django.db.models.deletion
+import pathlib
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('field_name', models.CharField(max_length=50)),
+                ('preset', models.CharField(max_length=20)),
+                ('file', models.FileField(storage=django.core.files.storage.FileSystemStorage(location=pathlib.PurePosixPath('/root/package/upload_queue')), upload_to='pending')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'ordering': ['date_created'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pendingupload',
+            index=models.Index(fields=['status', 'date_updated'], name='pendingupload_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pendingupload',
+            index=models.Index(fields=['content_type', 'object_id'], name='pendingupload_object_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.22 on 2026-10-18 11:28
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_queue', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingImageDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.CharField(max_length=255, unique=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='pendingimagedeletion',
+            index=models.Index(fields=['next_attempt_at'], name='pendingdeletion_next_idx'),
+        ),
+    ]
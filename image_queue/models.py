@@ -0,0 +1,86 @@
+from django.db import models
+from django.core.files.storage import FileSystemStorage
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+
+
+# Raw uploads are kept on local disk until they've been sent on to
+# Cloudinary. A worker run with the process_image_uploads command
+# has to share this directory with the web processes.
+upload_storage = FileSystemStorage(
+    location=getattr(
+        settings, 'IMAGE_UPLOAD_ROOT', settings.BASE_DIR / 'upload_queue'))
+
+
+class PendingUpload(models.Model):
+    """
+    An image waiting to be uploaded to Cloudinary. Once uploaded,
+    the image's url is saved to field_name on the object and the
+    pending upload is deleted.
+    """
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (FAILED, 'Failed'),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    field_name = models.CharField(max_length=50)
+    preset = models.CharField(max_length=20)
+    file = models.FileField(storage=upload_storage, upload_to='pending')
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta class for the pending upload model.
+        """
+        ordering = ["date_created"]
+        indexes = [
+            models.Index(
+                fields=["status", "date_updated"],
+                name="pendingupload_status_idx"),
+            models.Index(
+                fields=["content_type", "object_id"],
+                name="pendingupload_object_idx"),
+        ]
+
+    def __str__(self):
+        return f'{self.content_type} {self.object_id} {self.field_name}'
+
+
+class PendingImageDeletion(models.Model):
+    """
+    A Cloudinary image waiting to be deleted. Deletions are retried
+    with a growing delay until Cloudinary confirms them, so images
+    are never left behind when a delete fails.
+    """
+    public_id = models.CharField(max_length=255, unique=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """
+        Meta class for the pending image deletion model.
+        """
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                name="pendingdeletion_next_idx"),
+        ]
+
+    def __str__(self):
+        return self.public_id
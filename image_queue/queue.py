@@ -0,0 +1,197 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from stackportfolio.periodic import start_periodic_task
+from .deletions import cloudinary_public_id, queue_image_deletion
+from .models import PendingUpload
+from .uploaders import get_uploader
+
+logger = logging.getLogger('image_queue.queue')
+
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Returns the thread pool uploads are run on in thread mode,
+    starting it on first use.
+    """
+    global executor
+    if executor is None:
+        with executor_lock:
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'IMAGE_UPLOAD_THREADS', 2),
+                    thread_name_prefix='image-upload')
+    return executor
+
+
+def queue_image_upload(instance, field_name, image, preset):
+    """
+    Stores the image on local disk and queues it to be uploaded and
+    saved to the instance's field. The field should keep its current
+    image until then, which is deleted from Cloudinary once the new
+    one is saved. Empty fields show their placeholder meanwhile.
+
+    How the upload is run depends on IMAGE_UPLOAD_MODE: 'thread'
+    uploads on a thread pool once the current transaction commits,
+    'worker' leaves it for the process_image_uploads command and
+    'sync' uploads straight away.
+    """
+    content_type = ContentType.objects.get_for_model(instance)
+
+    # A newer image replaces any still waiting for the same field.
+    superseded = PendingUpload.objects.filter(
+        content_type=content_type,
+        object_id=instance.pk,
+        field_name=field_name)
+    for pending in superseded:
+        pending.file.delete(save=False)
+    superseded.delete()
+
+    pending = PendingUpload(
+        content_type=content_type,
+        object_id=instance.pk,
+        field_name=field_name,
+        preset=preset)
+    pending.file.save(image.name, image, save=False)
+    pending.save()
+
+    mode = getattr(settings, 'IMAGE_UPLOAD_MODE', 'thread')
+    if mode == 'sync':
+        process_claimed(pending.pk)
+    elif mode == 'thread':
+        transaction.on_commit(
+            lambda: get_executor().submit(process_in_thread, pending.pk))
+    return pending
+
+
+def claim(pending_id, stale_before=None):
+    """
+    Marks a pending upload as processing, returning False if another
+    thread or worker got to it first. Uploads stuck processing since
+    stale_before, e.g. after a worker crashed, can be claimed again.
+    """
+    condition = Q(status=PendingUpload.PENDING)
+    if stale_before is not None:
+        condition |= Q(
+            status=PendingUpload.PROCESSING, date_updated__lt=stale_before)
+    claimed = PendingUpload.objects.filter(condition, pk=pending_id).update(
+        status=PendingUpload.PROCESSING, date_updated=timezone.now())
+    return claimed == 1
+
+
+def process_claimed(pending_id, stale_before=None):
+    """
+    Claims and processes a pending upload.
+    """
+    if not claim(pending_id, stale_before):
+        return False
+    pending = PendingUpload.objects.filter(pk=pending_id).first()
+    if pending is None:
+        return False
+    return process_upload(pending)
+
+
+def process_upload(pending):
+    """
+    Uploads a claimed image and saves its url to the object. Failed
+    uploads go back in the queue until IMAGE_UPLOAD_MAX_ATTEMPTS is
+    reached.
+    """
+    try:
+        url, public_id = get_uploader().upload(
+            pending.file.path, pending.preset)
+    except Exception as e:
+        attempts = pending.attempts + 1
+        logger.warning(
+            'Error uploading image %s on attempt %s: %s',
+            pending.pk, attempts, e)
+        max_attempts = getattr(settings, 'IMAGE_UPLOAD_MAX_ATTEMPTS', 3)
+        PendingUpload.objects.filter(pk=pending.pk).update(
+            attempts=attempts,
+            status=(PendingUpload.FAILED if attempts >= max_attempts
+                    else PendingUpload.PENDING),
+            last_error=str(e),
+            date_updated=timezone.now())
+        return False
+
+    with transaction.atomic():
+        # The image is deleted again if a newer image replaced it
+        # while it was uploading.
+        if not PendingUpload.objects.select_for_update().filter(
+                pk=pending.pk).exists():
+            queue_image_deletion(public_id)
+            return False
+
+        model = pending.content_type.model_class()
+        instance = model.objects.filter(pk=pending.object_id).first()
+        if instance is None:
+            queue_image_deletion(public_id)
+        else:
+            replaced_image = getattr(instance, pending.field_name)
+            setattr(instance, pending.field_name, url)
+            update_fields = [pending.field_name]
+            if any(field.name == 'date_updated'
+                   for field in model._meta.concrete_fields):
+                update_fields.append('date_updated')
+            instance.save(update_fields=update_fields)
+            # The image being replaced is only deleted now the new one
+            # is saved, so a failed upload leaves the old image.
+            if cloudinary_public_id(replaced_image) != public_id:
+                queue_image_deletion(replaced_image)
+        PendingUpload.objects.filter(pk=pending.pk).delete()
+
+    pending.file.delete(save=False)
+    return True
+
+
+def process_in_thread(pending_id):
+    try:
+        process_claimed(pending_id)
+    except Exception:
+        logger.exception('Error processing image upload %s', pending_id)
+    finally:
+        connection.close()
+
+
+def process_pending_uploads(limit=50):
+    """
+    Processes up to `limit` queued uploads, oldest first, and returns
+    how many were uploaded.
+    """
+    stale_before = timezone.now() - timedelta(
+        seconds=getattr(settings, 'IMAGE_UPLOAD_STALE_AFTER', 60 * 10))
+    pending_ids = list(PendingUpload.objects.filter(
+        Q(status=PendingUpload.PENDING) |
+        Q(status=PendingUpload.PROCESSING, date_updated__lt=stale_before)
+    ).order_by('date_created').values_list('pk', flat=True)[:limit])
+
+    uploaded = 0
+    for pending_id in pending_ids:
+        if process_claimed(pending_id, stale_before):
+            uploaded += 1
+    return uploaded
+
+
+def start_upload_sweeper():
+    """
+    In thread mode, uploads are handed to the thread pool when they're
+    queued, so any left pending or processing when a worker restarts
+    would never be picked up. The sweeper processes them every
+    IMAGE_UPLOAD_SWEEP_INTERVAL seconds instead.
+    """
+    if getattr(settings, 'IMAGE_UPLOAD_MODE', 'thread') != 'thread':
+        return None
+    return start_periodic_task(
+        'image-upload-sweeper',
+        getattr(settings, 'IMAGE_UPLOAD_SWEEP_INTERVAL', 60),
+        process_pending_uploads)
@@ -0,0 +1,302 @@
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from custom_account.models import CustomUser, TechUserProfile
+from project.models import Project
+from stackportfolio.periodic import PeriodicTask
+from .deletions import (cloudinary_public_id, process_pending_deletions,
+                        queue_image_deletion, start_deletion_drain)
+from .models import PendingImageDeletion, PendingUpload
+from .queue import (process_pending_uploads, process_upload,
+                    queue_image_upload, start_upload_sweeper)
+
+
+# The smallest valid GIF, for the image fields.
+GIF = (
+    b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9'
+    b'\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00'
+    b'\x02\x02D\x01\x00;')
+
+
+def image_file(name='image.gif'):
+    return SimpleUploadedFile(name, GIF, content_type='image/gif')
+
+
+class FailingUploader:
+    def upload(self, path, preset):
+        raise ConnectionError('Cloudinary is down')
+
+    def delete(self, public_ids):
+        raise ConnectionError('Cloudinary is down')
+
+
+@override_settings(
+    IMAGE_UPLOADER='image_queue.uploaders.FakeUploader',
+    IMAGE_UPLOAD_MODE='worker')
+class ImageQueueTests(TestCase):
+    """
+    Tests for the background image upload queue.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            first_name='Test',
+            last_name='User',
+            email='testuser@example.com',
+            password='password',
+        )
+        TechUserProfile.objects.create(user=self.user)
+        self.project = Project.objects.create(
+            name='Test Project', user=self.user)
+
+    def tearDown(self):
+        for pending in PendingUpload.objects.all():
+            pending.file.delete(save=False)
+
+    def test_worker_uploads_queued_image(self):
+        """
+        Test that a queued image is left as a placeholder until the
+        worker uploads it, then saved to the project.
+        """
+        pending = queue_image_upload(
+            self.project, 'image', image_file(), 'project')
+        self.assertTrue(pending.file.storage.exists(pending.file.name))
+        self.project.refresh_from_db()
+        self.assertFalse(self.project.image)
+
+        call_command('process_image_uploads', once=True, stdout=StringIO())
+
+        self.project.refresh_from_db()
+        self.assertIn('fake/project/', self.project.image.public_id)
+        self.assertFalse(PendingUpload.objects.exists())
+        self.assertFalse(pending.file.storage.exists(pending.file.name))
+
+    def test_newer_image_replaces_queued_one(self):
+        """
+        Test that only the latest image for a field stays queued.
+        """
+        queue_image_upload(self.project, 'image', image_file(), 'project')
+        queue_image_upload(
+            self.project, 'image', image_file('newer.gif'), 'project')
+        self.assertEqual(PendingUpload.objects.count(), 1)
+
+        process_pending_uploads()
+        self.project.refresh_from_db()
+        self.assertIn('newer', self.project.image.public_id)
+
+    @override_settings(
+        IMAGE_UPLOADER='image_queue.tests.FailingUploader',
+        IMAGE_UPLOAD_MAX_ATTEMPTS=2)
+    def test_failed_uploads_are_retried_then_marked_failed(self):
+        """
+        Test that a failed upload is retried up to the maximum
+        number of attempts.
+        """
+        queue_image_upload(self.project, 'image', image_file(), 'project')
+
+        with self.assertLogs('image_queue.queue', 'WARNING') as logs:
+            self.assertEqual(process_pending_uploads(), 0)
+        self.assertIn('attempt 1', logs.output[0])
+        self.assertIn('Cloudinary is down', logs.output[0])
+        pending = PendingUpload.objects.get()
+        self.assertEqual(pending.status, PendingUpload.PENDING)
+        self.assertEqual(pending.attempts, 1)
+        self.assertIn('Cloudinary is down', pending.last_error)
+
+        with self.assertLogs('image_queue.queue', 'WARNING'):
+            process_pending_uploads()
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, PendingUpload.FAILED)
+        self.assertEqual(process_pending_uploads(), 0)
+
+    @override_settings(IMAGE_UPLOAD_MODE='sync')
+    def test_create_project_view_queues_image(self):
+        """
+        Test that the project create view hands the image to the
+        queue rather than uploading it itself.
+        """
+        self.client.login(email='testuser@example.com', password='password')
+        response = self.client.post(
+            f'/user/{self.user.slug}/project/create', {
+                'name': 'Queued Project',
+                'description': 'A project with an image',
+                'image': image_file(),
+                'active': True,
+            })
+        self.assertEqual(response.status_code, 302)
+        project = Project.objects.get(name='Queued Project')
+        self.assertIn('fake/project/', project.image.public_id)
+
+
+@override_settings(
+    IMAGE_UPLOADER='image_queue.uploaders.FakeUploader',
+    IMAGE_UPLOAD_MODE='worker')
+class ImageDeletionTests(TestCase):
+    """
+    Tests for the Cloudinary image deletion queue.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            first_name='Test',
+            last_name='User',
+            email='testuser@example.com',
+            password='password',
+        )
+        TechUserProfile.objects.create(user=self.user)
+        self.project = Project.objects.create(
+            name='Test Project',
+            user=self.user,
+            image='http://res.cloudinary.com/nvmind/image/upload/'
+                  'v1700000000/abc123.webp')
+
+    def test_public_id_normalisation(self):
+        """
+        Test that public_ids are found in urls and field values.
+        """
+        self.assertEqual(cloudinary_public_id(self.project.image), 'abc123')
+        self.assertEqual(
+            cloudinary_public_id(
+                'https://res.cloudinary.com/demo/image/upload/'
+                'v1/folder/name.webp'),
+            'folder/name')
+        self.assertEqual(cloudinary_public_id('folder/name'), 'folder/name')
+        self.assertIsNone(cloudinary_public_id(None))
+        self.assertIsNone(cloudinary_public_id(''))
+
+    def test_deleting_project_queues_image_once(self):
+        """
+        Test that deleting a project queues its image, and queuing
+        the same image again is ignored.
+        """
+        self.project.delete()
+        queue_image_deletion('abc123')
+        self.assertEqual(
+            list(PendingImageDeletion.objects.values_list(
+                'public_id', flat=True)),
+            ['abc123'])
+
+    def test_worker_deletes_in_batches(self):
+        """
+        Test that the worker deletes every queued image and empties
+        the queue.
+        """
+        queue_image_deletion(*[f'image{i}' for i in range(5)])
+        self.assertEqual(process_pending_deletions(batch_size=2), 5)
+        self.assertFalse(PendingImageDeletion.objects.exists())
+
+    @override_settings(IMAGE_UPLOADER='image_queue.tests.FailingUploader')
+    def test_failed_deletions_are_retried_later(self):
+        """
+        Test that a failed deletion stays queued with its next attempt
+        pushed back.
+        """
+        queue_image_deletion('abc123')
+        with self.assertLogs('image_queue.deletions', 'WARNING') as logs:
+            self.assertEqual(process_pending_deletions(), 0)
+        self.assertIn('abc123', logs.output[0])
+        self.assertIn('attempt 1', logs.output[0])
+
+        deletion = PendingImageDeletion.objects.get()
+        self.assertEqual(deletion.attempts, 1)
+        self.assertIn('Cloudinary is down', deletion.last_error)
+        self.assertGreater(deletion.next_attempt_at, timezone.now())
+
+        # Not due yet, so it isn't tried again straight away.
+        self.assertEqual(process_pending_deletions(), 0)
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.attempts, 1)
+
+    def test_replaced_upload_is_deleted(self):
+        """
+        Test that an image uploaded after it was replaced is queued
+        for deletion.
+        """
+        pending = queue_image_upload(
+            self.project, 'image', image_file(), 'project')
+        PendingUpload.objects.filter(pk=pending.pk).delete()
+        process_upload(pending)
+        pending.file.delete(save=False)
+        self.assertTrue(PendingImageDeletion.objects.filter(
+            public_id__startswith='fake/project/').exists())
+
+    def test_old_image_is_deleted_once_the_new_one_is_saved(self):
+        """
+        Test that the image being replaced is kept until the upload
+        saves the new one, and only queued for deletion then.
+        """
+        queue_image_upload(self.project, 'image', image_file(), 'project')
+        self.assertFalse(PendingImageDeletion.objects.exists())
+
+        process_pending_uploads()
+        self.project.refresh_from_db()
+        self.assertIn('fake/project/', self.project.image.public_id)
+        self.assertEqual(
+            list(PendingImageDeletion.objects.values_list(
+                'public_id', flat=True)),
+            ['abc123'])
+
+    @override_settings(
+        IMAGE_UPLOADER='image_queue.tests.FailingUploader',
+        IMAGE_UPLOAD_MAX_ATTEMPTS=1)
+    def test_failed_upload_keeps_the_old_image(self):
+        """
+        Test that the project keeps its image when the upload of its
+        replacement fails for good.
+        """
+        pending = queue_image_upload(
+            self.project, 'image', image_file(), 'project')
+        with self.assertLogs('image_queue.queue', 'WARNING'):
+            process_pending_uploads()
+        pending.file.delete(save=False)
+
+        self.project.refresh_from_db()
+        self.assertEqual(cloudinary_public_id(self.project.image), 'abc123')
+        self.assertFalse(PendingImageDeletion.objects.exists())
+
+
+class PeriodicTaskTests(TestCase):
+    """
+    Tests for sweeping up uploads and deletions in the web process.
+    """
+
+    def test_sweeper_only_runs_in_thread_mode(self):
+        """
+        Test that the sweeper isn't started when a worker command
+        processes the uploads.
+        """
+        with override_settings(IMAGE_UPLOAD_MODE='worker'):
+            self.assertIsNone(start_upload_sweeper())
+        with override_settings(IMAGE_UPLOAD_SWEEP_INTERVAL=None):
+            self.assertIsNone(start_upload_sweeper())
+
+    def test_deletion_drain_only_runs_in_thread_mode(self):
+        """
+        Test that the drain isn't started when a worker command
+        processes the deletions.
+        """
+        with override_settings(IMAGE_UPLOAD_MODE='worker'):
+            self.assertIsNone(start_deletion_drain())
+        with override_settings(IMAGE_DELETE_DRAIN_INTERVAL=None):
+            self.assertIsNone(start_deletion_drain())
+
+    def test_failing_task_is_logged_and_runs_again(self):
+        """
+        Test that an error in a run is logged rather than stopping
+        the task.
+        """
+        calls = []
+
+        def fail():
+            calls.append(1)
+            raise ConnectionError('Cloudinary is down')
+
+        task = PeriodicTask('test-task', 60, fail)
+        with self.assertLogs('stackportfolio.periodic', 'ERROR'):
+            task.run_once()
+            task.run_once()
+        self.assertEqual(len(calls), 2)
@@ -0,0 +1,64 @@
+from pathlib import Path
+import cloudinary.api
+from django.conf import settings
+from django.utils.module_loading import import_string
+from stackportfolio.utils import (upload_to_cloudinary,
+                                  upload_project_to_cloudinary)
+
+
+class CloudinaryUploader:
+    """
+    Uploads images to Cloudinary with the transformation for each
+    preset.
+    """
+    presets = {
+        'profile': upload_to_cloudinary,
+        'project': upload_project_to_cloudinary,
+    }
+
+    def upload(self, path, preset):
+        """
+        Uploads the image at path and returns its url and public_id.
+        """
+        return self.presets[preset](str(path))
+
+    def delete(self, public_ids):
+        """
+        Deletes images in one request and returns the public_ids
+        Cloudinary no longer has, including any already deleted.
+        """
+        response = cloudinary.api.delete_resources(
+            list(public_ids), invalidate=True)
+        return {
+            public_id for public_id, result in response['deleted'].items()
+            if result in ('deleted', 'not_found')}
+
+
+class FakeUploader:
+    """
+    Returns a made up Cloudinary url without uploading anything, and
+    deletes nothing. For tests and local development.
+    """
+    uploaded = []
+    deleted = []
+
+    def upload(self, path, preset):
+        public_id = f'fake/{preset}/{Path(path).stem}'
+        self.uploaded.append(public_id)
+        return (
+            f'http://res.cloudinary.com/demo/image/upload/{public_id}.webp',
+            public_id)
+
+    def delete(self, public_ids):
+        self.deleted.extend(public_ids)
+        return set(public_ids)
+
+
+def get_uploader():
+    """
+    Returns an instance of the uploader set in IMAGE_UPLOADER.
+    """
+    uploader_path = getattr(
+        settings, 'IMAGE_UPLOADER',
+        'image_queue.uploaders.CloudinaryUploader')
+    return import_string(uploader_path)()
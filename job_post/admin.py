@@ -1,9 +1,14 @@
 from django.contrib import admin
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from stackportfolio.card_cache import bump_card_versions
+from stackportfolio.large_admin import LargeTableAdminMixin
+from stackportfolio.page_cache import bump_listing_pages
 from .models import JobPost, Tech, WorkLocationType
 
 
 @admin.register(JobPost)
-class JobPostAdmin(admin.ModelAdmin):
+class JobPostAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'author_email', 'company', 'location',
                     'salary_from', 'salary_to', 'salary_currency', 'active',
                     'view_count', 'date_created', 'date_updated')
@@ -11,6 +16,7 @@ class JobPostAdmin(admin.ModelAdmin):
     list_filter = ('active', 'company', 'location',
                    'salary_currency', 'technologies', 'work_location_type')
     ordering = ('-date_created', 'name')
+    list_select_related = ('user',)
     actions = ['toggle_active']
 
     def author_email(self, obj):
@@ -21,6 +27,7 @@ class JobPostAdmin(admin.ModelAdmin):
 
     author_email.short_description = 'Author Email'
     view_count.short_description = 'View Count'
+    author_email.admin_order_field = 'user__email'
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
@@ -34,5 +41,17 @@ class JobPostAdmin(admin.ModelAdmin):
         return super().formfield_for_manytomany(db_field, request, **kwargs)
 
     def toggle_active(self, request, queryset):
-        queryset.update(active=not queryset.first().active)
+        """
+        Flips the active status of each selected job post with one
+        UPDATE, then drops the cached cards and pages the skipped save
+        signals would have.
+        """
+        pks = list(queryset.values_list('pk', flat=True))
+        queryset.update(
+            active=Case(
+                When(active=True, then=Value(False)),
+                default=Value(True)),
+            date_updated=timezone.now())
+        bump_card_versions(JobPost, pks)
+        bump_listing_pages(JobPost, pks)
     toggle_active.short_description = 'Toggle Active'
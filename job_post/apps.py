@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class JobPostConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'job_post'
+
+    def ready(self):
+        import job_post.signals
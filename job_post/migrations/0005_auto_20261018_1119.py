@@ -0,0 +1,21 @@
+# Generated by Django 3.2.22 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_post', '0004_auto_20261018_1110'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-date_created'], name='jobpost_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['user', '-date_created'], name='jobpost_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.22 on 2026-10-18 11:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_post', '0005_auto_20261018_1119'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='jobpost',
+            name='jobpost_active_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-date_created', '-id'], name='jobpost_active_created_idx'),
+        ),
+    ]
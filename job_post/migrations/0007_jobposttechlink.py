@@ -0,0 +1,23 @@
+# Generated by Django 3.2.22 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_post', '0006_auto_20261018_1122'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobPostTechLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'db_table': 'job_post_jobpost_technologies',
+                'managed': False,
+            },
+        ),
+    ]
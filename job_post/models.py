@@ -1,6 +1,8 @@
 from django.db import models
 from django.urls import reverse
 from django.db import IntegrityError
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from technology.models import Tech
 from work_location_type.models import WorkLocationType
 from custom_account.models import CustomUser
@@ -32,12 +34,23 @@ class JobPost(models.Model):
     salary_currency = models.CharField(max_length=3, blank=True, null=True)
     date_created = models.DateTimeField(auto_now_add=True, null=True)
     date_updated = models.DateTimeField(auto_now=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         """
         Meta class for the job post model.
         """
         ordering = ["-date_created"]
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            models.Index(
+                fields=["-date_created", "-id"],
+                condition=models.Q(active=True),
+                name="jobpost_active_created_idx"),
+            models.Index(
+                fields=["user", "-date_created"],
+                name="jobpost_user_created_idx"),
+        ]
 
     def __str__(self):
         """
@@ -78,3 +91,22 @@ class JobPost(models.Model):
                 "Only Recruiters can create projects.")
 
         super(JobPost, self).save(*args, **kwargs)
+
+
+class JobPostTechLink(models.Model):
+    """
+    A read-only view of the table Django created for
+    JobPost.technologies. Links are still added and removed through
+    JobPost.technologies.
+    """
+    jobpost = models.ForeignKey(
+        JobPost, on_delete=models.DO_NOTHING, related_name="tech_links")
+    tech = models.ForeignKey(
+        Tech, on_delete=models.DO_NOTHING, related_name="+")
+
+    class Meta:
+        """
+        Meta class for the job post tech link model.
+        """
+        managed = False
+        db_table = "job_post_jobpost_technologies"
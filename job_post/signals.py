@@ -0,0 +1,85 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from job_post.models import JobPost
+from technology.index import apply_m2m_change, remove_from_tech_index
+from stackportfolio.card_cache import bump_card_version, bump_card_versions
+from stackportfolio.page_cache import (bump_page_tags, bump_post_pages,
+                                       object_tag, remember_listing)
+
+
+@receiver(m2m_changed, sender=JobPost.technologies.through)
+def update_tech_index_on_job_post_tech_change(
+        sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep the tech filter index in step with the job post's tech.
+    """
+    apply_m2m_change('job_posts', instance.pk, action, reverse, pk_set)
+
+
+@receiver(post_delete, sender=JobPost)
+def remove_job_post_from_tech_index(sender, instance, **kwargs):
+    """
+    Remove a deleted job post from the tech filter index.
+    """
+    remove_from_tech_index('job_posts', instance.pk)
+
+
+@receiver(post_save, sender=JobPost)
+@receiver(post_delete, sender=JobPost)
+def invalidate_job_post_card(sender, instance, **kwargs):
+    """
+    Drop the job post's cached card when it changes.
+    """
+    bump_card_version(instance)
+
+
+@receiver(m2m_changed, sender=JobPost.technologies.through)
+@receiver(m2m_changed, sender=JobPost.work_location_type.through)
+def invalidate_job_post_card_on_m2m_change(
+        sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drop the cached cards of job posts whose tech or work location
+    type changed.
+    """
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_card_version(instance)
+    else:
+        bump_card_versions(JobPost, pk_set or ())
+
+
+@receiver(pre_save, sender=JobPost)
+def remember_job_post_listing(sender, instance, **kwargs):
+    remember_listing(instance)
+
+
+@receiver(post_save, sender=JobPost)
+def invalidate_job_post_pages(sender, instance, created, **kwargs):
+    """
+    Drop the cached pages showing the job post when it changes.
+    """
+    bump_post_pages(instance, created=created)
+
+
+@receiver(post_delete, sender=JobPost)
+def invalidate_job_post_pages_on_delete(sender, instance, **kwargs):
+    bump_post_pages(instance, deleted=True)
+
+
+@receiver(m2m_changed, sender=JobPost.technologies.through)
+@receiver(m2m_changed, sender=JobPost.work_location_type.through)
+def invalidate_job_post_pages_on_m2m_change(
+        sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drop the cached pages of job posts whose tech or work location
+    type changed.
+    """
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_page_tags(object_tag('job_post.jobpost', instance.pk))
+    elif pk_set:
+        bump_page_tags(*(object_tag('job_post.jobpost', pk)
+                         for pk in pk_set))
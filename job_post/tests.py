@@ -1,8 +1,14 @@
-from django.db import IntegrityError
-from django.test import TestCase
+from unittest import mock
+from django.contrib.admin import AdminSite
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
 from django.core.exceptions import ValidationError
 from custom_account.models import CustomUser, RecruiterUserProfile
+from job_post.admin import JobPostAdmin
 from job_post.models import JobPost
+from stackportfolio.large_admin import facet_cache_key
+from technology.models import Tech
 from work_location_type.models import WorkLocationType
 
 
@@ -72,3 +78,127 @@ class JobPostCreationTests(TestCase):
                 name='Test Job Post',
                 user=self.user2,
             )
+
+
+class JobPostListTests(TestCase):
+    """
+    Tests for the JobPostListView.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='recruiteruser',
+            first_name='Recruiter',
+            last_name='User',
+            email='recruiteruser@example.com',
+            password='password',
+        )
+        RecruiterUserProfile.objects.create(user=self.user)
+        remote = WorkLocationType.objects.create(name='Remote')
+        techs = [
+            Tech.objects.create(tech_name=f'Tech {i}', is_approved=True)
+            for i in range(12)]
+        for i in range(9):
+            job_post = JobPost.objects.create(
+                name=f'Job {i}', user=self.user)
+            job_post.technologies.add(*techs)
+            job_post.work_location_type.add(remote)
+
+    def test_job_post_list_query_budget(self):
+        """
+        Test that the job post list uses a fixed number of queries
+        for a full page of cards.
+        """
+        # One query for the page's ETag, then the cards, their tech
+        # and their work location types.
+        with self.assertNumQueries(4):
+            response = self.client.get('/jobs/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Remote', count=9)
+
+
+class JobPostAdminTests(TestCase):
+    """
+    Tests for the job post admin.
+    """
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(
+            email='admin@example.com',
+            username='adminuser',
+            password='password',
+        )
+        self.client.force_login(self.admin)
+        for number in range(3):
+            self.add_job_post(number)
+        cache.clear()
+
+    def add_job_post(self, number):
+        user = CustomUser.objects.create_user(
+            username=f'recruiter{number}',
+            first_name='Recruiter',
+            last_name='User',
+            email=f'recruiter{number}@example.com',
+            password='password',
+        )
+        RecruiterUserProfile.objects.create(user=user)
+        JobPost.objects.create(
+            name=f'Job {number}', user=user, company=f'Company {number}')
+
+    def company_choices(self, response):
+        for filter_spec in response.context['cl'].filter_specs:
+            if filter_spec.field_path == 'company':
+                return filter_spec.lookup_choices
+
+    def test_changelist_query_budget(self):
+        """
+        Test that the author emails come with the job posts, so the
+        changelist runs the same queries however many rows it shows,
+        and that filter choices come from the cache after the first
+        load.
+        """
+        # The session and user, one count, the rows and their two
+        # prefetches, then one query for each filter's choices. On
+        # PostgreSQL the planner's estimate is read before counting.
+        estimate = 1 if connection.vendor == 'postgresql' else 0
+        with self.assertNumQueries(11 + estimate):
+            response = self.client.get('/admin/job_post/jobpost/')
+        self.assertContains(response, 'recruiter2@example.com')
+        for number in range(3, 6):
+            self.add_job_post(number)
+        with self.assertNumQueries(6 + estimate):
+            response = self.client.get('/admin/job_post/jobpost/')
+        self.assertContains(response, 'recruiter5@example.com')
+        self.assertEqual(len(self.company_choices(response)), 3)
+
+        cache.delete(facet_cache_key(JobPost, 'company'))
+        response = self.client.get('/admin/job_post/jobpost/')
+        self.assertEqual(len(self.company_choices(response)), 6)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=2)
+    def test_large_tables_show_estimated_counts(self):
+        """
+        Test that the planner's estimate is shown for an unfiltered
+        changelist of a table over the threshold, and filtered
+        changelists are counted exactly.
+        """
+        with mock.patch('stackportfolio.large_admin.estimated_count',
+                        return_value=1000000):
+            response = self.client.get('/admin/job_post/jobpost/')
+            self.assertEqual(response.context['cl'].result_count, 1000000)
+            response = self.client.get(
+                '/admin/job_post/jobpost/?company=Company+1')
+            self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_toggle_active_flips_each_job_post(self):
+        """
+        Test that toggling active flips each selected job post with
+        one UPDATE, instead of setting all of them from the first.
+        """
+        JobPost.objects.filter(name='Job 0').update(active=False)
+        job_posts = JobPost.objects.all()
+        with self.assertNumQueries(2):
+            JobPostAdmin(JobPost, AdminSite()).toggle_active(None, job_posts)
+        self.assertEqual(
+            dict(JobPost.objects.values_list('name', 'active')),
+            {'Job 0': True, 'Job 1': False, 'Job 2': False})
@@ -1,18 +1,26 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import HttpResponseRedirect, HttpResponseForbidden
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from django.shortcuts import get_object_or_404, redirect, reverse
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.views.generic import DetailView, ListView, CreateView, UpdateView
+from stackportfolio.conditional import (ConditionalDetailMixin,
+                                        ConditionalListMixin)
+from stackportfolio.loaders import job_post_cards
+from stackportfolio.page_cache import (add_page_tags, collection_tag,
+                                       instance_tag, tech_tag, user_tag)
+from stackportfolio.pagination import CursorPaginationMixin
+from stackportfolio.view_counts import ViewCountMixin
 from .models import JobPost
 from .forms import CustomJobPostForm
-from custom_account.models import CustomUser
-from technology.models import Tech
+from technology.services import assign_technologies, parse_tech_names
 
 
-class JobPostDetailView(DetailView):
+class JobPostDetailView(ViewCountMixin, ConditionalDetailMixin, DetailView):
     """
     This view handles the displaying of a
     single job_post on its own page.
@@ -27,21 +35,27 @@ class JobPostDetailView(DetailView):
         """
         job_post_id = self.kwargs.get('id')
         user_slug = self.kwargs.get('slug')
-        user = get_object_or_404(CustomUser, slug=user_slug)
-        return get_object_or_404(JobPost, user=user, id=job_post_id)
+        return get_object_or_404(
+            JobPost, user__slug=user_slug, id=job_post_id)
 
     def get_context_data(self, **kwargs):
         """
         Add additional context to the template.
         """
         context = super().get_context_data(**kwargs)
+        prefetch_related_objects([self.object], 'technologies')
+        add_page_tags(
+            instance_tag(self.object),
+            user_tag(self.object.user_id),
+            *(tech_tag(tech.pk) for tech in self.object.technologies.all()))
         context['selected_work_location_type'] = (
             self.object.work_location_type.all(
             )[0])
         return context
 
 
-class JobPostListView(ListView):
+class JobPostListView(ConditionalListMixin, CursorPaginationMixin,
+                      ListView):
     """
     This view lists all the job posts on the
     a job post list page.
@@ -55,8 +69,9 @@ class JobPostListView(ListView):
         """
         Returns all the job posts.
         """
-        return JobPost.objects.filter(
-            active=True).order_by('-date_created')
+        add_page_tags(collection_tag(JobPost))
+        return job_post_cards(JobPost.objects.filter(
+            active=True).order_by('-date_created'))
 
 
 class JobPostCreateView(LoginRequiredMixin, CreateView):
@@ -84,15 +99,7 @@ class JobPostCreateView(LoginRequiredMixin, CreateView):
         else:
             return redirect('account_login')
 
-    def get_context_data(self, **kwargs):
-        """
-        Passes all the approved technologies to the template.
-        """
-        context = super().get_context_data(**kwargs)
-        context['all_technologies'] = Tech.objects.all().filter(
-            is_approved=True)
-        return context
-
+    @transaction.atomic
     def form_valid(self, form):
         """
         Handles the form validation and saving.
@@ -101,29 +108,15 @@ class JobPostCreateView(LoginRequiredMixin, CreateView):
         job_post.user = self.request.user
         job_post.save()
 
-        # Add existing technologies
-        existing_tech_ids = form.cleaned_data.get('technologies')
-        for tech_id in existing_tech_ids:
-            job_post.technologies.add(tech_id)
-
-        # If a tech is submitted and it's not
-        # in the database, add it to the database
-        # as unapproved.
-        new_tech_names = self.request.POST.get(
-            'new_technologies', '').split(',')
-        for tech_name in new_tech_names:
-            tech_name = tech_name.strip()
-            if tech_name:
-                tech, created = Tech.objects.get_or_create(
-                    tech_name=tech_name, defaults={'is_approved': False})
-                job_post.technologies.add(tech)
-
-        selected_work_location_type_id = (
-            form.cleaned_data['work_location_type']
-        )
-        job_post.work_location_type.clear()
-        job_post.work_location_type.add(
-            selected_work_location_type_id)
+        # Add the selected technologies, plus any new ones
+        # submitted, which are added to the database as unapproved.
+        assign_technologies(
+            job_post,
+            form.cleaned_data.get('technologies'),
+            parse_tech_names(self.request.POST.get('new_technologies', '')))
+
+        job_post.work_location_type.set(
+            [form.cleaned_data['work_location_type']])
 
         messages.success(
             self.request, "Job post successfully created.")
@@ -181,13 +174,11 @@ class JobPostEditView(LoginRequiredMixin, UpdateView):
 
     def get_context_data(self, **kwargs):
         """
-        Passed the job_post object and all the approved technologies
-        to the template.
+        Passes the job_post object and its technologies to the
+        template.
         """
         context = super().get_context_data(**kwargs)
         context['job_post'] = self.object
-        context['all_technologies'] = Tech.objects.all().filter(
-            is_approved=True)
         context['job_post_technologies'] = self.object.technologies.all()
         context['job_post_work_location_type_ids'] = (
             self.object.work_location_type.values_list(
@@ -195,12 +186,7 @@ class JobPostEditView(LoginRequiredMixin, UpdateView):
 
         return context
 
-    def remove_tech_from_job_post(self, job_post, tech_id):
-        """
-        Remove a tech from a job_post.
-        """
-        job_post.technologies.remove(tech_id)
-
+    @transaction.atomic
     def form_valid(self, form):
         """
         Handles the form validation and saving.
@@ -209,37 +195,18 @@ class JobPostEditView(LoginRequiredMixin, UpdateView):
         job_post.user = self.request.user
         job_post.save()
 
-        # Add existing technologies and remove any that
-        # were removed on the frontend
-        existing_tech_ids = form.cleaned_data.get('technologies')
-        job_post_tech_ids = job_post.technologies.values_list('id', flat=True)
-        tech_to_remove = set(job_post_tech_ids) - set(existing_tech_ids)
-        for tech in tech_to_remove:
-            self.remove_tech_from_job_post(job_post, tech)
-        for tech_id in existing_tech_ids:
-            job_post.technologies.add(tech_id)
-
-        # If a tech is submitted and it's not
-        # in the database, add it to the database
-        # as unapproved.
-        new_tech_names = self.request.POST.get(
-            'new_technologies', '').split(',')
-        for tech_name in new_tech_names:
-            tech_name = tech_name.strip()
-            if tech_name:
-                tech, created = Tech.objects.get_or_create(
-                    tech_name=tech_name, defaults={'is_approved': False})
-                job_post.technologies.add(tech)
-
-        # So for the work location type, I needed to do some extra
-        # work to get the radio button to display correctly. I had
-        # to clear the existing selection and then pass in the single
-        # selected work location type.
-        selected_work_location_type_id = (
-            form.cleaned_data['work_location_type'])
-        job_post.work_location_type.clear()
-        job_post.work_location_type.add(
-            selected_work_location_type_id)
+        # Replace the technologies with the selected ones, plus any
+        # new ones submitted, which are added to the database as
+        # unapproved. set() leaves tech that are still selected alone.
+        assign_technologies(
+            job_post,
+            form.cleaned_data.get('technologies'),
+            parse_tech_names(self.request.POST.get('new_technologies', '')))
+
+        # The work location type is a single radio button choice
+        # stored in a many to many field, so it's replaced outright.
+        job_post.work_location_type.set(
+            [form.cleaned_data['work_location_type']])
 
         messages.success(
             self.request, "Job post successfully updated.")
@@ -1,9 +1,14 @@
 from django.contrib import admin
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from stackportfolio.card_cache import bump_card_versions
+from stackportfolio.large_admin import LargeTableAdminMixin
+from stackportfolio.page_cache import bump_listing_pages
 from .models import Project, Tech
 
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'user_email', 'active', 'github_repo_url',
                     'deployed_url', 'view_count', 'date_created',
                     'date_updated')
@@ -11,6 +16,7 @@ class ProjectAdmin(admin.ModelAdmin):
                      'github_repo_url', 'deployed_url')
     list_filter = ('active', 'technologies', 'user')
     ordering = ('-date_created', 'name')
+    list_select_related = ('user',)
     actions = ['toggle_active']
 
     def user_email(self, obj):
@@ -21,6 +27,7 @@ class ProjectAdmin(admin.ModelAdmin):
 
     user_email.short_description = 'User Email'
     view_count.short_description = 'View Count'
+    user_email.admin_order_field = 'user__email'
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
@@ -33,6 +40,17 @@ class ProjectAdmin(admin.ModelAdmin):
         return super().formfield_for_manytomany(db_field, request, **kwargs)
 
     def toggle_active(self, request, queryset):
-        queryset.update(active=not queryset.first().active)
+        """
+        Flips the active status of each selected project in a single
+        statement, as the job post admin does.
+        """
+        pks = list(queryset.values_list('pk', flat=True))
+        queryset.update(
+            active=Case(
+                When(active=True, then=Value(False)),
+                default=Value(True)),
+            date_updated=timezone.now())
+        bump_card_versions(Project, pks)
+        bump_listing_pages(Project, pks)
 
     toggle_active.short_description = 'Toggle Active'
@@ -0,0 +1,72 @@
+import random
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .models import Project
+
+
+FEATURED_POOL_KEY = 'featured-projects:pool'
+FEATURED_REBUILD_LOCK_KEY = 'featured-projects:rebuilding'
+# Long enough for the rebuild, so a worker that dies while rebuilding
+# doesn't stop the pool being rotated for long.
+FEATURED_REBUILD_LOCK_TIMEOUT = 60
+
+
+def build_featured_pool(size):
+    """
+    Picks `size` random ids from the projects that can be featured,
+    using reservoir sampling so only `size` ids are held in memory
+    however many projects there are.
+    """
+    candidate_ids = Project.objects.filter(
+        active=True,
+        image__isnull=False).values_list('id', flat=True).iterator()
+
+    pool = []
+    for seen, project_id in enumerate(candidate_ids):
+        if seen < size:
+            pool.append(project_id)
+        else:
+            position = random.randint(0, seen)
+            if position < size:
+                pool[position] = project_id
+    return pool
+
+
+def refresh_featured_pool():
+    """
+    Rebuilds the pool and stores it in the cache with the time it's
+    due to be rotated. The pool itself is kept until it's replaced,
+    so there's an old one to serve while the next is being built.
+    """
+    pool = build_featured_pool(
+        getattr(settings, 'FEATURED_POOL_SIZE', 60))
+    refresh_at = time.time() + getattr(
+        settings, 'FEATURED_POOL_TIMEOUT', 60 * 10)
+    cache.set(FEATURED_POOL_KEY, (refresh_at, pool), None)
+    return pool
+
+
+def get_featured_projects(count=6):
+    """
+    Returns up to `count` random projects from the featured pool
+    with one query. Projects deactivated since the pool was built
+    are skipped.
+
+    Once the pool is due to be rotated, only the request that takes
+    the rebuild lock rebuilds it. Others carry on with the old pool,
+    or feature nothing if there isn't one yet.
+    """
+    refresh_at, pool = cache.get(FEATURED_POOL_KEY, (0, []))
+    if time.time() >= refresh_at and cache.add(
+            FEATURED_REBUILD_LOCK_KEY, True, FEATURED_REBUILD_LOCK_TIMEOUT):
+        try:
+            pool = refresh_featured_pool()
+        finally:
+            cache.delete(FEATURED_REBUILD_LOCK_KEY)
+    if not pool:
+        return Project.objects.none()
+
+    featured_ids = random.sample(pool, min(len(pool), count))
+    return Project.objects.filter(
+        id__in=featured_ids, active=True).select_related('user')
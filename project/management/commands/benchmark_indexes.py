@@ -0,0 +1,201 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from custom_account.models import CustomUser
+from job_post.models import JobPost
+from project.models import Project
+from technology.models import Tech
+
+
+# The indexes added for the list, detail, search and tech queries.
+BENCHMARKED_INDEXES = [
+    'project_active_created_idx',
+    'project_user_slug_idx',
+    'jobpost_active_created_idx',
+    'jobpost_user_created_idx',
+    'user_active_idx',
+    'tech_approved_name_idx',
+]
+
+
+class Rollback(Exception):
+    """
+    Raised to throw away the seeded rows once the benchmark is done.
+    """
+
+
+class Command(BaseCommand):
+    """
+    Seeds a large dataset in a transaction, then shows the query plan
+    and timing of the main list and detail queries with and without
+    the indexes. Everything is rolled back afterwards.
+
+    The seeding and DROP INDEX run on the configured database and hold
+    locks on its tables until the rollback, so the command refuses to
+    run unless DEBUG is on or --i-know-this-is-not-production is given.
+    """
+    help = ('Compare query plans with and without the composite indexes. '
+            'Seeds rows and drops indexes in a transaction on the '
+            'configured database, so only runs with DEBUG on or '
+            '--i-know-this-is-not-production.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=1000000,
+            help='Number of projects and of job posts to seed.')
+        parser.add_argument(
+            '--users', type=int, default=None,
+            help='Number of users to seed (defaults to rows / 100).')
+        parser.add_argument(
+            '--techs', type=int, default=1000,
+            help='Number of tech to seed.')
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Number of rows inserted per query.')
+        parser.add_argument(
+            '--i-know-this-is-not-production', action='store_true',
+            help='Run with DEBUG off. Never use this against the '
+                 'production database.')
+
+    def handle(self, *args, **options):
+        if not (settings.DEBUG or options['i_know_this_is_not_production']):
+            raise CommandError(
+                'benchmark_indexes seeds rows and drops indexes on the '
+                'configured database. Run it with DEBUG on, or pass '
+                '--i-know-this-is-not-production.')
+
+        rows = options['rows']
+        users = options['users'] or max(rows // 100, 1)
+        batch_size = options['batch_size']
+
+        try:
+            with transaction.atomic():
+                self.seed(rows, users, options['techs'], batch_size)
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE')
+
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    'With indexes'))
+                self.run_queries('with indexes')
+
+                self.drop_indexes()
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE')
+
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    'Without indexes'))
+                self.run_queries('without indexes')
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            'Benchmark finished, seeded rows rolled back.'))
+
+    def seed(self, rows, users, techs, batch_size):
+        """
+        Inserts the benchmark rows with bulk_create, so no signals
+        are sent. A tenth of the rows are inactive.
+        """
+        self.stdout.write(
+            f'Seeding {users} users, {techs} tech, {rows} projects '
+            f'and {rows} job posts...')
+
+        Tech.objects.bulk_create(
+            [Tech(tech_name=f'Benchmark tech {i}', is_approved=i % 2 == 0)
+             for i in range(techs)],
+            batch_size=batch_size)
+
+        CustomUser.objects.bulk_create(
+            [CustomUser(
+                username=f'benchmark{i}',
+                slug=f'benchmark{i}',
+                email=f'benchmark{i}@example.com',
+                first_name='Benchmark',
+                last_name=str(i),
+                is_active=i % 20 != 0)
+             for i in range(users)],
+            batch_size=batch_size)
+        user_ids = list(CustomUser.objects.filter(
+            username__startswith='benchmark').values_list('id', flat=True))
+
+        for start in range(0, rows, batch_size):
+            stop = min(start + batch_size, rows)
+            Project.objects.bulk_create([
+                Project(
+                    user_id=user_ids[i % len(user_ids)],
+                    name=f'Benchmark project {i}',
+                    slug=f'benchmark-project-{i}',
+                    active=i % 10 != 0)
+                for i in range(start, stop)])
+            JobPost.objects.bulk_create([
+                JobPost(
+                    user_id=user_ids[i % len(user_ids)],
+                    name=f'Benchmark job post {i}',
+                    active=i % 10 != 0)
+                for i in range(start, stop)])
+
+    def benchmark_queries(self):
+        """
+        The queries the indexes are meant to serve, as the views
+        run them.
+        """
+        project = Project.objects.filter(
+            name__startswith='Benchmark').order_by('pk').last()
+        user_id = project.user_id if project else 0
+        return [
+            ('Project list', Project.objects.filter(
+                active=True).order_by('-date_created')[:9]),
+            ('Project detail', Project.objects.filter(
+                user_id=user_id,
+                slug=project.slug if project else '')),
+            ('Job post list', JobPost.objects.filter(
+                active=True).order_by('-date_created')[:9]),
+            ("User's job posts", JobPost.objects.filter(
+                user_id=user_id).order_by('-date_created')),
+            ('Active users', CustomUser.objects.filter(
+                is_active=True).order_by('-id')[:9]),
+            ('Approved tech', Tech.objects.filter(
+                is_approved=True).order_by('tech_name')),
+        ]
+
+    def run_queries(self, run):
+        for label, queryset in self.benchmark_queries():
+            started = time.perf_counter()
+            list(queryset)
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stdout.write(f'{label}: {elapsed:.2f}ms')
+            self.stdout.write(self.explain(queryset, run))
+
+    def explain(self, queryset, run):
+        """
+        Returns the query plan. The run is added as a comment so the
+        statement differs between runs: sqlite3 caches prepared
+        statements and would otherwise repeat the plan from before
+        the indexes were dropped.
+        """
+        options = {}
+        if connection.vendor == 'postgresql':
+            options['analyze'] = True
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{connection.ops.explain_query_prefix(**options)} '
+                f'{sql} /* {run} */',
+                params)
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall())
+
+    def drop_indexes(self):
+        """
+        Drops the benchmarked indexes inside the transaction, so
+        they're restored by the rollback.
+        """
+        with connection.cursor() as cursor:
+            for name in BENCHMARKED_INDEXES:
+                cursor.execute(
+                    f'DROP INDEX {connection.ops.quote_name(name)}')
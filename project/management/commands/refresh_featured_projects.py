@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from project.featured import refresh_featured_pool
+
+
+class Command(BaseCommand):
+    """
+    Rotates the pool of projects featured on the homepage. Can be
+    run from a scheduler so the pool isn't rebuilt during a request.
+    """
+    help = 'Pick a new random pool of featured projects.'
+
+    def handle(self, *args, **options):
+        pool = refresh_featured_pool()
+        self.stdout.write(self.style.SUCCESS(
+            f'Featured pool refreshed with {len(pool)} projects.'))
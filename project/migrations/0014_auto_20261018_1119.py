@@ -0,0 +1,21 @@
+# Generated by Django 3.2.22 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0013_auto_20261018_1110'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-date_created'], name='project_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['user', 'slug'], name='project_user_slug_idx'),
+        ),
+    ]
@@ -3,8 +3,9 @@ from django.urls import reverse
 from django.utils.text import slugify
 from django.db import IntegrityError
 from django.core.exceptions import ValidationError
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from cloudinary.models import CloudinaryField
-import cloudinary.uploader
 from technology.models import Tech
 from custom_account.models import CustomUser
 
@@ -31,6 +32,7 @@ class Project(models.Model):
     slug = models.SlugField(blank=True, null=True)
     date_created = models.DateTimeField(auto_now_add=True, null=True)
     date_updated = models.DateTimeField(auto_now=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         """
@@ -38,6 +40,16 @@ class Project(models.Model):
         """
         ordering = ["-date_created"]
         unique_together = ["user", "name"]
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            models.Index(
+                fields=["-date_created", "-id"],
+                condition=models.Q(active=True),
+                name="project_active_created_idx"),
+            models.Index(
+                fields=["user", "slug"],
+                name="project_user_slug_idx"),
+        ]
 
     def __str__(self):
         """
@@ -61,20 +73,6 @@ class Project(models.Model):
                 "slug": self.user.slug,
                 "project_slug": self.slug})
 
-    def delete(self, *args, **kwargs):
-        """
-        Override the delete method to delete the project's image from
-        Cloudinary before deleting the project from the database.
-        """
-        if self.image:
-            try:
-                cloudinary.uploader.destroy(
-                    self.image.public_id, invalidate=True)
-            except Exception as e:
-                print(f"Error deleting image from Cloudinary: {e}")
-
-        super().delete(*args, **kwargs)
-
     def clean(self):
         if self.description and len(self.description) > 1000:
             raise ValidationError(
@@ -109,3 +107,23 @@ class Project(models.Model):
         # to run after many to many update
         if self.user.tech_profile:
             self.user.tech_profile.update_tech_with_approved()
+
+
+class ProjectTechLink(models.Model):
+    """
+    A read-only view of the table Django created for
+    Project.technologies, so a project's tech links can be queried and
+    prefetched like any other relation. Links are still added and
+    removed through Project.technologies.
+    """
+    project = models.ForeignKey(
+        Project, on_delete=models.DO_NOTHING, related_name="tech_links")
+    tech = models.ForeignKey(
+        Tech, on_delete=models.DO_NOTHING, related_name="+")
+
+    class Meta:
+        """
+        Meta class for the project tech link model.
+        """
+        managed = False
+        db_table = "project_project_technologies"
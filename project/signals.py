@@ -1,21 +1,42 @@
-from django.db.models.signals import m2m_changed, post_delete
-import cloudinary.uploader
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
 from django.dispatch import receiver
 from project.models import Project
+from technology.index import apply_m2m_change, remove_from_tech_index
+from stackportfolio.card_cache import bump_card_version, bump_card_versions
+from stackportfolio.page_cache import (bump_page_tags, bump_post_pages,
+                                       object_tag, remember_listing)
+from image_queue.deletions import queue_image_deletion
 
 
 @receiver(m2m_changed, sender=Project.technologies.through)
 def update_user_tech_on_project_tech_change(
-        sender, instance, action, **kwargs):
+        sender, instance, action, reverse, pk_set, **kwargs):
     """
     When tech on a project is updated, update the user's
     tech on their profile to reflect the change.
     """
     if action in ["post_add", "post_remove", "post_clear"]:
-        if instance.user.tech_profile:
+        if reverse:
+            # The change was made from the Tech side, so instance is
+            # the tech and pk_set holds the affected projects.
+            projects = Project.objects.filter(
+                pk__in=pk_set or []).select_related('user__tech_profile')
+            for user in {project.user for project in projects}:
+                user.tech_profile.update_tech_with_approved()
+        elif instance.user.tech_profile:
             instance.user.tech_profile.update_tech_with_approved()
 
 
+@receiver(m2m_changed, sender=Project.technologies.through)
+def update_tech_index_on_project_tech_change(
+        sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep the tech filter index in step with the project's tech.
+    """
+    apply_m2m_change('projects', instance.pk, action, reverse, pk_set)
+
+
 @receiver(post_delete, sender=Project)
 def update_user_tech_on_project_delete(sender, instance, **kwargs):
     """
@@ -27,21 +48,63 @@ def update_user_tech_on_project_delete(sender, instance, **kwargs):
     if hasattr(user, 'tech_profile') and user.tech_profile:
         user.tech_profile.update_tech_with_approved()
 
-    if instance.image:
-        if ("http://res.cloudinary.com/nvmind/image/upload/" in
-                instance.image.public_id):
-            image_public_id = instance.image.public_id.split(
-                '/')[-1]
-        else:
-            image_public_id = instance.image.public_id
-
-        try:
-            cloudinary.uploader.destroy(
-                image_public_id, invalidate=True)
-            print(f"Deleted image for project: {instance.name}")
-        except Exception as e:
-            print(
-                f"""
-                Error deleting image from Cloudinary for project: {e}
-                """
-            )
+    # The image is deleted from Cloudinary in the background.
+    queue_image_deletion(instance.image)
+
+    remove_from_tech_index('projects', instance.pk)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_card(sender, instance, **kwargs):
+    """
+    Drop the project's cached card when it changes.
+    """
+    bump_card_version(instance)
+
+
+@receiver(m2m_changed, sender=Project.technologies.through)
+def invalidate_project_card_on_tech_change(
+        sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drop the cached cards of projects whose tech changed.
+    """
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_card_version(instance)
+    else:
+        bump_card_versions(Project, pk_set or ())
+
+
+@receiver(pre_save, sender=Project)
+def remember_project_listing(sender, instance, **kwargs):
+    remember_listing(instance)
+
+
+@receiver(post_save, sender=Project)
+def invalidate_project_pages(sender, instance, created, **kwargs):
+    """
+    Drop the cached pages showing the project when it changes.
+    """
+    bump_post_pages(instance, created=created)
+
+
+@receiver(post_delete, sender=Project)
+def invalidate_project_pages_on_delete(sender, instance, **kwargs):
+    bump_post_pages(instance, deleted=True)
+
+
+@receiver(m2m_changed, sender=Project.technologies.through)
+def invalidate_project_pages_on_tech_change(
+        sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drop the cached pages of projects whose tech changed.
+    """
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_page_tags(object_tag('project.project', instance.pk))
+    elif pk_set:
+        bump_page_tags(*(object_tag('project.project', pk)
+                         for pk in pk_set))
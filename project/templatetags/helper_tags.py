@@ -1,5 +1,11 @@
 from django import template
+from django.core.cache import cache
 from django.template.defaultfilters import stringfilter
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from stackportfolio.card_cache import (card_cache_enabled, card_cache_keys,
+                                       card_cache_timeout)
+from stackportfolio.page_cache import add_post_tags
 
 register = template.Library()
 
@@ -18,3 +24,52 @@ def replace(value, arg):
     if to not in value:
         return value.replace(what, to)
     return value
+
+
+@register.simple_tag(takes_context=True)
+def render_cards(context, posts, type, full=False, show_owner_info=False,
+                 wrapper_class=''):
+    """
+    Renders snippets/card.html for each post. Cards are cached per
+    post and fetched with one cache lookup, so only cards that have
+    changed since they were cached are rendered. Every card is
+    rendered when CARD_CACHE_ENABLED is off.
+    Use `{% render_cards projects type="project" full=False %}`.
+    """
+    posts = list(posts)
+    if not posts:
+        return ''
+
+    user = context.get('user')
+    viewer_id = user.pk if user and user.is_authenticated else None
+    # Cache keys can't contain spaces on memcached, e.g. 'job post'.
+    variant = '{}:{}:{}'.format(
+        type.replace(' ', '-'), int(bool(full)), int(bool(show_owner_info)))
+    if card_cache_enabled():
+        keys = card_cache_keys(posts, viewer_id, variant)
+        cached_cards = cache.get_many(keys)
+    else:
+        keys = [None] * len(posts)
+        cached_cards = {}
+
+    card_template = context.template.engine.get_template(
+        'snippets/card.html')
+    cards = []
+    new_cards = {}
+    for post, key in zip(posts, keys):
+        add_post_tags(post)
+        card = cached_cards.get(key)
+        if card is None:
+            with context.push(post=post, type=type, full=full,
+                              show_owner_info=show_owner_info):
+                card = card_template.render(context)
+            if key is not None:
+                new_cards[key] = card
+        if wrapper_class:
+            card = format_html(
+                '<div class="{}">{}</div>', wrapper_class, mark_safe(card))
+        cards.append(card)
+
+    if new_cards:
+        cache.set_many(new_cards, card_cache_timeout())
+    return mark_safe(''.join(cards))
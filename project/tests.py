@@ -1,9 +1,21 @@
-from django.db import IntegrityError
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
+from django.db import DatabaseError, IntegrityError, connection
+from django.db.models import QuerySet
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
 from django.core.exceptions import ValidationError
 from django.apps import apps
 from custom_account.models import CustomUser, TechUserProfile
 from project.models import Project
+from project.featured import (FEATURED_POOL_KEY, FEATURED_REBUILD_LOCK_KEY,
+                              build_featured_pool, get_featured_projects,
+                              refresh_featured_pool)
+from technology.models import Tech
+from stackportfolio.card_cache import object_version_key
+from stackportfolio.page_cache import add_page_tags, page_key
+from stackportfolio.view_counts import view_count_buffer
 
 
 class ProjectCreationTests(TestCase):
@@ -215,6 +227,10 @@ class ProjectDetailTests(TestCase):
             github_repo_url=''
         )
 
+    def tearDown(self):
+        # Views recorded by one test shouldn't be flushed into the next.
+        view_count_buffer.pending.clear()
+
     def test_project_detail_view_exists(self):
         """
         Test to check if project detail view exists
@@ -223,6 +239,77 @@ class ProjectDetailTests(TestCase):
         response = self.client.get('/user/testuser/project/test-project')
         self.assertEqual(response.status_code, 200)
 
+    def test_project_views_are_buffered_and_deduplicated(self):
+        """
+        Test that views are only written on flush, once per visitor,
+        with a single UPDATE.
+        """
+        cache.clear()
+        project = Project.objects.get(name='Test Project')
+        url = '/user/testuser/project/test-project'
+
+        self.client.get(url)
+        self.client.get(url)
+        self.client.get(url, HTTP_USER_AGENT='Another browser')
+        project.refresh_from_db()
+        self.assertEqual(project.view_count, 0)
+
+        with self.assertNumQueries(1):
+            view_count_buffer.flush()
+        project.refresh_from_db()
+        self.assertEqual(project.view_count, 2)
+
+    def test_counts_are_kept_when_a_flush_fails(self):
+        """
+        Test that counts which couldn't be written are put back and
+        written by the next flush.
+        """
+        project = Project.objects.get(name='Test Project')
+        view_count_buffer.record(project)
+        with mock.patch.object(
+                QuerySet, 'update', side_effect=DatabaseError('down')), \
+                self.assertLogs('stackportfolio.view_counts', 'ERROR'):
+            view_count_buffer.flush()
+        view_count_buffer.record(project)
+        view_count_buffer.flush()
+        project.refresh_from_db()
+        self.assertEqual(project.view_count, 2)
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_unchanged_project_is_not_sent_again(self):
+        """
+        Test that a request with a current ETag gets a 304 from one
+        query, and that changing the project changes the ETag.
+        """
+        url = '/user/testuser/project/test-project'
+        response = self.client.get(url)
+        self.assertEqual(response['Vary'], 'Cookie')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        project = Project.objects.get(name='Test Project')
+        project.description = 'Changed'
+        project.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_the_viewer(self):
+        """
+        Test that logged in users get their own private ETag.
+        """
+        url = '/user/testuser/project/test-project'
+        etag = self.client.get(url)['ETag']
+
+        self.client.force_login(self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
 
 class ProjectListTests(TestCase):
     """
@@ -254,3 +341,389 @@ class ProjectListTests(TestCase):
         """
         response = self.client.get('/projects/')
         self.assertEqual(response.status_code, 200)
+
+    def test_project_cards_are_cached_until_changed(self):
+        """
+        Test that cards are served from the cache and invalidated
+        by the project's signals.
+        """
+        cache.clear()
+        self.assertContains(self.client.get('/projects/'), 'Test Project')
+
+        # update() doesn't send signals, so the cached card is kept.
+        Project.objects.filter(name='Test Project').update(name='Renamed')
+        self.assertContains(self.client.get('/projects/'), 'Test Project')
+
+        project = Project.objects.get(name='Renamed')
+        project.technologies.add(
+            Tech.objects.create(tech_name='Django', is_approved=True))
+        response = self.client.get('/projects/')
+        self.assertContains(response, 'Renamed')
+        self.assertContains(response, 'Django')
+
+        # Adding the project from the tech's side drops the card too.
+        key = object_version_key('project.project', project.pk)
+        cache.set(key, 'old', None)
+        Tech.objects.create(tech_name='Flask').projects.add(project)
+        self.assertNotEqual(cache.get(key), 'old')
+
+    @override_settings(CARD_CACHE_ENABLED=False, PAGE_CACHE_ENABLED=False)
+    def test_project_cards_are_not_cached_when_disabled(self):
+        """
+        Test that every card is rendered when the card cache is off,
+        as it is by default on a cache the workers don't share.
+        """
+        cache.clear()
+        self.client.get('/projects/')
+        Project.objects.filter(name='Test Project').update(name='Renamed')
+        self.assertContains(self.client.get('/projects/'), 'Renamed')
+
+    def test_project_list_query_budget(self):
+        """
+        Test that the project list uses a fixed number of queries
+        however many projects and tech there are on the page, and
+        that each card only gets the first ten tech.
+        """
+        techs = [
+            Tech.objects.create(tech_name=f'Tech {i}', is_approved=True)
+            for i in range(12)]
+        # add() inserts the links in set order, so they're added one
+        # at a time for the first ten links to be the first ten tech.
+        for i in range(8):
+            project = Project.objects.create(
+                name=f'Project {i}', user=self.user)
+            for tech in techs:
+                project.technologies.add(tech)
+
+        # One query for the page's ETag, then the cards and their tech.
+        with self.assertNumQueries(3):
+            response = self.client.get('/projects/')
+        projects = response.context['projects']
+        self.assertEqual(len(projects), 9)
+        self.assertEqual(
+            [link.tech for link in projects[0].card_tech_links], techs[:10])
+
+    def test_project_list_cursor_pagination(self):
+        """
+        Test that paging forward and back with the cursor links
+        visits every project once, including projects created at
+        the same time, and that a bad cursor is a 404.
+        """
+        for i in range(20):
+            Project.objects.create(name=f'Project {i}', user=self.user)
+        # Give some projects the same date_created so ties on the
+        # date are broken by id.
+        Project.objects.filter(name__in=['Project 3', 'Project 4',
+                                         'Project 5']).update(
+            date_created=Project.objects.get(
+                name='Project 3').date_created)
+
+        response = self.client.get('/projects/')
+        page = response.context['page_obj']
+        self.assertFalse(page.has_previous())
+        seen = [project.pk for project in page]
+        pages = [seen[:]]
+        while page.has_next():
+            page = self.client.get(
+                '/projects/' + page.next_url).context['page_obj']
+            pages.append([project.pk for project in page])
+            seen += pages[-1]
+
+        expected = list(Project.objects.order_by(
+            '-date_created', '-pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 3)
+
+        previous = self.client.get(
+            '/projects/' + page.previous_url).context['page_obj']
+        self.assertEqual([project.pk for project in previous], pages[1])
+        self.assertTrue(previous.has_next())
+
+        response = self.client.get('/projects/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_unchanged_project_list_is_not_sent_again(self):
+        """
+        Test that the list answers a current ETag with a 304 from
+        one query, unless a project on the page changes.
+        """
+        response = self.client.get('/projects/')
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Adding tech doesn't touch date_updated, but bumps the card.
+        project = Project.objects.get(name='Test Project')
+        project.technologies.add(
+            Tech.objects.create(tech_name='Django', is_approved=True))
+        response = self.client.get('/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(
+        MESSAGE_STORAGE='django.contrib.messages.storage.session.'
+                        'SessionStorage')
+    def test_project_list_with_a_message_is_always_sent(self):
+        """
+        Test that a page with a message waiting is rendered even if
+        the client's copy is current, so the message is shown.
+        """
+        self.client.force_login(self.user)
+        etag = self.client.get('/projects/')['ETag']
+        session = self.client.session
+        session['_messages'] = (
+            '[["__json_message",0,25,"Project saved."]]')
+        session.save()
+        response = self.client.get('/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Project saved.')
+
+
+class PageCacheTests(TestCase):
+    """
+    Tests for serving anonymous project pages from the page cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            first_name='Test',
+            last_name='User',
+            email='testuser@example.com',
+            password='password',
+        )
+        TechUserProfile.objects.create(user=self.user)
+        self.project = Project.objects.create(
+            name='Test Project', user=self.user)
+        self.tech = Tech.objects.create(tech_name='Django', is_approved=True)
+        self.project.technologies.add(self.tech)
+        self.url = '/user/testuser/project/test-project'
+
+    def tearDown(self):
+        view_count_buffer.pending.clear()
+
+    def test_anonymous_pages_are_served_from_the_cache(self):
+        """
+        Test that the second anonymous GET is served without queries.
+        """
+        for url in (self.url, '/projects/'):
+            self.assertEqual(self.client.get(url)['X-Page-Cache'], 'miss')
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(response['X-Page-Cache'], 'hit')
+            self.assertContains(response, 'Test Project')
+
+    def test_cached_detail_pages_still_count_views(self):
+        """
+        Test that a view served from the cache is still counted.
+        """
+        self.client.get(self.url)
+        self.client.get(self.url, HTTP_USER_AGENT='Another browser')
+        self.assertEqual(
+            view_count_buffer.pending[Project][self.project.pk], 2)
+
+    def test_changes_are_not_served_from_the_cache(self):
+        """
+        Test that editing the project, its owner or its tech drops
+        the cached pages showing it.
+        """
+        self.client.get('/projects/')
+        self.project.name = 'Renamed'
+        self.project.save()
+        response = self.client.get('/projects/')
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Renamed')
+
+        for changed in (self.user, self.tech):
+            changed.save()
+            self.assertEqual(
+                self.client.get('/projects/')['X-Page-Cache'], 'miss')
+            self.assertEqual(
+                self.client.get('/projects/')['X-Page-Cache'], 'hit')
+
+    def test_pages_changed_while_rendering_are_not_cached(self):
+        """
+        Test that a page isn't cached if the project is edited while
+        it renders, as it may show the old row.
+        """
+        def edit_while_rendering(*tags):
+            add_page_tags(*tags)
+            self.project.save()
+
+        with mock.patch('project.views.add_page_tags',
+                        side_effect=edit_while_rendering):
+            self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url)['X-Page-Cache'], 'miss')
+        self.assertEqual(self.client.get(self.url)['X-Page-Cache'], 'hit')
+
+    def test_deleted_projects_are_not_served_from_the_cache(self):
+        """
+        Test that a deleted project is gone from its page and the list
+        straight away.
+        """
+        self.client.get(self.url)
+        self.client.get('/projects/')
+        self.project.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertNotContains(self.client.get('/projects/'), 'Test Project')
+
+    def test_new_projects_are_added_to_cached_lists(self):
+        """
+        Test that a new project invalidates the list it joins.
+        """
+        self.client.get('/projects/')
+        Project.objects.create(name='Another Project', user=self.user)
+        self.assertContains(self.client.get('/projects/'), 'Another Project')
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_expired_pages_are_served_stale_while_one_is_rendered(self):
+        """
+        Test that while one request renders an expired page again,
+        the others are served the stale copy.
+        """
+        self.client.get(self.url)
+        lock = page_key(RequestFactory().get(self.url)) + ':lock'
+        cache.add(lock, True)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'stale')
+
+        cache.delete(lock)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+
+    def test_logged_in_users_are_not_served_from_the_cache(self):
+        """
+        Test that a logged in user's pages are never cached.
+        """
+        self.client.get(self.url)
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertContains(response, 'Delete project')
+
+
+class FeaturedProjectTests(TestCase):
+    """
+    Tests for the projects featured on the homepage.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            first_name='Test',
+            last_name='User',
+            email='testuser@example.com',
+            password='password',
+        )
+        TechUserProfile.objects.create(user=self.user)
+        for i in range(10):
+            Project.objects.create(
+                name=f'Project {i}', user=self.user, image='sample')
+        self.inactive = Project.objects.create(
+            name='Inactive', user=self.user, image='sample', active=False)
+
+    def test_pool_is_a_sample_of_active_projects(self):
+        """
+        Test that the pool holds at most the configured number of
+        distinct active projects.
+        """
+        pool = build_featured_pool(4)
+        self.assertEqual(len(pool), 4)
+        self.assertEqual(len(set(pool)), 4)
+        self.assertNotIn(self.inactive.pk, pool)
+
+    def test_homepage_uses_one_query_with_pool_cached(self):
+        """
+        Test that the homepage features six projects with a single
+        query once the pool is cached.
+        """
+        refresh_featured_pool()
+        with self.assertNumQueries(1):
+            projects = list(get_featured_projects(6))
+            for project in projects:
+                project.user.username
+        self.assertEqual(len(projects), 6)
+
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('users', response.context)
+
+    def test_deactivated_projects_are_not_featured(self):
+        """
+        Test that projects deactivated after the pool was built
+        are skipped.
+        """
+        refresh_featured_pool()
+        Project.objects.update(active=False)
+        self.assertEqual(list(get_featured_projects(6)), [])
+
+    def test_stale_pool_is_served_while_another_request_rebuilds(self):
+        """
+        Test that a pool due for rotation is still used, without
+        rebuilding it, while the rebuild lock is held elsewhere.
+        """
+        pool = refresh_featured_pool()
+        cache.set(FEATURED_POOL_KEY, (0, pool), None)
+        cache.add(FEATURED_REBUILD_LOCK_KEY, True)
+        with self.assertNumQueries(1):
+            projects = list(get_featured_projects(6))
+        self.assertEqual(len(projects), 6)
+        self.assertEqual(cache.get(FEATURED_POOL_KEY), (0, pool))
+
+    def test_nothing_is_featured_until_the_first_pool_is_built(self):
+        """
+        Test that requests that don't get the rebuild lock feature no
+        projects rather than all building the first pool.
+        """
+        cache.add(FEATURED_REBUILD_LOCK_KEY, True)
+        with self.assertNumQueries(0):
+            self.assertEqual(list(get_featured_projects(6)), [])
+
+        cache.delete(FEATURED_REBUILD_LOCK_KEY)
+        self.assertEqual(len(get_featured_projects(6)), 6)
+        self.assertIsNone(cache.get(FEATURED_REBUILD_LOCK_KEY))
+
+
+class BenchmarkIndexesTests(TestCase):
+    """
+    Tests for the benchmark_indexes command.
+    """
+
+    def test_benchmark_shows_plans_and_rolls_back(self):
+        """
+        Test that the benchmark explains each query with and without
+        the indexes and leaves no rows behind.
+        """
+        if connection.vendor == 'postgresql':
+            # With this few rows the planner would rather scan the
+            # tables. Reset by the test's rollback.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        out = StringIO()
+        call_command(
+            'benchmark_indexes', rows=50, techs=10,
+            i_know_this_is_not_production=True, stdout=out)
+        output = out.getvalue()
+        self.assertIn('With indexes', output)
+        self.assertIn('Without indexes', output)
+        self.assertIn('project_active_created_idx', output)
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(CustomUser.objects.exists())
+
+        # The dropped indexes are restored by the rollback.
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(
+                cursor, Project._meta.db_table)
+        self.assertIn('project_active_created_idx', indexes)
+
+    def test_benchmark_refuses_to_run_without_debug(self):
+        """
+        Test that the benchmark doesn't touch the database with DEBUG
+        off unless told it isn't production.
+        """
+        with self.assertRaises(CommandError):
+            call_command('benchmark_indexes', rows=50, stdout=StringIO())
+        self.assertFalse(Project.objects.exists())
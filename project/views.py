@@ -1,20 +1,29 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import get_object_or_404, redirect, reverse
 from django.http import HttpResponseRedirect
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.views.generic import DetailView, ListView, CreateView, UpdateView
-from stackportfolio.utils import upload_project_to_cloudinary
-import cloudinary.uploader
-import cloudinary
+from stackportfolio.conditional import (ConditionalDetailMixin,
+                                        ConditionalListMixin)
+from stackportfolio.loaders import project_cards
+from stackportfolio.page_cache import (add_page_tags, collection_tag,
+                                       instance_tag, tech_tag, user_tag)
+from stackportfolio.pagination import CursorPaginationMixin
+from stackportfolio.view_counts import ViewCountMixin
 from .models import Project
 from .forms import ProjectForm
 from technology.models import Tech
+from technology.services import assign_technologies, parse_tech_names
+from image_queue.deletions import cloudinary_public_id, queue_image_deletion
+from image_queue.queue import queue_image_upload
 
 
-class ProjectDetailView(DetailView):
+class ProjectDetailView(ViewCountMixin, ConditionalDetailMixin, DetailView):
     """
     This view handles the displaying of a
     single project on its own page.
@@ -40,10 +49,16 @@ class ProjectDetailView(DetailView):
         Add additional context to the template.
         """
         context = super().get_context_data(**kwargs)
+        prefetch_related_objects([self.object], 'technologies')
+        add_page_tags(
+            instance_tag(self.object),
+            user_tag(self.object.user_id),
+            *(tech_tag(tech.pk) for tech in self.object.technologies.all()))
         return context
 
 
-class ProjectListView(ListView):
+class ProjectListView(ConditionalListMixin, CursorPaginationMixin,
+                      ListView):
     """
     This view lists all the projects on the
     a project list page.
@@ -57,8 +72,9 @@ class ProjectListView(ListView):
         """
         Returns all the projects.
         """
-        return Project.objects.filter(
-            active=True).order_by('-date_created')
+        add_page_tags(collection_tag(Project))
+        return project_cards(Project.objects.filter(
+            active=True).order_by('-date_created'))
 
 
 class ProjectCreateView(LoginRequiredMixin, CreateView):
@@ -82,40 +98,29 @@ class ProjectCreateView(LoginRequiredMixin, CreateView):
                 request, "You need to be logged in to create projects.")
             return redirect('account_login')
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['all_technologies'] = Tech.objects.all().filter(
-            is_approved=True)
-        return context
-
+    @transaction.atomic
     def form_valid(self, form):
         project = form.save(commit=False)
         project.user = self.request.user
 
-        # Handle image upload
+        # The image is uploaded in the background, so the project
+        # shows the placeholder until it's ready.
+        image = None
         if 'image' in form.changed_data and form.cleaned_data['image']:
             image = form.cleaned_data['image']
-            image_url, _ = upload_project_to_cloudinary(image)
-            project.image = image_url
+            project.image = None
 
         project.save()
 
-        # Add existing technologies
-        existing_tech_ids = form.cleaned_data.get('technologies')
-        for tech_id in existing_tech_ids:
-            project.technologies.add(tech_id)
-
-        # If a tech is submitting and it's not
-        # in the database, add it to the database
-        # as unapproved.
-        new_tech_names = self.request.POST.get(
-            'new_technologies', '').split(',')
-        for tech_name in new_tech_names:
-            tech_name = tech_name.strip()
-            if tech_name:
-                tech, created = Tech.objects.get_or_create(
-                    tech_name=tech_name, defaults={'is_approved': False})
-                project.technologies.add(tech)
+        if image:
+            queue_image_upload(project, 'image', image, 'project')
+
+        # Add the selected technologies, plus any new ones
+        # submitted, which are added to the database as unapproved.
+        assign_technologies(
+            project,
+            form.cleaned_data.get('technologies'),
+            parse_tech_names(self.request.POST.get('new_technologies', '')))
 
         messages.success(
             self.request, "New project successfully added.")
@@ -161,8 +166,6 @@ class ProjectEditView(LoginRequiredMixin, UpdateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['all_technologies'] = Tech.objects.all().filter(
-            is_approved=True)
         context['project_technologies'] = self.object.technologies.all()
 
         return context
@@ -178,67 +181,47 @@ class ProjectEditView(LoginRequiredMixin, UpdateView):
         if not Tech.objects.filter(projects__technologies=tech_id).exists():
             Tech.objects.filter(id=tech_id).delete()
 
+    @transaction.atomic
     def form_valid(self, form):
         # Get the current project instance from the database
         current_project = Project.objects.get(pk=self.object.pk)
 
         # Get the old image public ID before it gets updated
-        old_image_public_id = None
-        if current_project.image:
-            if "http://res.cloudinary.com/" in str(
-                    current_project.image.public_id):
-                old_image_public_id = current_project.image.public_id.split(
-                    '/')[-1].split('.')[0]
-            else:
-                old_image_public_id = current_project.image.public_id
+        old_image_public_id = cloudinary_public_id(current_project.image)
 
-        image_updated = False
+        image_cleared = False
         new_image = form.cleaned_data.get('image')
         if new_image and hasattr(new_image, 'file'):
-            # Upload the new image to Cloudinary and get the URL
-            new_image_url, _ = upload_project_to_cloudinary(new_image)
-            self.object.image = new_image_url
-            image_updated = True
+            # Queue the new image to be uploaded in the background.
+            # The old image is shown until the upload replaces it,
+            # and only deleted then.
+            self.object.image = current_project.image
         elif 'image-clear' in self.request.POST:
             # Clear the image if 'clear' checkbox is ticked
             self.object.image = None
-            image_updated = True
+            image_cleared = True
         else:
             # No image was uploaded, so keep the old image
             self.object.image = current_project.image
-            image_updated = False
 
         project = form.save(commit=False)
         project.user = self.request.user
         project.save()
 
-        project.technologies.clear()
-        existing_tech_ids = form.cleaned_data.get('technologies', [])
-        for tech_id in existing_tech_ids:
-            project.technologies.add(tech_id)
-
-        # If a tech is submitted and it's not
-        # in the database, add it to the database
-        # as unapproved.
-        new_tech_names = self.request.POST.get(
-            'new_technologies', '').split(',')
-        for tech_name in new_tech_names:
-            tech_name = tech_name.strip()
-            if tech_name:
-                tech, created = Tech.objects.get_or_create(
-                    tech_name=tech_name, defaults={'is_approved': False})
-                project.technologies.add(tech)
-
-        # Delete old image from Cloudinary
-        new_public_id = getattr(self.object.image, 'public_id', None)
-        if image_updated and old_image_public_id and old_image_public_id != new_public_id:
-            try:
-                cloudinary.uploader.destroy(
-                    old_image_public_id, invalidate=True)
-            except Exception as e:
-                print(e)
-                messages.error(
-                    self.request, "There was an error deleting the old image.")
+        if new_image and hasattr(new_image, 'file'):
+            queue_image_upload(project, 'image', new_image, 'project')
+
+        # Replace the technologies with the selected ones, plus any
+        # new ones submitted, which are added to the database as
+        # unapproved.
+        assign_technologies(
+            project,
+            form.cleaned_data.get('technologies'),
+            parse_tech_names(self.request.POST.get('new_technologies', '')))
+
+        # Queue the cleared image to be deleted from Cloudinary
+        if image_cleared:
+            queue_image_deletion(old_image_public_id)
 
         messages.success(self.request, "Project successfully updated.")
         return HttpResponseRedirect(self.get_success_url())
@@ -259,30 +242,10 @@ def delete_project(request, slug, project_slug):
     project = get_object_or_404(Project, slug=project_slug, user__slug=slug)
 
     if user == project.user:
-
-        if project.image:
-            # Get the previous image id before deleting the project
-            if ("http://res.cloudinary.com/nvmind/image/upload/" in
-                    project.image.public_id):
-                image_public_id = project.image.public_id.split(
-                    '/')[-1]
-            else:
-                image_public_id = project.image.public_id
-
+        # The project's image is queued for deletion by the
+        # post_delete signal.
         project.delete()
 
-        if project.image:
-            try:
-                cloudinary.uploader.destroy(image_public_id, invalidate=True)
-                messages.success(
-                    request, "Project image has been successfully deleted.")
-            except Exception as e:
-                print(e)
-                messages.warning(
-                    request,
-                    "Project deleted, but there was an error deleting\n",
-                    "the image from Cloudinary. Please check manually.")
-
         messages.success(
             request, "Your project has been successfully deleted.")
         return redirect(
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SearchAndFilterConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'search_and_filter'
+
+    def ready(self):
+        import search_and_filter.signals
@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q
+from django.utils.module_loading import import_string
+from project.models import Project
+from job_post.models import JobPost
+from custom_account.models import CustomUser
+from .index import InvertedIndex
+from .vectors import search_config, vectors_supported
+
+
+# The model, searched fields and base filter for each search type.
+SEARCH_TYPES = {
+    'projects': (Project, ('name', 'description'), {'active': True}),
+    'job_posts': (JobPost, ('name', 'description'), {'active': True}),
+    'users': (
+        CustomUser,
+        ('first_name', 'last_name', 'email', 'bio'),
+        {'is_active': True}),
+}
+
+
+def get_search_type(search_type):
+    """
+    Returns the search type definition, defaulting to users
+    like the search page does.
+    """
+    return SEARCH_TYPES.get(search_type, SEARCH_TYPES['users'])
+
+
+class BaseSearchBackend:
+    """
+    Search backends turn a search type and a query string into
+    a queryset. Tech filtering and pagination are left to the view.
+    """
+
+    def search(self, search_type, query):
+        raise NotImplementedError
+
+
+class ORMSearchBackend(BaseSearchBackend):
+    """
+    Searches with icontains lookups on each field. Slow on large
+    tables, but needs nothing beyond the database.
+    """
+
+    def search(self, search_type, query):
+        model, fields, base_filter = get_search_type(search_type)
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        return model.objects.filter(condition).filter(**base_filter)
+
+
+class InvertedIndexSearchBackend(BaseSearchBackend):
+    """
+    Searches an in-process inverted index and then fetches the
+    matching rows by primary key.
+    """
+    indexes = {}
+
+    @classmethod
+    def get_index(cls, model):
+        """
+        Returns the index for a model, creating it on first use.
+        """
+        if model not in cls.indexes:
+            for searched_model, fields, _ in SEARCH_TYPES.values():
+                if searched_model is model:
+                    cls.indexes[model] = InvertedIndex(
+                        model, fields,
+                        max_age=getattr(
+                            settings, 'SEARCH_INDEX_MAX_AGE', None))
+                    break
+        return cls.indexes.get(model)
+
+    def search(self, search_type, query):
+        model, _, base_filter = get_search_type(search_type)
+        queryset = model.objects.filter(**base_filter)
+        matching_ids = self.get_index(model).search(query)
+        if matching_ids is None:
+            return queryset
+        return queryset.filter(pk__in=matching_ids)
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Searches the weighted search_vector columns and orders the
+    results by SearchRank. On other databases the search is handed
+    to fallback_backend_class instead.
+    """
+    fallback_backend_class = InvertedIndexSearchBackend
+
+    def search(self, search_type, query):
+        if not vectors_supported():
+            return self.fallback_backend_class().search(search_type, query)
+
+        model, _, base_filter = get_search_type(search_type)
+        queryset = model.objects.filter(**base_filter)
+        if not query.strip():
+            return queryset
+
+        search_query = SearchQuery(query, config=search_config())
+        return queryset.filter(
+            search_vector=search_query
+        ).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-pk')
+
+
+def get_search_backend():
+    """
+    Returns an instance of the backend set in SEARCH_BACKEND.
+    """
+    backend_path = getattr(
+        settings, 'SEARCH_BACKEND',
+        'search_and_filter.backends.PostgresSearchBackend')
+    return import_string(backend_path)()
@@ -0,0 +1,183 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Suffixes are checked in order, so longer suffixes need to come
+# before the shorter ones they end with.
+SUFFIXES = (
+    'ations', 'ation', 'ments', 'ment', 'ness', 'ings', 'ing',
+    'ers', 'er', 'ies', 'ied', 'ed', 'ly', 'es', 's',
+)
+
+
+def stem(token):
+    """
+    A very light English suffix stripper. It isn't a full Porter
+    stemmer, it only needs to make "developers", "developer" and
+    "developing" land on the same term.
+    """
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            if suffix in ('ies', 'ied'):
+                return token[:-len(suffix)] + 'y'
+            if suffix == 's' and token.endswith('ss'):
+                return token
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase alphanumeric tokens.
+    """
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def analyze(text):
+    """
+    Returns the set of terms stored in the index for a piece of text.
+    Both the raw token and its stem are kept so prefix lookups on
+    half typed words still work.
+    """
+    terms = set()
+    for token in tokenize(text):
+        terms.add(token)
+        terms.add(stem(token))
+    return terms
+
+
+class InvertedIndex:
+    """
+    An in-memory inverted index for a single model. Maps each term
+    to the set of primary keys of the rows that contain it, and keeps
+    a sorted list of terms for prefix lookups.
+    """
+
+    def __init__(self, model, fields, max_age=None):
+        self.model = model
+        self.fields = fields
+        self.max_age = max_age
+        self.postings = {}
+        self.doc_terms = {}
+        self.sorted_terms = []
+        self.built_at = None
+        self.lock = threading.RLock()
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def is_stale(self):
+        """
+        The index is only updated by signals in the process that made
+        the change, so other workers rebuild it after max_age seconds.
+        """
+        if not self.is_built:
+            return True
+        if self.max_age is None:
+            return False
+        return time.monotonic() - self.built_at > self.max_age
+
+    def build(self):
+        """
+        Builds the index from scratch from the database.
+        """
+        rows = self.model.objects.values_list(
+            'pk', *self.fields).iterator()
+        with self.lock:
+            self.built_at = None
+            self.postings = {}
+            self.doc_terms = {}
+            self.sorted_terms = []
+            for row in rows:
+                self._add(row[0], row[1:])
+            self.sorted_terms = sorted(self.postings)
+            self.built_at = time.monotonic()
+
+    def ensure_built(self):
+        if self.is_stale():
+            self.build()
+
+    def _add(self, pk, values):
+        terms = set()
+        for value in values:
+            terms |= analyze(value)
+        self.doc_terms[pk] = terms
+        for term in terms:
+            if term not in self.postings:
+                self.postings[term] = set()
+                if self.is_built:
+                    insort(self.sorted_terms, term)
+            self.postings[term].add(pk)
+
+    def _remove(self, pk):
+        for term in self.doc_terms.pop(pk, ()):
+            docs = self.postings.get(term)
+            if docs is None:
+                continue
+            docs.discard(pk)
+            if not docs:
+                del self.postings[term]
+                position = bisect_left(self.sorted_terms, term)
+                if (position < len(self.sorted_terms) and
+                        self.sorted_terms[position] == term):
+                    del self.sorted_terms[position]
+
+    def update(self, instance):
+        """
+        Re-indexes a single saved instance. Does nothing if the index
+        hasn't been built yet, as the next build will pick it up.
+        """
+        if not self.is_built:
+            return
+        values = [getattr(instance, field) for field in self.fields]
+        with self.lock:
+            self._remove(instance.pk)
+            self._add(instance.pk, values)
+
+    def remove(self, pk):
+        """
+        Removes a deleted row from the index.
+        """
+        if not self.is_built:
+            return
+        with self.lock:
+            self._remove(pk)
+
+    def _prefix_matches(self, prefix):
+        matches = set()
+        position = bisect_left(self.sorted_terms, prefix)
+        while position < len(self.sorted_terms):
+            term = self.sorted_terms[position]
+            if not term.startswith(prefix):
+                break
+            matches |= self.postings[term]
+            position += 1
+        return matches
+
+    def search(self, query):
+        """
+        Returns the set of primary keys matching every token in the
+        query. Each token matches terms it is a prefix of, or terms
+        sharing its stem.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+
+        self.ensure_built()
+        with self.lock:
+            result = None
+            for token in tokens:
+                matches = self._prefix_matches(token)
+                matches |= self.postings.get(stem(token), set())
+                result = matches if result is None else result & matches
+                if not result:
+                    return set()
+            return result
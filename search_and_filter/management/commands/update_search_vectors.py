@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from search_and_filter.vectors import (VECTOR_FIELDS,
+                                       update_search_vectors,
+                                       vectors_supported)
+
+
+class Command(BaseCommand):
+    """
+    Backfills the search_vector column for projects, job posts
+    and users in batches of primary keys.
+    """
+    help = 'Recompute search vectors for all searchable rows in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of rows to update per UPDATE statement.')
+        parser.add_argument(
+            '--model', action='append', dest='models',
+            choices=[model._meta.model_name for model in VECTOR_FIELDS],
+            help='Only backfill the given model. Can be repeated.')
+
+    def handle(self, *args, **options):
+        if not vectors_supported():
+            self.stdout.write(self.style.WARNING(
+                'Search vectors are only used on PostgreSQL, '
+                'nothing to do.'))
+            return
+
+        batch_size = options['batch_size']
+        for model in VECTOR_FIELDS:
+            if (options['models'] and
+                    model._meta.model_name not in options['models']):
+                continue
+
+            updated = 0
+            last_pk = 0
+            while True:
+                pks = list(model.objects.filter(
+                    pk__gt=last_pk
+                ).order_by('pk').values_list('pk', flat=True)[:batch_size])
+                if not pks:
+                    break
+                updated += update_search_vectors(model, pks)
+                last_pk = pks[-1]
+                self.stdout.write(
+                    f'{model._meta.label}: {updated} rows updated')
+
+            self.stdout.write(self.style.SUCCESS(
+                f'Finished {model._meta.label}: {updated} rows updated'))
@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from project.models import Project
+from job_post.models import JobPost
+from custom_account.models import CustomUser
+from technology.models import Tech
+from .backends import InvertedIndexSearchBackend
+from .vectors import (VECTOR_FIELDS, update_search_vectors,
+                      update_tech_search_vectors)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=JobPost)
+@receiver(post_save, sender=CustomUser)
+def update_search_index_on_save(sender, instance, **kwargs):
+    """
+    Re-index a row in the search index once its save is committed.
+    """
+    index = InvertedIndexSearchBackend.get_index(sender)
+    if index:
+        transaction.on_commit(lambda: index.update(instance))
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=JobPost)
+@receiver(post_delete, sender=CustomUser)
+def remove_from_search_index_on_delete(sender, instance, **kwargs):
+    """
+    Remove a deleted row from the search index once the delete is
+    committed.
+    """
+    index = InvertedIndexSearchBackend.get_index(sender)
+    if index:
+        pk = instance.pk
+        transaction.on_commit(lambda: index.remove(pk))
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=JobPost)
+@receiver(post_save, sender=CustomUser)
+def update_search_vector_on_save(sender, instance, update_fields=None,
+                                 **kwargs):
+    """
+    Recompute the row's search vector when it is saved, unless only
+    fields outside the vector were saved, e.g. last_login.
+    """
+    if update_fields is not None and not update_fields.intersection(
+            field for field, _ in VECTOR_FIELDS[sender]):
+        return
+    update_search_vectors(sender, [instance.pk])
+
+
+@receiver(m2m_changed, sender=Project.technologies.through)
+@receiver(m2m_changed, sender=JobPost.technologies.through)
+def update_search_vector_on_tech_change(
+        sender, instance, action, reverse, model, pk_set, **kwargs):
+    """
+    Tech names are part of the search vector, so recompute it when
+    the tech on a project or job post changes. When the change is
+    made from the Tech side, pk_set holds the affected rows.
+    """
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+
+    if reverse:
+        if pk_set:
+            update_search_vectors(model, list(pk_set))
+    else:
+        update_search_vectors(type(instance), [instance.pk])
+
+
+@receiver(post_save, sender=Tech)
+def update_search_vectors_on_tech_save(sender, instance, created, **kwargs):
+    """
+    Tech names are part of the search vectors of the rows using the
+    tech, so recompute them when it is renamed. A new tech isn't used
+    by any rows yet.
+    """
+    if not created:
+        update_tech_search_vectors([instance.pk])
@@ -1,3 +1,287 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import skipIf, skipUnless
+from django.contrib.admin import AdminSite
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from custom_account.models import CustomUser, TechUserProfile
+from project.models import Project
+from search_and_filter.backends import (InvertedIndexSearchBackend,
+                                        ORMSearchBackend,
+                                        PostgresSearchBackend)
+from search_and_filter.index import analyze, stem
+from technology.admin import TechAdmin
+from technology.catalogue import get_tech_catalogue
+from technology.models import Tech
 
-# Create your tests here.
+
+class SearchIndexTests(TestCase):
+    """
+    Tests for the tokenizer and stemmer used by the search index.
+    """
+
+    def test_stem_groups_word_forms(self):
+        """
+        Test that common word forms share a stem.
+        """
+        self.assertEqual(stem('developers'), stem('developer'))
+        self.assertEqual(stem('developer'), stem('developing'))
+        self.assertEqual(stem('libraries'), 'library')
+        self.assertEqual(stem('class'), 'class')
+
+    def test_analyze_keeps_raw_tokens_and_stems(self):
+        """
+        Test that both the raw token and the stem are indexed.
+        """
+        terms = analyze('Testing, Django!')
+        self.assertIn('testing', terms)
+        self.assertIn('test', terms)
+        self.assertIn('django', terms)
+
+
+class SearchBackendTests(TestCase):
+    """
+    Tests for the search backends and the search results view.
+    """
+
+    def setUp(self):
+        InvertedIndexSearchBackend.indexes.clear()
+        self.user = CustomUser.objects.create_user(
+            username='searchuser',
+            first_name='Search',
+            last_name='User',
+            email='searchuser@example.com',
+            password='password',
+        )
+        TechUserProfile.objects.create(user=self.user)
+
+        self.project = Project.objects.create(
+            name='Portfolio Builder',
+            description='A tool for developers building portfolios.',
+            user=self.user,
+        )
+        Project.objects.create(
+            name='Weather App',
+            description='Shows the forecast.',
+            user=self.user,
+        )
+
+    def tearDown(self):
+        InvertedIndexSearchBackend.indexes.clear()
+
+    def search(self, backend, query, search_type='projects'):
+        return set(backend.search(search_type, query))
+
+    def test_index_matches_prefixes_and_stems(self):
+        """
+        Test that half typed words and other word forms match.
+        """
+        backend = InvertedIndexSearchBackend()
+        self.assertEqual(self.search(backend, 'portf'), {self.project})
+        self.assertEqual(
+            self.search(backend, 'developing'), {self.project})
+        self.assertEqual(self.search(backend, 'portfolio weather'), set())
+
+    def test_index_matches_orm_backend(self):
+        """
+        Test that the index finds the same rows as the ORM backend
+        for whole word queries.
+        """
+        for query in ['weather', 'tool', 'builder', '']:
+            self.assertEqual(
+                self.search(InvertedIndexSearchBackend(), query),
+                self.search(ORMSearchBackend(), query))
+
+    def test_index_is_updated_on_save_and_delete(self):
+        """
+        Test that saving and deleting rows updates a built index once
+        the transaction commits.
+        """
+        backend = InvertedIndexSearchBackend()
+        self.assertEqual(self.search(backend, 'rocket'), set())
+        index = InvertedIndexSearchBackend.get_index(Project)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.name = 'Rocket Launcher'
+            self.project.save()
+            self.assertNotIn('rocket', index.postings)
+        self.assertEqual(self.search(backend, 'rocket'), {self.project})
+        self.assertNotIn('builder', index.postings)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.delete()
+            self.assertIn('rocket', index.postings)
+        self.assertNotIn('rocket', index.postings)
+
+    def test_inactive_projects_are_not_returned(self):
+        """
+        Test that inactive projects are filtered out of the results.
+        """
+        self.project.active = False
+        self.project.save()
+        backend = InvertedIndexSearchBackend()
+        self.assertEqual(self.search(backend, 'portfolio'), set())
+
+    def test_user_search(self):
+        """
+        Test that users can be found by name and email.
+        """
+        backend = InvertedIndexSearchBackend()
+        self.assertEqual(
+            self.search(backend, 'searchuser@example', 'users'),
+            {self.user})
+        self.assertEqual(self.search(backend, 'sea', 'users'), {self.user})
+
+    @skipIf(connection.vendor == 'postgresql',
+            'Needs a database without tsvector support')
+    def test_postgres_backend_falls_back_on_sqlite(self):
+        """
+        Test that the PostgreSQL backend uses the in-process index
+        when the database has no tsvector support.
+        """
+        self.assertEqual(
+            self.search(PostgresSearchBackend(), 'portf'), {self.project})
+
+    @skipIf(connection.vendor == 'postgresql',
+            'Needs a database without tsvector support')
+    def test_update_search_vectors_command_on_sqlite(self):
+        """
+        Test that the backfill command exits cleanly without PostgreSQL.
+        """
+        out = StringIO()
+        call_command('update_search_vectors', stdout=out)
+        self.assertIn('only used on PostgreSQL', out.getvalue())
+
+    @override_settings(
+        SEARCH_BACKEND='search_and_filter.backends.ORMSearchBackend')
+    def test_search_results_view_with_orm_backend(self):
+        """
+        Test that the search page still works with the ORM backend.
+        """
+        response = self.client.get(
+            '/search/', {'q': 'weather', 'type': 'projects'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['object_list']), 1)
+
+    # PostgreSQL results are ranked, which keeps page numbers.
+    @override_settings(SEARCH_BACKEND=(
+        'search_and_filter.backends.InvertedIndexSearchBackend'))
+    def test_user_results_are_paged_by_id(self):
+        """
+        Test that user results are cursor paginated newest first and
+        the next link keeps the search parameters.
+        """
+        for i in range(10):
+            CustomUser.objects.create_user(
+                username=f'pageuser{i}',
+                first_name='Page',
+                last_name='User',
+                email=f'pageuser{i}@example.com',
+                password='password',
+            )
+        response = self.client.get('/search/', {'q': 'page', 'type': 'users'})
+        page = response.context['page_obj']
+        self.assertEqual(len(page), 9)
+        self.assertIn('type=users', page.next_url)
+        self.assertIn('q=page', page.next_url)
+
+        response = self.client.get('/search/' + page.next_url)
+        users = list(response.context['object_list'])
+        self.assertEqual(len(users), 1)
+        self.assertEqual(users[0].username, 'pageuser0')
+        self.assertContains(response, 'Previous')
+
+    def test_search_results_view(self):
+        """
+        Test that the search page returns the matching projects.
+        """
+        response = self.client.get(
+            '/search/', {'q': 'portfolio', 'type': 'projects'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(response.context['object_list']), [self.project])
+
+    @override_settings(SEARCH_BACKEND=(
+        'search_and_filter.backends.InvertedIndexSearchBackend'))
+    def test_search_results_query_budget(self):
+        """
+        Test that the search page uses a fixed number of queries.
+        """
+        for i in range(9):
+            Project.objects.create(name=f'Portfolio {i}', user=self.user)
+        # Build the search indexes first, as that is a one off cost.
+        InvertedIndexSearchBackend.get_index(Project).build()
+        InvertedIndexSearchBackend.get_index(CustomUser).build()
+        # The tech catalogue is loaded once per process as well.
+        get_tech_catalogue()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                '/search/', {'q': 'portfolio', 'type': 'projects'})
+        self.assertEqual(len(response.context['object_list']), 9)
+
+        with self.assertNumQueries(2):
+            self.client.get('/search/', {'q': 'user', 'type': 'users'})
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            'Search vectors are only kept on PostgreSQL')
+class SearchVectorTests(TestCase):
+    """
+    Tests for keeping the stored search vectors current.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='vectoruser',
+            first_name='Vector',
+            last_name='User',
+            email='vectoruser@example.com',
+            password='password',
+        )
+        TechUserProfile.objects.create(user=self.user)
+        self.project = Project.objects.create(
+            name='Portfolio Builder', user=self.user)
+        self.tech = Tech.objects.create(tech_name='Djangoo')
+        self.project.technologies.add(self.tech)
+
+    def search(self, query):
+        return set(PostgresSearchBackend().search('projects', query))
+
+    def test_saves_outside_the_vector_fields_skip_the_update(self):
+        """
+        Test that the vector is only recomputed when the saved fields
+        include one of its source fields.
+        """
+        # Renamed without signals, so the vector still has the old name.
+        Project.objects.filter(pk=self.project.pk).update(name='Rocket')
+        self.project.refresh_from_db()
+        self.project.save(update_fields=['active'])
+        self.assertEqual(self.search('rocket'), set())
+
+        self.project.save(update_fields=['name'])
+        self.assertEqual(self.search('rocket'), {self.project})
+
+    def test_renamed_tech_is_searchable_under_its_new_name(self):
+        """
+        Test that saving a renamed tech recomputes the vectors of the
+        projects using it.
+        """
+        self.assertEqual(self.search('djangoo'), {self.project})
+        self.tech.tech_name = 'Flask'
+        self.tech.save()
+        self.assertEqual(self.search('flask'), {self.project})
+        self.assertEqual(self.search('djangoo'), set())
+
+    def test_admin_rename_updates_search_vectors(self):
+        """
+        Test that the bulk rename in the admin, which skips the save
+        signals, recomputes the vectors too.
+        """
+        # Renamed without signals, so the vector still has the old name.
+        Tech.objects.filter(pk=self.tech.pk).update(tech_name='reactjs')
+        self.assertEqual(self.search('reactjs'), set())
+
+        TechAdmin(Tech, AdminSite()).uppercase_tech_name(
+            None, Tech.objects.all())
+        self.assertEqual(self.search('reactjs'), {self.project})
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+from project.models import Project
+from job_post.models import JobPost
+from custom_account.models import CustomUser
+from technology.models import Tech
+
+
+# The weighted fields that make up each model's search vector.
+# Tech names are added with TECH_WEIGHT for models that have them.
+VECTOR_FIELDS = {
+    Project: (('name', 'A'), ('description', 'B')),
+    JobPost: (('name', 'A'), ('description', 'B')),
+    CustomUser: (
+        ('first_name', 'A'),
+        ('last_name', 'A'),
+        ('work_title', 'B'),
+        ('bio', 'C')),
+}
+
+# The reverse relation from Tech to each model with technologies.
+TECH_RELATIONS = {
+    Project: 'projects',
+    JobPost: 'job_posts',
+}
+
+TECH_WEIGHT = 'C'
+
+
+def search_config():
+    return getattr(settings, 'SEARCH_CONFIG', 'english')
+
+
+def vectors_supported():
+    """
+    Search vectors are only maintained on PostgreSQL.
+    """
+    return connection.vendor == 'postgresql'
+
+
+def build_search_vector(model):
+    """
+    Returns the expression used to compute the search vector
+    for a row of the given model.
+    """
+    config = search_config()
+    vector = None
+    for field, weight in VECTOR_FIELDS[model]:
+        part = SearchVector(field, weight=weight, config=config)
+        vector = part if vector is None else vector + part
+
+    relation = TECH_RELATIONS.get(model)
+    if relation:
+        tech_names = Tech.objects.filter(
+            **{relation: OuterRef('pk')}
+        ).values(relation).annotate(
+            names=StringAgg('tech_name', delimiter=' ')
+        ).values('names')
+        vector += SearchVector(
+            Subquery(tech_names), weight=TECH_WEIGHT, config=config)
+    return vector
+
+
+def update_search_vectors(model, pks):
+    """
+    Recomputes the search vector for the given rows with a single
+    UPDATE. Does nothing on databases without tsvector support.
+    """
+    if not vectors_supported() or not pks:
+        return 0
+    return model.objects.filter(pk__in=pks).update(
+        search_vector=build_search_vector(model))
+
+
+def update_tech_search_vectors(tech_ids):
+    """
+    Recomputes the search vectors of the rows using the given tech,
+    e.g. after they are renamed, with one UPDATE per model.
+    """
+    if not vectors_supported() or not tech_ids:
+        return 0
+    updated = 0
+    for model in TECH_RELATIONS:
+        rows = model.objects.filter(technologies__in=tech_ids).values('pk')
+        updated += model.objects.filter(pk__in=rows).update(
+            search_vector=build_search_vector(model))
+    return updated
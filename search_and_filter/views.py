@@ -1,39 +1,91 @@
+from django.conf import settings
+from django.db.models import Exists, OuterRef
 from django.views.generic import ListView
 from project.models import Project
 from job_post.models import JobPost
-from technology.models import Tech
+from technology.catalogue import get_tech_catalogue
+from technology.index import get_tech_index
 from custom_account.models import CustomUser
-from django.db.models import Q
+from stackportfolio.loaders import load_cards
+from stackportfolio.pagination import CursorPaginationMixin
+from .backends import get_search_backend
 
 
-class SearchResultsView(ListView):
+# The tech index holding the tech for each searchable model.
+TECH_INDEX_KINDS = {
+    Project: 'projects',
+    JobPost: 'job_posts',
+    CustomUser: 'users',
+}
+
+
+# The path from each searchable model to its tech, for filtering in
+# the database.
+TECH_PATHS = {
+    Project: 'technologies',
+    JobPost: 'technologies',
+    CustomUser: 'tech_profile__technologies',
+}
+
+
+# The field results are paged on, newest first, for each model.
+# Users have no date_created so they are paged by id.
+CURSOR_FIELDS = {
+    Project: 'date_created',
+    JobPost: 'date_created',
+    CustomUser: None,
+}
+
+
+class SearchResultsView(CursorPaginationMixin, ListView):
     """
     Handles the display of search results.
     """
     template_name = 'search_results_page.html'
     paginate_by = 9
 
+    def get_cursor_field(self, queryset):
+        return CURSOR_FIELDS[queryset.model]
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Results ranked by relevance can't be paged by position, so
+        they keep page numbers.
+        """
+        if 'rank' in queryset.query.annotations:
+            return ListView.paginate_queryset(self, queryset, page_size)
+        return super().paginate_queryset(queryset, page_size)
+
     def filter_by_technologies(self, queryset, tech_names, match_type, model):
-        if not tech_names:
+        """
+        Filters the queryset down to rows with all (or any) of the
+        named tech. The matching ids come from the tech bitmap index,
+        so the database only has to look rows up by primary key. When
+        more than TECH_FILTER_MAX_IDS rows match, sending every id as a
+        query parameter would cost more than it saves (and SQLite
+        limits the number of parameters), so the database matches
+        the tech itself.
+        """
+        if not tech_names or match_type not in ('all', 'any'):
+            return queryset
+
+        tech_ids = get_tech_catalogue().ids_for_names(tech_names)
+        if not tech_ids and match_type == 'all':
             return queryset
 
-        if model == CustomUser:
-            tech_qs = Tech.objects.filter(tech_name__in=tech_names)
-            if match_type == 'all':
-                for tech in tech_qs:
-                    queryset = queryset.filter(tech_profile__technologies=tech)
-            elif match_type == 'any':
-                queryset = queryset.filter(
-                    tech_profile__technologies__in=tech_qs)
-            return queryset.distinct()
-
-        tech_qs = Tech.objects.filter(tech_name__in=tech_names)
-        if match_type == 'all':
-            for tech in tech_qs:
-                queryset = queryset.filter(technologies=tech)
-        elif match_type == 'any':
-            queryset = queryset.filter(technologies__in=tech_qs)
-        return queryset.distinct()
+        index = get_tech_index(TECH_INDEX_KINDS[model])
+        matching_ids = index.match(tech_ids, match_type)
+        if len(matching_ids) <= getattr(settings, 'TECH_FILTER_MAX_IDS', 500):
+            return queryset.filter(pk__in=matching_ids)
+
+        tech_path = TECH_PATHS[model]
+        if match_type == 'any':
+            return queryset.filter(Exists(model.objects.filter(
+                pk=OuterRef('pk'), **{f'{tech_path}__in': tech_ids})))
+        for tech_id in tech_ids:
+            queryset = queryset.filter(Exists(model.objects.filter(
+                pk=OuterRef('pk'), **{tech_path: tech_id})))
+        return queryset
 
     def get_queryset(self):
         query = self.request.GET.get('q', '')
@@ -45,38 +97,23 @@ class SearchResultsView(ListView):
         else:
             selected_tech_names = []
 
-        if search_type == 'projects':
-            queryset = Project.objects.filter(
-                Q(name__icontains=query) | Q(description__icontains=query)
-            ).filter(active=True)
-        elif search_type == 'job_posts':
-            queryset = JobPost.objects.filter(
-                Q(name__icontains=query) | Q(description__icontains=query)
-            ).filter(active=True)
-        else:
-            queryset = CustomUser.objects.filter(
-                Q(first_name__icontains=query) |
-                Q(last_name__icontains=query) |
-                Q(email__icontains=query) | Q(bio__icontains=query)
-            ).filter(is_active=True)
+        queryset = get_search_backend().search(search_type, query)
 
-        return self.filter_by_technologies(
+        return load_cards(self.filter_by_technologies(
             queryset,
             selected_tech_names,
             tech_match_type,
-            CustomUser if search_type == 'users' else Project)
+            queryset.model))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         search_type = self.request.GET.get('type', 'users')
         context['search_type'] = search_type
         context['current_query'] = self.request.GET.get('q', '')
-        context['approved_technologies'] = Tech.objects.filter(
-            is_approved=True).order_by('tech_name')
         selected_tech_names = self.request.GET.get(
             'selectedTechnologies', '').split(',')
-        context['selected_technologies'] = Tech.objects.filter(
-            tech_name__in=selected_tech_names, is_approved=True)
+        context['selected_technologies'] = get_tech_catalogue().by_names(
+            selected_tech_names, approved_only=True)
         context['tech_match_type'] = self.request.GET.get(
             'tech_match_type', 'any')
         return context
@@ -0,0 +1,239 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlsplit
+from django.core.cache.backends import filebased, locmem, memcached
+from django.core.cache.backends.base import (DEFAULT_TIMEOUT, InvalidCacheKey,
+                                             memcache_key_warnings)
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    from django_redis.cache import RedisCache as BaseRedisCache
+except ImportError:
+    BaseRedisCache = None
+
+try:
+    import pymemcache
+except ImportError:
+    pymemcache = None
+
+
+class CacheStats:
+    """
+    Counts the operations on each cache in this process, keyed by the
+    backend and its location, for the cache stats page.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def add(self, name, **counts):
+        with self.lock:
+            self.counts.setdefault(name, Counter()).update(counts)
+
+    def get(self, name):
+        with self.lock:
+            counts = Counter(self.counts.get(name, ()))
+        lookups = counts['hits'] + counts['misses']
+        return {
+            'hits': counts['hits'],
+            'misses': counts['misses'],
+            'sets': counts['sets'],
+            'deletes': counts['deletes'],
+            'hit_rate': counts['hits'] / lookups if lookups else None,
+        }
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+
+cache_stats = CacheStats()
+
+
+class CacheStatsMixin:
+    """
+    Counts hits, misses, sets and deletes on a cache backend.
+
+    The base *_many() methods call get(), set() and delete() for each
+    key, so those don't count while a *_many() call is running.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self.stats_name = f'{type(self).__name__}:{location}'
+        self.in_many = False
+
+    @property
+    def stats(self):
+        return cache_stats.get(self.stats_name)
+
+    def count(self, **counts):
+        if not self.in_many:
+            cache_stats.add(self.stats_name, **counts)
+
+    @contextmanager
+    def many(self, **counts):
+        self.count(**counts)
+        self.in_many = True
+        try:
+            yield
+        finally:
+            self.in_many = False
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._missing_key, version=version)
+        found = value is not self._missing_key
+        self.count(hits=int(found), misses=int(not found))
+        return value if found else default
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        with self.many():
+            values = super().get_many(keys, version=version)
+        self.count(hits=len(values), misses=len(keys) - len(values))
+        return values
+
+    def set(self, key, value, *args, **kwargs):
+        self.count(sets=1)
+        return super().set(key, value, *args, **kwargs)
+
+    def add(self, key, value, *args, **kwargs):
+        self.count(sets=1)
+        return super().add(key, value, *args, **kwargs)
+
+    def set_many(self, data, *args, **kwargs):
+        with self.many(sets=len(data)):
+            return super().set_many(data, *args, **kwargs)
+
+    def delete(self, key, *args, **kwargs):
+        self.count(deletes=1)
+        return super().delete(key, *args, **kwargs)
+
+    def delete_many(self, keys, *args, **kwargs):
+        keys = list(keys)
+        with self.many(deletes=len(keys)):
+            return super().delete_many(keys, *args, **kwargs)
+
+
+class LocMemCache(CacheStatsMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(CacheStatsMixin, filebased.FileBasedCache):
+    pass
+
+
+class PyMemcacheCache(CacheStatsMixin, memcached.PyMemcacheCache):
+    pass
+
+
+if BaseRedisCache is not None:
+    class RedisCache(CacheStatsMixin, BaseRedisCache):
+        pass
+
+
+class SharedLimitsLocMemCache(LocMemCache):
+    """
+    A pure-Python stand-in for a shared cache server, for tests and
+    local development.
+
+    Every instance with the same location shares one store, as
+    workers share a server. Unlike LocMemCache, keys that memcached
+    would reject raise InvalidCacheKey, and values bigger than the
+    MAX_VALUE_SIZE option (1MB, memcached's default) aren't stored,
+    so code that only works on the local cache fails here too.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self.max_value_size = params.get('OPTIONS', {}).get(
+            'MAX_VALUE_SIZE', 1024 * 1024)
+
+    def validate_key(self, key):
+        for warning in memcache_key_warnings(key):
+            raise InvalidCacheKey(warning)
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        # The value has already been pickled.
+        if len(value) > self.max_value_size:
+            self._delete(key)
+            return
+        super()._set(key, value, timeout)
+
+
+# Backends whose entries are only seen by the process that set them.
+PROCESS_LOCAL_BACKENDS = {
+    'stackportfolio.caches.LocMemCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+CACHE_BACKENDS = {
+    'locmem': 'stackportfolio.caches.LocMemCache',
+    'file': 'stackportfolio.caches.FileBasedCache',
+    'memcached': 'stackportfolio.caches.PyMemcacheCache',
+    'redis': 'stackportfolio.caches.RedisCache',
+    'rediss': 'stackportfolio.caches.RedisCache',
+    'fake': 'stackportfolio.caches.SharedLimitsLocMemCache',
+}
+
+
+def cache_from_url(url, key_prefix='', version=1):
+    """
+    Returns the CACHES entry for a cache url:
+
+        locmem://[name]
+        file:///path/to/dir
+        memcached://host:port[,host:port] (needs pymemcache)
+        redis://[:password@]host:port/db (needs django-redis)
+        fake://[name]
+
+    Query parameters set the timeout and options, for example
+    ?timeout=300&max_entries=1000. Keys are prefixed with key_prefix
+    and version, so bumping either drops everything cached before.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in CACHE_BACKENDS:
+        raise ImproperlyConfigured(f'Unknown cache url scheme: {url}')
+
+    if parts.scheme in ('redis', 'rediss'):
+        if BaseRedisCache is None:
+            raise ImproperlyConfigured(
+                'Redis caches need django-redis to be installed')
+        location = url.split('?', 1)[0]
+    elif parts.scheme == 'file':
+        location = parts.path
+    elif parts.scheme == 'memcached':
+        if pymemcache is None:
+            raise ImproperlyConfigured(
+                'Memcached caches need pymemcache to be installed')
+        location = parts.netloc.split(',')
+    else:
+        location = parts.netloc
+
+    config = {
+        'BACKEND': CACHE_BACKENDS[parts.scheme],
+        'LOCATION': location,
+        'KEY_PREFIX': key_prefix,
+        'VERSION': version,
+    }
+    options = {}
+    for name, value in parse_qsl(parts.query):
+        if name == 'timeout':
+            config['TIMEOUT'] = int(value) if value != 'none' else None
+        else:
+            options[name.upper()] = int(value) if value.isdigit() else value
+    if options:
+        config['OPTIONS'] = options
+    return config
+
+
+def cache_is_shared(config):
+    """
+    Returns whether every worker sees what the others store in the
+    cache with the given CACHES entry. The fake:// stand-in counts as
+    shared, as it's only used in a single process.
+    """
+    return config['BACKEND'] not in PROCESS_LOCAL_BACKENDS
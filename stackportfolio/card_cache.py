@@ -0,0 +1,116 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+
+# A version is kept per object, per owner and one for everything.
+# Bumping a version changes the cache key of every card that
+# depends on it, so stale cards are never looked up again.
+GLOBAL_VERSION_KEY = 'card-version:global'
+
+
+def object_version_key(label, pk):
+    return f'card-version:{label}:{pk}'
+
+
+def user_version_key(user_id):
+    return f'card-version:user:{user_id}'
+
+
+def new_version():
+    return str(time.time_ns())
+
+
+def bump_card_version(instance):
+    """
+    Invalidates the cached cards for a project or job post.
+    """
+    cache.set(
+        object_version_key(instance._meta.label_lower, instance.pk),
+        new_version(), None)
+
+
+def bump_card_versions(model, pks):
+    """
+    Invalidates the cached cards for many projects or job posts,
+    e.g. after a bulk update that skipped the save signals.
+    """
+    version = new_version()
+    cache.set_many({
+        object_version_key(model._meta.label_lower, pk): version
+        for pk in pks}, None)
+
+
+def bump_user_card_version(user_id):
+    """
+    Invalidates the cached cards showing a user's details.
+    """
+    cache.set(user_version_key(user_id), new_version(), None)
+
+
+def bump_user_card_versions(user_ids):
+    """
+    Invalidates the cached cards showing the details of many users.
+    """
+    version = new_version()
+    cache.set_many({
+        user_version_key(user_id): version for user_id in user_ids}, None)
+
+
+def bump_global_card_version():
+    """
+    Invalidates every cached card, e.g. when a tech is renamed
+    or approved.
+    """
+    cache.set(GLOBAL_VERSION_KEY, new_version(), None)
+
+
+def card_versions(objects=(), user_ids=()):
+    """
+    Returns the global version and the versions of the given
+    (label, pk) objects and users, fetched with one cache lookup.
+    Pages showing the same cards can use them as part of their ETag.
+    """
+    keys = [GLOBAL_VERSION_KEY]
+    keys.extend(object_version_key(label, pk) for label, pk in objects)
+    keys.extend(user_version_key(user_id) for user_id in user_ids)
+    versions = cache.get_many(keys)
+    return [versions.get(key, 0) for key in keys]
+
+
+def card_cache_keys(posts, viewer_id, variant):
+    """
+    Returns the cache key for each post's card, fetching all the
+    versions the keys depend on with one cache lookup.
+    """
+    version_keys = {GLOBAL_VERSION_KEY}
+    for post in posts:
+        version_keys.add(
+            object_version_key(post._meta.label_lower, post.pk))
+        version_keys.add(user_version_key(post.user_id))
+    versions = cache.get_many(list(version_keys))
+
+    keys = []
+    for post in posts:
+        updated = post.date_updated.timestamp() if post.date_updated else ''
+        keys.append(':'.join(str(part) for part in (
+            'card',
+            post._meta.label_lower,
+            post.pk,
+            updated,
+            versions.get(
+                object_version_key(post._meta.label_lower, post.pk), 0),
+            versions.get(user_version_key(post.user_id), 0),
+            versions.get(GLOBAL_VERSION_KEY, 0),
+            int(post.user_id == viewer_id),
+            variant,
+        )))
+    return keys
+
+
+def card_cache_enabled():
+    return getattr(settings, 'CARD_CACHE_ENABLED', True)
+
+
+def card_cache_timeout():
+    return getattr(settings, 'CARD_CACHE_TIMEOUT', 60 * 60 * 24)
@@ -0,0 +1,148 @@
+import hashlib
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control, patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from .card_cache import card_versions
+from .pagination import CursorPaginator, InvalidCursor
+
+
+def has_pending_messages(request):
+    """
+    Whether a message is waiting to be shown, without marking it as
+    shown.
+    """
+    return len(get_messages(request)) > 0
+
+
+class ConditionalGetMixin:
+    """
+    Answers a GET with 304 Not Modified when the client's copy of the
+    page is current, before fetching the page's objects or rendering
+    the template.
+
+    get_validator() returns whatever the page depends on, ideally from
+    one light query, and the ETag is a hash of that plus the viewer.
+    Pages with a message waiting are always rendered, so the message
+    isn't lost to a cached copy.
+
+    Anonymous pages can be cached by shared caches for
+    PUBLIC_PAGE_MAX_AGE seconds. Pages for a logged in user are
+    private and revalidated on every request.
+    """
+
+    def get_validator(self):
+        raise NotImplementedError
+
+    def get_last_modified(self):
+        """
+        The newest date the validator saw, set by get_validator().
+        """
+        return getattr(self, 'last_modified', None)
+
+    def render_page(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_etag(self):
+        parts = [
+            getattr(settings, 'RELEASE_VERSION', ''),
+            self.request.user.pk,
+            self.get_validator(),
+        ]
+        return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        if has_pending_messages(request):
+            response = self.render_page(request, *args, **kwargs)
+        else:
+            etag = self.get_etag()
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = self.render_page(request, *args, **kwargs)
+            response['ETag'] = etag
+
+            # The ETag covers more than the dates, so If-Modified-Since
+            # alone isn't trusted to answer with a 304.
+            last_modified = self.get_last_modified()
+            if last_modified:
+                response['Last-Modified'] = http_date(
+                    last_modified.timestamp())
+
+        self.patch_cache_headers(response)
+        return response
+
+    def patch_cache_headers(self, response):
+        patch_vary_headers(response, ['Cookie'])
+        if self.request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(
+                response, public=True, max_age=0,
+                s_maxage=getattr(settings, 'PUBLIC_PAGE_MAX_AGE', 60))
+
+
+class ConditionalDetailMixin(ConditionalGetMixin):
+    """
+    Conditional GETs for a detail view. The object is fetched for the
+    validator and reused for rendering. By default the validator is
+    for a project or job post.
+    """
+
+    def get_validator(self):
+        self.object = self.get_object()
+        return self.get_object_validator(self.object)
+
+    def get_object_validator(self, obj):
+        self.last_modified = obj.date_updated
+        return [
+            obj.pk,
+            obj.date_updated,
+            card_versions(
+                objects=[(obj._meta.label_lower, obj.pk)],
+                user_ids=[obj.user_id]),
+        ]
+
+    def render_page(self, request, *args, **kwargs):
+        if getattr(self, 'object', None) is None:
+            self.object = self.get_object()
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """
+    Conditional GETs for a cursor paginated list of cards. The page's
+    rows are fetched as values, so the validator is one query no
+    bigger than the page.
+    """
+
+    def get_validator(self):
+        queryset = self.get_queryset().prefetch_related(None)
+        field = self.get_cursor_field(queryset)
+        lookups = ['pk', 'user_id', 'date_updated']
+        if field and field not in lookups:
+            lookups.append(field)
+        paginator = CursorPaginator(
+            queryset.values(*lookups), self.get_paginate_by(queryset),
+            field=field)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_param))
+        except InvalidCursor:
+            # Rendering the page gives the 404.
+            return None
+
+        label = queryset.model._meta.label_lower
+        rows = page.object_list
+        self.last_modified = max(
+            (row['date_updated'] for row in rows if row['date_updated']),
+            default=None)
+        return [
+            self.request.GET.urlencode(),
+            [(row['pk'], row['date_updated']) for row in rows],
+            page.has_next(),
+            page.has_previous(),
+            card_versions(
+                objects=[(label, row['pk']) for row in rows],
+                user_ids=sorted({row['user_id'] for row in rows})),
+        ]
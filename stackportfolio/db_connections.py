@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import connections
+
+
+class ConnectionMetrics:
+    """
+    Counts database connections opened and reused in this process,
+    health checks, and time spent waiting for a pooled connection.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.max_wait = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, wait=None, **counts):
+        with self.lock:
+            self.counts.update(counts)
+            if wait is not None:
+                self.counts['waits'] += 1
+                self.counts['wait_time'] += wait
+                self.max_wait = max(self.max_wait, wait)
+
+    def get(self):
+        with self.lock:
+            counts = Counter(self.counts)
+            max_wait = self.max_wait
+        waits = counts['waits']
+        return {
+            'opened': counts['opened'],
+            'reused': counts['reused'],
+            'health_checks': counts['health_checks'],
+            'unusable': counts['unusable'],
+            'waits': waits,
+            'mean_wait_ms': (
+                counts['wait_time'] / waits * 1000 if waits else 0.0),
+            'max_wait_ms': max_wait * 1000,
+        }
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+            self.max_wait = 0.0
+
+
+db_metrics = ConnectionMetrics()
+
+
+class DatabaseConnectionMiddleware:
+    """
+    Counts persistent connections opened and reused by requests, and
+    checks a connection that has been idle for DB_HEALTH_CHECK_AFTER
+    seconds before the request uses it. A connection the database has
+    dropped is closed, so the request opens a new one instead of
+    failing. Pooled connections are counted and health checked by
+    their pool when they are handed out.
+
+    Django has already closed connections past CONN_MAX_AGE when the
+    request starts, so this goes first in MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        already_open = self.check_connections()
+        response = self.get_response(request)
+
+        now = time.monotonic()
+        for conn in connections.all():
+            if conn.connection is None or getattr(conn, 'pooled', False):
+                continue
+            if conn.alias not in already_open:
+                db_metrics.add(opened=1)
+            conn.last_used = now
+        return response
+
+    def check_connections(self):
+        """
+        Health checks the open connections, and returns the aliases of
+        those still open.
+        """
+        check_after = getattr(settings, 'DB_HEALTH_CHECK_AFTER', 30)
+        now = time.monotonic()
+        already_open = set()
+        for conn in connections.all():
+            if conn.connection is None or getattr(conn, 'pooled', False):
+                continue
+            if now - getattr(conn, 'last_used', now) >= check_after:
+                db_metrics.add(health_checks=1)
+                if not conn.is_usable():
+                    db_metrics.add(unusable=1)
+                    conn.close()
+                    continue
+            db_metrics.add(reused=1)
+            already_open.add(conn.alias)
+        return already_open
@@ -0,0 +1,102 @@
+import threading
+import time
+from django.db import OperationalError
+from stackportfolio.db_connections import db_metrics
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class PoolTimeout(OperationalError):
+    """
+    Raised when no pooled connection is free within the timeout.
+    """
+
+
+class ConnectionPool:
+    """
+    Shares up to max_size open connections between the threads of a
+    worker. A thread takes the most recently returned connection, or
+    opens one if the pool isn't full, or waits up to timeout seconds
+    for one to be returned.
+
+    A connection idle for health_check_after seconds or more is
+    checked with is_usable() before it is handed out, and replaced by
+    a new one if the database has dropped it.
+    """
+
+    def __init__(self, max_size, timeout, health_check_after=None,
+                 is_usable=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.is_usable = is_usable
+        # (connection, time returned) pairs.
+        self.idle = []
+        self.size = 0
+        self.condition = threading.Condition()
+
+    def get(self, connect):
+        """
+        Returns an idle connection, or a new one from connect().
+        """
+        started = time.monotonic()
+        connection = None
+        with self.condition:
+            while not self.idle and self.size >= self.max_size:
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f'No database connection free after '
+                        f'{self.timeout} seconds')
+                self.condition.wait(remaining)
+            if self.idle:
+                connection, returned_at = self.idle.pop()
+            else:
+                self.size += 1
+        db_metrics.add(wait=time.monotonic() - started)
+
+        if connection is not None and self.needs_check(returned_at):
+            db_metrics.add(health_checks=1)
+            if not self.is_usable(connection):
+                # Its place in the pool goes to a new connection.
+                db_metrics.add(unusable=1)
+                close_quietly(connection)
+                connection = None
+        if connection is not None:
+            db_metrics.add(reused=1)
+            return connection
+        try:
+            connection = connect()
+        except Exception:
+            self.release_slot()
+            raise
+        db_metrics.add(opened=1)
+        return connection
+
+    def needs_check(self, returned_at):
+        return (
+            self.is_usable is not None and
+            self.health_check_after is not None and
+            time.monotonic() - returned_at >= self.health_check_after)
+
+    def put(self, connection):
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, connection):
+        """
+        Closes a broken connection and frees its place in the pool.
+        """
+        close_quietly(connection)
+        self.release_slot()
+
+    def release_slot(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
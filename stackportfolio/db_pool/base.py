@@ -0,0 +1,79 @@
+import threading
+from django.db.backends.postgresql import base
+import psycopg2 as Database
+from psycopg2 import extensions
+from . import ConnectionPool
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def connection_is_usable(connection):
+    """
+    Checks a pooled psycopg2 connection with SELECT 1, leaving it idle.
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if (connection.get_transaction_status() !=
+                extensions.TRANSACTION_STATUS_IDLE):
+            connection.rollback()
+    except Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The PostgreSQL backend, with connections taken from a pool shared
+    by the worker's threads and returned to it when Django closes
+    them. Set POOL in the database settings to
+    {'MAX_SIZE': 10, 'TIMEOUT': 5, 'HEALTH_CHECK_AFTER': 30} and
+    CONN_MAX_AGE to 0, so each request hands its connection back when
+    it finishes. Connections idle for HEALTH_CHECK_AFTER seconds are
+    checked before they are handed out again.
+    """
+    pooled = True
+
+    def get_pool(self):
+        options = self.settings_dict.get('POOL', {})
+        with pools_lock:
+            if self.alias not in pools:
+                pools[self.alias] = ConnectionPool(
+                    options.get('MAX_SIZE', 10),
+                    options.get('TIMEOUT', 5),
+                    options.get('HEALTH_CHECK_AFTER', 30),
+                    connection_is_usable)
+            return pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        connection = pool.get(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params))
+        # Set when the connection was opened, so read it back for a
+        # connection from the pool.
+        self.isolation_level = connection.isolation_level
+        return connection
+
+    def _close(self):
+        """
+        Returns the connection to the pool, rolled back, unless it is
+        broken.
+        """
+        if self.connection is None:
+            return
+        pool = self.get_pool()
+        connection = self.connection
+        if connection.closed or (
+                self.errors_occurred and not self.is_usable()):
+            pool.discard(connection)
+            return
+        try:
+            if (connection.get_transaction_status() !=
+                    extensions.TRANSACTION_STATUS_IDLE):
+                connection.rollback()
+        except Exception:
+            pool.discard(connection)
+        else:
+            pool.put(connection)
@@ -0,0 +1,131 @@
+from django.conf import settings
+from django.contrib.admin import (AllValuesFieldListFilter,
+                                  RelatedFieldListFilter)
+from django.contrib.admin.utils import get_fields_from_path
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_count(model, using='default'):
+    """
+    Returns the planner's estimate of the number of rows in the
+    model's table, kept up to date by autovacuum. Returns None on
+    databases other than PostgreSQL, or if the table hasn't been
+    analyzed yet.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(model._meta.db_table)])
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Counts unfiltered changelists from the planner's estimate once the
+    table has more than estimate_threshold rows, as an exact COUNT(*)
+    scans the whole table. Filtered changelists are counted exactly.
+    """
+
+    def __init__(self, *args, estimate_threshold=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estimate_threshold = estimate_threshold
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if self.estimate_threshold is not None and not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.estimate_threshold:
+                return estimate
+        return super().count
+
+
+def facet_cache_key(model, field_path):
+    return f'admin-facets:{model._meta.label_lower}:{field_path}'
+
+
+def cached_facet(model, field_path, choices):
+    """
+    Returns the choices for a list filter from the cache, calling
+    choices() to list them again every ADMIN_FACET_TIMEOUT seconds.
+    """
+    return cache.get_or_set(
+        facet_cache_key(model, field_path),
+        lambda: list(choices()),
+        getattr(settings, 'ADMIN_FACET_TIMEOUT', 60 * 5))
+
+
+class CachedAllValuesFieldListFilter(AllValuesFieldListFilter):
+    """
+    Lists the distinct values of a field from the cache, instead of
+    a DISTINCT scan on every changelist load.
+    """
+
+    def __init__(self, field, request, params, model, model_admin,
+                 field_path):
+        super().__init__(
+            field, request, params, model, model_admin, field_path)
+        # The parent leaves lookup_choices as an unevaluated queryset.
+        queryset = self.lookup_choices
+        self.lookup_choices = cached_facet(
+            model, field_path, lambda: queryset)
+
+
+class CachedRelatedFieldListFilter(RelatedFieldListFilter):
+    """
+    Lists the related objects to filter by from the cache.
+    """
+
+    def field_choices(self, field, request, model_admin):
+        field_choices = super().field_choices
+        return cached_facet(
+            model_admin.model, self.field_path,
+            lambda: field_choices(field, request, model_admin))
+
+
+class LargeTableAdminMixin:
+    """
+    For changelists of tables too big to count or scan on every load.
+    The result count comes from the planner's estimate above
+    estimate_threshold rows, the second count of the whole table is
+    skipped, and the choices of list filters on plain and related
+    fields are cached. Cached choices can be up to ADMIN_FACET_TIMEOUT
+    seconds old.
+    """
+    show_full_result_count = False
+    estimate_threshold = None
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        threshold = self.estimate_threshold
+        if threshold is None:
+            threshold = getattr(
+                settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000)
+        return EstimatedCountPaginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            estimate_threshold=threshold)
+
+    def get_list_filter(self, request):
+        list_filter = []
+        for list_filter_item in super().get_list_filter(request):
+            if isinstance(list_filter_item, str):
+                field = get_fields_from_path(
+                    self.model, list_filter_item)[-1]
+                if field.is_relation:
+                    list_filter_item = (
+                        list_filter_item, CachedRelatedFieldListFilter)
+                elif not field.choices and field.get_internal_type() in (
+                        'CharField', 'TextField', 'IntegerField'):
+                    list_filter_item = (
+                        list_filter_item, CachedAllValuesFieldListFilter)
+            list_filter.append(list_filter_item)
+        return list_filter
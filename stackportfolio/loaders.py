@@ -0,0 +1,67 @@
+from django.db.models import OuterRef, Prefetch, Subquery
+from project.models import Project, ProjectTechLink
+from job_post.models import JobPost, JobPostTechLink
+from custom_account.models import CustomUser, TechUserProfileTechLink
+
+
+# Cards only show the first few tech on each project, job post
+# or profile.
+CARD_TECH_LIMIT = 10
+
+
+def card_tech_prefetch(lookup, link_model, row_field, limit=CARD_TECH_LIMIT):
+    """
+    Prefetches the links to up to `limit` tech per row, with their
+    tech, into `card_tech_links`.
+
+    Django 3.2 can't slice a Prefetch queryset, so the limit is applied
+    with a subquery picking the first links of the same row.
+    """
+    first_links = link_model.objects.filter(
+        **{row_field: OuterRef(row_field)}).order_by('pk').values('pk')
+    queryset = link_model.objects.filter(
+        pk__in=Subquery(first_links[:limit])
+    ).select_related('tech').order_by('pk')
+    return Prefetch(lookup, queryset=queryset, to_attr='card_tech_links')
+
+
+def project_cards(queryset):
+    """
+    Loads everything snippets/card.html needs for a project.
+    """
+    return queryset.select_related('user').prefetch_related(
+        card_tech_prefetch('tech_links', ProjectTechLink, 'project'))
+
+
+def job_post_cards(queryset):
+    """
+    Loads everything snippets/card.html needs for a job post.
+    """
+    return queryset.select_related('user').prefetch_related(
+        card_tech_prefetch('tech_links', JobPostTechLink, 'jobpost'),
+        Prefetch(
+            'work_location_type', to_attr='card_work_location_types'))
+
+
+def profile_cards(queryset):
+    """
+    Loads everything snippets/profile-card.html needs for a user.
+    """
+    return queryset.select_related('tech_profile').prefetch_related(
+        card_tech_prefetch(
+            'tech_profile__tech_links', TechUserProfileTechLink,
+            'techuserprofile'))
+
+
+CARD_LOADERS = {
+    Project: project_cards,
+    JobPost: job_post_cards,
+    CustomUser: profile_cards,
+}
+
+
+def load_cards(queryset):
+    """
+    Applies the card loader for the queryset's model.
+    """
+    return CARD_LOADERS[queryset.model](queryset)
@@ -0,0 +1,73 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.test import Client
+from stackportfolio.db_connections import db_metrics
+
+
+class Command(BaseCommand):
+    """
+    Requests a page repeatedly through the full middleware stack,
+    first opening a new database connection for every request and
+    then reusing a persistent one, and shows the latency of each.
+    Connections are closed between requests the way the WSGI handler
+    closes them, so the difference is the cost of connecting.
+    """
+    help = ('Compare request latency with and without persistent '
+            'database connections.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Number of requests in each run.')
+        parser.add_argument(
+            '--path', default='/api/v1/projects/',
+            help='Page to request. Pages served from the page cache '
+                 "don't touch the database.")
+
+    def handle(self, *args, **options):
+        max_ages = {
+            conn.alias: conn.settings_dict['CONN_MAX_AGE']
+            for conn in connections.all()}
+        runs = [
+            ('New connection per request', 0),
+            ('Persistent connection', None),
+        ]
+        try:
+            for label, max_age in runs:
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                self.run(max_age, options['requests'], options['path'])
+        finally:
+            for conn in connections.all():
+                conn.close()
+                conn.settings_dict['CONN_MAX_AGE'] = max_ages[conn.alias]
+
+    def run(self, max_age, requests, path):
+        for conn in connections.all():
+            conn.close()
+            conn.settings_dict['CONN_MAX_AGE'] = max_age
+        db_metrics.reset()
+
+        client = Client(HTTP_HOST='localhost')
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            close_old_connections()
+            response = client.get(path)
+            close_old_connections()
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                self.stderr.write(
+                    f'{path} returned {response.status_code}')
+                return
+
+        timings.sort()
+        metrics = db_metrics.get()
+        self.stdout.write(
+            f'mean {statistics.mean(timings):.2f}ms, '
+            f'median {statistics.median(timings):.2f}ms, '
+            f'p95 {timings[int((len(timings) - 1) * 0.95)]:.2f}ms')
+        self.stdout.write(
+            f'{metrics["opened"]} connections opened, '
+            f'{metrics["reused"]} reused')
@@ -0,0 +1,267 @@
+import hashlib
+import time
+from contextvars import ContextVar
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response, patch_cache_control
+from .conditional import has_pending_messages
+
+
+# Each tag has a version in the cache, and a cached page records the
+# versions of the tags it was rendered with. Bumping a tag's version
+# makes every page with that tag a miss, so changes are never served
+# from the cache, even in the stale window.
+def tag_version_key(tag):
+    return f'page-tag:{tag}'
+
+
+def page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{path}'
+
+
+def object_tag(label, pk):
+    return f'{label}:{pk}'
+
+
+def instance_tag(instance):
+    return object_tag(instance._meta.label_lower, instance.pk)
+
+
+def collection_tag(model):
+    """
+    The tag for pages listing a model, bumped when rows are added to
+    or removed from the lists.
+    """
+    return model._meta.label_lower
+
+
+def user_tag(user_id):
+    return object_tag('custom_account.customuser', user_id)
+
+
+def tech_tag(tech_id):
+    return object_tag('technology.tech', tech_id)
+
+
+def set_tag_versions(tags):
+    version = str(time.time_ns())
+    cache.set_many({tag_version_key(tag): version for tag in tags}, None)
+
+
+def bump_page_tags(*tags):
+    """
+    Invalidates the cached pages with any of the tags, now and again
+    when the transaction commits, so a page rendered from the old rows
+    in between isn't kept.
+    """
+    if not tags:
+        return
+    set_tag_versions(tags)
+    transaction.on_commit(lambda: set_tag_versions(tags))
+
+
+def remember_listing(instance):
+    """
+    Notes whether a project or job post being saved was on the public
+    lists before the save, for bump_post_pages().
+    """
+    if instance._state.adding:
+        instance._page_cache_was_listed = False
+    else:
+        instance._page_cache_was_listed = type(instance).objects.filter(
+            pk=instance.pk, active=True).exists()
+
+
+def bump_post_pages(instance, created=False, deleted=False):
+    """
+    Invalidates the pages showing a project or job post. The lists are
+    only invalidated when it joins or leaves them, as a change to a
+    listed post is covered by its own tag.
+    """
+    tags = [instance_tag(instance)]
+    was_listed = getattr(instance, '_page_cache_was_listed', True)
+    if created or deleted or was_listed != instance.active:
+        tags.append(collection_tag(type(instance)))
+    bump_page_tags(*tags)
+
+
+def bump_listing_pages(model, pks):
+    """
+    Invalidates the pages showing many projects or job posts, and the
+    lists, after a bulk update that moved them on or off the lists.
+    """
+    label = model._meta.label_lower
+    bump_page_tags(
+        collection_tag(model), *(object_tag(label, pk) for pk in pks))
+
+
+class PageRecord:
+    """
+    What the page being rendered depends on, collected from the views
+    and templates as it renders.
+    """
+
+    def __init__(self):
+        self.tags = set()
+        self.views = set()
+
+
+current_page = ContextVar('current_page', default=None)
+
+
+def add_page_tags(*tags):
+    """
+    Tags the page being rendered, if it is going to be cached.
+    """
+    page = current_page.get()
+    if page is not None:
+        page.tags.update(tags)
+
+
+def add_post_tags(post):
+    """
+    Tags the page with a project or job post, its owner and its tech.
+    """
+    add_page_tags(
+        instance_tag(post),
+        user_tag(post.user_id),
+        *(tech_tag(link.tech_id)
+          for link in getattr(post, 'card_tech_links', ())))
+
+
+def add_page_view(instance):
+    """
+    Records that the page counts a view of the instance, so the view
+    is still counted when the page is served from the cache.
+    """
+    page = current_page.get()
+    if page is not None:
+        page.views.add((instance._meta.label_lower, instance.pk))
+
+
+def cached_url_names():
+    return getattr(settings, 'PAGE_CACHE_URL_NAMES', ())
+
+
+class PageCacheMiddleware:
+    """
+    Serves anonymous GETs of the public pages from the shared cache,
+    keyed on the path and query string.
+
+    A page is fresh for PAGE_CACHE_TIMEOUT seconds. For the
+    PAGE_CACHE_STALE seconds after that, one request renders it again
+    while the others are served the stale copy. A page whose tags
+    have been bumped since it was cached is always rendered again.
+
+    Pages that set a cookie, use a CSRF token or show a message are
+    never cached.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def is_cacheable_request(self, request):
+        if not getattr(settings, 'PAGE_CACHE_ENABLED', True):
+            return False
+        if request.method != 'GET':
+            return False
+        if request.user.is_authenticated:
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        if match.view_name not in cached_url_names():
+            return False
+        return not has_pending_messages(request)
+
+    def is_cacheable_response(self, request, response):
+        return (response.status_code == 200 and
+                not response.streaming and
+                not response.cookies and
+                not request.META.get('CSRF_COOKIE_USED') and
+                'private' not in response.get('Cache-Control', ''))
+
+    def __call__(self, request):
+        if not self.is_cacheable_request(request):
+            return self.get_response(request)
+
+        key = page_key(request)
+        entry = cache.get(key)
+        if entry is not None and self.tags_are_current(entry):
+            if entry['expires'] > time.time():
+                return self.serve(request, entry, 'hit')
+            if not cache.add(f'{key}:lock', True, self.lock_timeout()):
+                return self.serve(request, entry, 'stale')
+
+        # A tag bumped while the page renders may have been read from
+        # the old rows, so the page is only stored if none moved since.
+        started = time.time_ns()
+        page = PageRecord()
+        token = current_page.set(page)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_page.reset(token)
+
+        if self.is_cacheable_response(request, response):
+            self.store(key, response, page, started)
+            response['X-Page-Cache'] = 'miss'
+        cache.delete(f'{key}:lock')
+        return response
+
+    def lock_timeout(self):
+        return getattr(settings, 'PAGE_CACHE_STALE', 30)
+
+    def tags_are_current(self, entry):
+        versions = cache.get_many(
+            [tag_version_key(tag) for tag in entry['tags']])
+        return all(
+            versions.get(tag_version_key(tag)) == version
+            for tag, version in entry['tags'].items())
+
+    def store(self, key, response, page, started):
+        timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 60)
+        stale = getattr(settings, 'PAGE_CACHE_STALE', 30)
+        patch_cache_control(response, stale_while_revalidate=stale)
+
+        versions = cache.get_many(
+            [tag_version_key(tag) for tag in page.tags])
+        if any(int(version) >= started for version in versions.values()):
+            return
+        cache.set(key, {
+            'content': response.content,
+            'status': response.status_code,
+            'headers': list(response.items()),
+            'tags': {tag: versions.get(tag_version_key(tag))
+                     for tag in page.tags},
+            'views': sorted(page.views),
+            'expires': time.time() + timeout,
+        }, timeout + stale)
+
+    def serve(self, request, entry, status):
+        from .view_counts import record_view
+
+        # Only the pk is needed to count a view.
+        for label, pk in entry['views']:
+            record_view(request, apps.get_model(label)(pk=pk))
+
+        headers = dict(entry['headers'])
+        response = get_conditional_response(
+            request, etag=headers.get('ETag'))
+        if response is None:
+            response = HttpResponse(
+                entry['content'], status=entry['status'])
+            for header, value in entry['headers']:
+                response[header] = value
+        else:
+            for header in ('ETag', 'Cache-Control', 'Vary'):
+                if header in headers:
+                    response[header] = headers[header]
+        response['X-Page-Cache'] = status
+        return response
@@ -0,0 +1,230 @@
+import base64
+import binascii
+import datetime
+import json
+from collections.abc import Sequence
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Keeps the microseconds DjangoJSONEncoder drops from datetimes,
+    as a cursor has to match the stored value exactly.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(direction, position):
+    """
+    Packs a direction and a row position into an opaque url-safe
+    token.
+    """
+    data = json.dumps([direction, *position], cls=CursorEncoder)
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Unpacks a token made by encode_cursor into its direction and
+    row position.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, *position = json.loads(
+            base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursor('That page contains no results')
+    if direction not in ('next', 'previous') or len(position) != 2:
+        raise InvalidCursor('That page contains no results')
+    return direction, position
+
+
+class CursorPage(Sequence):
+    """
+    A page of results with tokens for the pages either side of it.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.first_url = None
+        self.next_url = None
+        self.previous_url = None
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} results>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginates a queryset newest first on (field, pk) by filtering on
+    the position of the last row seen, instead of an OFFSET, so every
+    page costs the same. With field set to None rows are paginated on
+    pk alone.
+
+    The total is only counted when with_count is set, since that is
+    a query over every matching row.
+    """
+    is_cursor = True
+
+    def __init__(self, queryset, per_page, field='date_created',
+                 with_count=False):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.field = field
+        self.with_count = with_count
+
+    @cached_property
+    def count(self):
+        return self.queryset.count()
+
+    def ordering(self, reverse):
+        """
+        Newest first, or oldest first when paging backwards. Rows
+        without a value in field sort as the newest, matching the
+        default order of a descending index on PostgreSQL.
+        """
+        if self.field is None:
+            return ['pk' if reverse else '-pk']
+        if reverse:
+            return [F(self.field).asc(nulls_last=True), 'pk']
+        return [F(self.field).desc(nulls_first=True), '-pk']
+
+    def position(self, obj):
+        """
+        Returns the field value and pk of a row, which is a model
+        instance or a dict from values() including field and pk.
+        """
+        if isinstance(obj, dict):
+            return [obj[self.field] if self.field else None, obj['pk']]
+        value = getattr(obj, self.field) if self.field else None
+        return [value, obj.pk]
+
+    def after(self, position, reverse):
+        """
+        Returns the filter for the rows after a position in the
+        page order. The field is bounded on its own as well as with
+        the pk, so the database can start the index scan at the
+        position.
+        """
+        value, pk = position
+        if self.field is None:
+            return Q(pk__gt=pk) if reverse else Q(pk__lt=pk)
+
+        field = self.field
+        if value is None:
+            if reverse:
+                return Q(**{f'{field}__isnull': True, 'pk__gt': pk})
+            return (Q(**{f'{field}__isnull': True, 'pk__lt': pk}) |
+                    Q(**{f'{field}__isnull': False}))
+
+        if reverse:
+            return Q(**{f'{field}__isnull': True}) | (
+                Q(**{f'{field}__gte': value}) &
+                (Q(**{f'{field}__gt': value}) | Q(pk__gt=pk)))
+        return Q(**{f'{field}__lte': value}) & (
+            Q(**{f'{field}__lt': value}) | Q(pk__lt=pk))
+
+    def page(self, cursor=None):
+        """
+        Returns the page a cursor points to, or the first page.
+        """
+        direction, position = 'next', None
+        if cursor:
+            direction, position = decode_cursor(cursor)
+        reverse = direction == 'previous'
+
+        queryset = self.queryset.order_by(*self.ordering(reverse))
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.after(position, reverse))
+            except (ValidationError, ValueError, TypeError):
+                raise InvalidCursor('That page contains no results')
+
+        # One extra row shows whether there is a page beyond this one.
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor('next', self.position(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor(
+                'previous', self.position(rows[0]))
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+class CursorPaginationMixin:
+    """
+    Replaces a ListView's offset pagination with a CursorPaginator.
+    The page is picked by the cursor query parameter and the page
+    has next_url and previous_url for the pagination snippet.
+    """
+    cursor_field = 'date_created'
+    cursor_param = 'cursor'
+    paginate_with_count = False
+
+    def get_cursor_field(self, queryset):
+        return self.cursor_field
+
+    def cursor_url(self, cursor=None):
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        params.pop(self.cursor_param, None)
+        if cursor:
+            params[self.cursor_param] = cursor
+        return f'?{params.urlencode()}'
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(
+            queryset, page_size,
+            field=self.get_cursor_field(queryset),
+            with_count=self.paginate_with_count)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_param))
+        except InvalidCursor as e:
+            raise Http404(str(e))
+
+        if page.has_next():
+            page.next_url = self.cursor_url(page.next_cursor)
+        if page.has_previous():
+            page.first_url = self.cursor_url()
+            page.previous_url = self.cursor_url(page.previous_cursor)
+        return (paginator, page, page.object_list, page.has_other_pages())
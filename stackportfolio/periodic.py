@@ -0,0 +1,75 @@
+import logging
+import threading
+from django.db import connections
+
+logger = logging.getLogger('stackportfolio.periodic')
+
+
+class PeriodicTask:
+    """
+    Runs a function every interval seconds on a daemon thread, for
+    background work in the web process that mustn't wait for a
+    request to come along.
+    """
+
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.run_once()
+
+    def run_once(self):
+        try:
+            self.func()
+        except Exception:
+            logger.exception('Periodic task %s failed', self.name)
+        finally:
+            # Each thread has its own connections, which would
+            # otherwise be held open between runs.
+            connections.close_all()
+
+
+periodic_tasks = {}
+periodic_tasks_lock = threading.Lock()
+
+
+def start_periodic_task(name, interval, func):
+    """
+    Starts the task unless one with the same name is running in this
+    process already. A falsy interval disables the task.
+    """
+    if not interval:
+        return None
+    with periodic_tasks_lock:
+        if name not in periodic_tasks:
+            task = PeriodicTask(name, interval, func)
+            task.start()
+            periodic_tasks[name] = task
+        return periodic_tasks[name]
+
+
+def start_background_tasks():
+    """
+    Starts the periodic tasks of the web process. Called from the WSGI
+    module, so they don't run in tests or management commands.
+    """
+    # Imported here as the apps aren't loaded when this module is.
+    from image_queue.deletions import start_deletion_drain
+    from image_queue.queue import start_upload_sweeper
+    from .view_counts import start_view_count_flusher
+    start_upload_sweeper()
+    start_deletion_drain()
+    start_view_count_flusher()
@@ -0,0 +1,212 @@
+import bisect
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger('stackportfolio.requests')
+
+
+class Histogram:
+    """
+    Counts values into fixed buckets, so percentiles can be estimated
+    in constant memory. Each percentile is the upper bound of the
+    bucket it falls in.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def percentile(self, fraction):
+        if not self.total:
+            return None
+        rank = fraction * self.total
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def summary(self):
+        return {
+            'mean': self.sum / self.total if self.total else None,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'buckets': dict(zip(
+                [str(bound) for bound in self.bounds] + ['inf'],
+                self.counts)),
+        }
+
+
+MILLISECOND_BOUNDS = [
+    1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+QUERY_BOUNDS = [0, 1, 2, 3, 5, 10, 20, 50, 100, 200]
+BYTE_BOUNDS = [
+    1024, 4 * 1024, 16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024,
+    4 * 1024 * 1024]
+
+
+class ViewMetrics:
+    """
+    Histograms of the sampled requests to one view.
+    """
+
+    def __init__(self):
+        self.histograms = {
+            'latency_ms': Histogram(MILLISECOND_BOUNDS),
+            'queries': Histogram(QUERY_BOUNDS),
+            'db_ms': Histogram(MILLISECOND_BOUNDS),
+            'template_ms': Histogram(MILLISECOND_BOUNDS),
+            'response_bytes': Histogram(BYTE_BOUNDS),
+        }
+
+    def add(self, sample):
+        for name, histogram in self.histograms.items():
+            if sample.get(name) is not None:
+                histogram.add(sample[name])
+
+    def summary(self):
+        summary = {
+            name: histogram.summary()
+            for name, histogram in self.histograms.items()}
+        summary['requests'] = self.histograms['latency_ms'].total
+        return summary
+
+
+class RequestMetrics:
+    """
+    The sampled request metrics for each view in this process.
+    """
+
+    def __init__(self):
+        self.views = {}
+        self.lock = threading.Lock()
+
+    def add(self, view_name, sample):
+        with self.lock:
+            self.views.setdefault(view_name, ViewMetrics()).add(sample)
+
+    def summary(self):
+        with self.lock:
+            return {
+                view_name: metrics.summary()
+                for view_name, metrics in sorted(self.views.items())}
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+class QueryTimer:
+    """
+    A database execute wrapper that counts queries and their time.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.time += time.perf_counter() - started
+
+
+class RequestMetricsMiddleware:
+    """
+    Records the latency, query count, database time, template time
+    and response size of a sample of requests, per view. Unsampled
+    requests only cost a call to random(), so REQUEST_METRICS_SAMPLE_RATE
+    keeps the overhead as low as needed.
+
+    Template time is only measured for TemplateResponses, which are
+    rendered after the view returns, and excludes the queries run
+    while rendering. This goes first in MIDDLEWARE, so the latency
+    covers the other middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 0.01)
+        if not sample_rate or random.random() >= sample_rate:
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        request.metrics_timer = timer
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(timer))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        sample = {
+            'latency_ms': elapsed * 1000,
+            'queries': timer.count,
+            'db_ms': timer.time * 1000,
+            'template_ms': getattr(request, 'metrics_template_time', None),
+            'response_bytes': (
+                None if response.streaming else len(response.content)),
+        }
+        view_name = self.view_name(request)
+        request_metrics.add(view_name, sample)
+        logger.info(json.dumps({
+            'view': view_name,
+            'method': request.method,
+            'status': response.status_code,
+            **{name: round(value, 2) if isinstance(value, float) else value
+               for name, value in sample.items()},
+        }))
+        return response
+
+    def process_template_response(self, request, response):
+        timer = getattr(request, 'metrics_timer', None)
+        if timer is None:
+            return response
+
+        started = time.perf_counter()
+        db_time = timer.time
+
+        def record_template_time(response):
+            rendering = time.perf_counter() - started
+            request.metrics_template_time = (
+                rendering - (timer.time - db_time)) * 1000
+
+        response.add_post_render_callback(record_template_time)
+        return response
+
+    def view_name(self, request):
+        """
+        The url name of the view, which is resolved here for requests
+        answered before reaching a view, such as page cache hits.
+        """
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                return '<unresolved>'
+        return match.view_name
@@ -12,8 +12,11 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
+import tempfile
 import dj_database_url
 from django.contrib.messages import constants as messages
+from stackportfolio.caches import cache_from_url, cache_is_shared
 
 if os.path.isfile('env.py'):
     import env
@@ -66,6 +69,9 @@ INSTALLED_APPS = [
     'job_post',
     'work_location_type',
     'search_and_filter',
+    'image_queue',
+    'api',
+    'stackportfolio',
 ]
 
 AUTHENTICATION_BACKENDS = [
@@ -79,6 +85,8 @@ LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
 MIDDLEWARE = [
+    'stackportfolio.request_metrics.RequestMetricsMiddleware',
+    'stackportfolio.db_connections.DatabaseConnectionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -88,6 +96,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'stackportfolio.page_cache.PageCacheMiddleware',
 ]
 
 GRAPH_MODELS = {
@@ -119,6 +128,21 @@ WSGI_APPLICATION = 'stackportfolio.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Each worker keeps its database connection open for DB_CONN_MAX_AGE
+# seconds instead of connecting for every request. A connection idle
+# for DB_HEALTH_CHECK_AFTER seconds is checked before it is reused, so
+# one the server has dropped is replaced rather than failing the
+# request. With DB_POOL set, the threads of a worker share up to
+# DB_POOL_SIZE connections, waiting up to DB_POOL_TIMEOUT seconds for
+# a free one, and pooled connections idle for DB_HEALTH_CHECK_AFTER
+# seconds are checked as they are taken from the pool.
+
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+DB_HEALTH_CHECK_AFTER = int(os.environ.get('DB_HEALTH_CHECK_AFTER', 30))
+DB_POOL = os.environ.get('DB_POOL', 'False') == 'True'
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 5))
+
 if os.path.isfile('env.py'):
     DATABASES = {
         'default': {
@@ -128,8 +152,56 @@ if os.path.isfile('env.py'):
     }
 else:
     DATABASES = {
-        'default': dj_database_url.parse(os.environ.get("DATABASE_URL"))
+        'default': dj_database_url.parse(
+            os.environ.get("DATABASE_URL"), conn_max_age=DB_CONN_MAX_AGE)
     }
+    if DB_POOL:
+        DATABASES['default'].update({
+            'ENGINE': 'stackportfolio.db_pool',
+            'CONN_MAX_AGE': 0,
+            'POOL': {
+                'MAX_SIZE': DB_POOL_SIZE,
+                'TIMEOUT': DB_POOL_TIMEOUT,
+                'HEALTH_CHECK_AFTER': DB_HEALTH_CHECK_AFTER,
+            },
+        })
+
+# Cache
+# CACHE_URL picks the cache shared by the workers, e.g.
+# memcached://host:11211, redis://host:6379/0 (needs django-redis) or
+# file:///var/tmp/stackportfolio. Without one the workers share a file
+# cache in the temp directory, or the fake:// stand-in for a shared
+# cache when running locally or testing. Every key is prefixed with
+# CACHE_KEY_PREFIX and CACHE_VERSION, so bumping the version drops
+# everything cached.
+#
+# The card, page and tech catalogue caches are invalidated by bumping
+# versions in this cache, which other workers only see if it's shared.
+# CACHE_IS_SHARED is False for per-process caches like locmem://.
+
+TESTING = sys.argv[1:2] == ['test']
+
+if TESTING or os.path.isfile('env.py'):
+    DEFAULT_CACHE_URL = 'fake://'
+else:
+    DEFAULT_CACHE_URL = 'file://' + os.path.join(
+        tempfile.gettempdir(), 'stackportfolio-cache')
+
+CACHES = {
+    'default': cache_from_url(
+        os.environ.get('CACHE_URL', DEFAULT_CACHE_URL),
+        key_prefix=os.environ.get('CACHE_KEY_PREFIX', 'stackportfolio'),
+        version=int(os.environ.get('CACHE_VERSION', 1))),
+}
+CACHE_IS_SHARED = cache_is_shared(CACHES['default'])
+
+# Rendered project and job post cards are cached for CARD_CACHE_TIMEOUT
+# seconds. They're dropped by bumping versions, so they're only cached
+# by default when the cache is shared.
+
+CARD_CACHE_ENABLED = os.environ.get(
+    'CARD_CACHE_ENABLED', str(CACHE_IS_SHARED)) == 'True'
+CARD_CACHE_TIMEOUT = int(os.environ.get('CARD_CACHE_TIMEOUT', 60 * 60 * 24))
 
 
 # Password validation
@@ -183,6 +255,149 @@ SOCIALACCOUNT_PROVIDERS = {
     }
 }
 
+# Search
+# The PostgreSQL backend falls back to the in-process index on
+# other databases. SEARCH_BACKEND can also be set to
+# 'search_and_filter.backends.InvertedIndexSearchBackend' or
+# 'search_and_filter.backends.ORMSearchBackend'. The in-process
+# index is rebuilt after SEARCH_INDEX_MAX_AGE seconds so changes
+# made by other workers are picked up.
+
+SEARCH_BACKEND = os.environ.get(
+    'SEARCH_BACKEND',
+    'search_and_filter.backends.PostgresSearchBackend')
+SEARCH_INDEX_MAX_AGE = int(os.environ.get('SEARCH_INDEX_MAX_AGE', 300))
+SEARCH_CONFIG = 'english'
+TECH_INDEX_MAX_AGE = int(os.environ.get('TECH_INDEX_MAX_AGE', 300))
+
+# Tech filters matching up to TECH_FILTER_MAX_IDS rows look the rows up
+# by id from the tech index. Larger matches are filtered by the
+# database, to keep the number of query parameters down.
+
+TECH_FILTER_MAX_IDS = 500
+
+# Each worker keeps a copy of the tech catalogue and checks the shared
+# cache for a newer version at most every TECH_CATALOGUE_CHECK_INTERVAL
+# seconds. Changes made in the same worker are seen straight away.
+# The copy is loaded from the database again after
+# TECH_CATALOGUE_MAX_AGE seconds, for caches the workers don't share.
+
+TECH_CATALOGUE_CHECK_INTERVAL = int(
+    os.environ.get('TECH_CATALOGUE_CHECK_INTERVAL', 5))
+TECH_CATALOGUE_MAX_AGE = int(os.environ.get('TECH_CATALOGUE_MAX_AGE', 300))
+TECH_CATALOGUE_TIMEOUT = 60 * 60
+
+# Browsers and proxies can reuse tech suggestions for
+# TECH_SUGGEST_MAX_AGE seconds.
+
+TECH_SUGGEST_MAX_AGE = 60
+
+# The JSON API under /api/v1/ returns API_PAGE_SIZE rows a page by
+# default, and at most API_MAX_PAGE_SIZE.
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# Project, job post and profile pages answer conditional GETs with
+# 304s. RELEASE_VERSION is part of every ETag, so a deploy doesn't
+# leave clients with pages from the old templates. Anonymous pages
+# can be kept by a CDN for PUBLIC_PAGE_MAX_AGE seconds.
+
+RELEASE_VERSION = os.environ.get('HEROKU_RELEASE_VERSION', '')
+PUBLIC_PAGE_MAX_AGE = int(os.environ.get('PUBLIC_PAGE_MAX_AGE', 60))
+
+# Anonymous GETs of these pages are served from the cache. A page is
+# fresh for PAGE_CACHE_TIMEOUT seconds, then served stale for up to
+# PAGE_CACHE_STALE seconds while one request renders it again. Pages
+# are dropped as soon as a project, job post, user or tech on them
+# changes. The bumps are only seen by every worker on a shared cache,
+# so it's off by default otherwise.
+
+PAGE_CACHE_ENABLED = os.environ.get(
+    'PAGE_CACHE_ENABLED', str(CACHE_IS_SHARED)) == 'True'
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 60))
+PAGE_CACHE_STALE = int(os.environ.get('PAGE_CACHE_STALE', 30))
+PAGE_CACHE_URL_NAMES = [
+    'homepage',
+    'careers',
+    'about',
+    'view_all_projects',
+    'view_all_job_posts',
+    'project:view_project',
+    'job_post:view_job_post',
+]
+
+# View counts are buffered in each worker and written by a background
+# thread every VIEW_COUNT_FLUSH_INTERVAL seconds. Repeat views from the same
+# visitor within VIEW_COUNT_DEDUPE_TIMEOUT seconds aren't counted.
+
+VIEW_COUNT_FLUSH_INTERVAL = int(
+    os.environ.get('VIEW_COUNT_FLUSH_INTERVAL', 60))
+VIEW_COUNT_DEDUPE_TIMEOUT = 60 * 30
+
+# Images are uploaded to Cloudinary off the request path.
+# IMAGE_UPLOAD_MODE is 'thread' to upload on a thread pool in the web
+# process, 'worker' to leave uploads for the process_image_uploads
+# command, or 'sync' to upload during the request. In thread mode each
+# web worker also sweeps up uploads left behind by a restart every
+# IMAGE_UPLOAD_SWEEP_INTERVAL seconds, and retries failed deletions
+# of replaced images every IMAGE_DELETE_DRAIN_INTERVAL seconds. In
+# worker mode the process_image_uploads and process_image_deletions
+# commands need to run instead.
+
+IMAGE_UPLOAD_MODE = os.environ.get('IMAGE_UPLOAD_MODE', 'thread')
+IMAGE_UPLOADER = os.environ.get(
+    'IMAGE_UPLOADER', 'image_queue.uploaders.CloudinaryUploader')
+IMAGE_UPLOAD_ROOT = os.environ.get(
+    'IMAGE_UPLOAD_ROOT', BASE_DIR / 'upload_queue')
+IMAGE_UPLOAD_THREADS = 2
+IMAGE_UPLOAD_MAX_ATTEMPTS = 3
+IMAGE_UPLOAD_SWEEP_INTERVAL = 60
+IMAGE_DELETE_DRAIN_INTERVAL = 60 * 5
+
+# The homepage features projects from a random pool of
+# FEATURED_POOL_SIZE ids, rotated every FEATURED_POOL_TIMEOUT seconds
+# or by the refresh_featured_projects command. One request rebuilds a
+# pool that's due, and the others keep serving the old one.
+
+FEATURED_POOL_SIZE = 60
+FEATURED_POOL_TIMEOUT = 60 * 10
+
+# The project and job post changelists show the planner's estimate
+# of the number of rows once a table has more than
+# ADMIN_ESTIMATED_COUNT_THRESHOLD, and cache their filter choices for
+# ADMIN_FACET_TIMEOUT seconds.
+
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(
+    os.environ.get('ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000))
+ADMIN_FACET_TIMEOUT = 60 * 5
+
+# A REQUEST_METRICS_SAMPLE_RATE share of requests have their latency,
+# queries, database and template time and response size recorded per
+# view, shown to staff at /admin/request-metrics/ and logged as a JSON
+# line to stdout. No requests are sampled under the test runner, so
+# the tests' query counts and logs don't depend on it.
+
+REQUEST_METRICS_SAMPLE_RATE = float(os.environ.get(
+    'REQUEST_METRICS_SAMPLE_RATE', 0 if TESTING else 0.01))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'stackportfolio.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 MESSAGE_TAGS = {
     messages.DEBUG: 'alert-info',
     messages.INFO: 'alert-info',
@@ -0,0 +1,380 @@
+import threading
+import time
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.core.cache import InvalidCacheKey, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from custom_account.models import CustomUser
+from .caches import cache_from_url, cache_is_shared, cache_stats
+from .db_connections import db_metrics
+from .db_pool import ConnectionPool, PoolTimeout
+from .request_metrics import Histogram, request_metrics
+
+
+FAKE_CACHES = {
+    'default': cache_from_url('fake://tests', key_prefix='test'),
+    'other': cache_from_url('fake://tests', key_prefix='test'),
+    'small': cache_from_url('fake://small?max_value_size=100'),
+}
+
+
+class CacheFromUrlTests(TestCase):
+    """
+    Tests for building cache settings from a url.
+    """
+
+    def test_cache_urls(self):
+        """
+        Test that each scheme picks its backend and location.
+        """
+        with mock.patch('stackportfolio.caches.pymemcache', mock.Mock()):
+            config = cache_from_url('memcached://a:11211,b:11211', 'site', 2)
+        self.assertEqual(config, {
+            'BACKEND': 'stackportfolio.caches.PyMemcacheCache',
+            'LOCATION': ['a:11211', 'b:11211'],
+            'KEY_PREFIX': 'site',
+            'VERSION': 2,
+        })
+        config = cache_from_url('file:///var/tmp/cache?timeout=300')
+        self.assertEqual(
+            config['BACKEND'], 'stackportfolio.caches.FileBasedCache')
+        self.assertEqual(config['LOCATION'], '/var/tmp/cache')
+        self.assertEqual(config['TIMEOUT'], 300)
+        config = cache_from_url('locmem://pages?max_entries=1000')
+        self.assertEqual(config['LOCATION'], 'pages')
+        self.assertEqual(config['OPTIONS'], {'MAX_ENTRIES': 1000})
+
+    def test_unknown_scheme_is_rejected(self):
+        """
+        Test that a url for an unsupported cache is a settings error.
+        """
+        with self.assertRaises(ImproperlyConfigured):
+            cache_from_url('mongodb://localhost')
+
+    def test_only_per_process_caches_are_not_shared(self):
+        """
+        Test that locmem caches are the ones other workers can't see.
+        """
+        self.assertFalse(cache_is_shared(cache_from_url('locmem://')))
+        self.assertTrue(cache_is_shared(cache_from_url('fake://')))
+        self.assertTrue(cache_is_shared(
+            cache_from_url('file:///var/tmp/cache')))
+
+    def test_memcached_needs_pymemcache(self):
+        """
+        Test that a memcached url without pymemcache installed is a
+        settings error, rather than an import error on first use.
+        """
+        with mock.patch('stackportfolio.caches.pymemcache', None):
+            with self.assertRaises(ImproperlyConfigured):
+                cache_from_url('memcached://localhost:11211')
+
+
+@override_settings(CACHES=FAKE_CACHES)
+class SharedLimitsLocMemCacheTests(TestCase):
+    """
+    Tests for the in-process stand-in for a shared cache.
+    """
+
+    def setUp(self):
+        for alias in FAKE_CACHES:
+            caches[alias].clear()
+        cache_stats.reset()
+
+    def test_caches_at_one_location_share_keys(self):
+        """
+        Test that two caches pointing at the same location see each
+        other's keys, like two workers on one server.
+        """
+        caches['default'].set('key', 'value')
+        self.assertEqual(caches['other'].get('key'), 'value')
+
+    def test_keys_memcached_would_reject_raise(self):
+        """
+        Test that keys with spaces or over 250 characters raise.
+        """
+        with self.assertRaises(InvalidCacheKey):
+            caches['default'].set('job post', 1)
+        with self.assertRaises(InvalidCacheKey):
+            caches['default'].get('x' * 250)
+
+    def test_values_over_the_size_limit_are_not_stored(self):
+        """
+        Test that a value too big for the server is dropped, and
+        replaces the value stored before.
+        """
+        small = caches['small']
+        small.set('key', 'value')
+        small.set('key', 'x' * 200)
+        self.assertIsNone(small.get('key'))
+
+    def test_stats_count_each_key_once(self):
+        """
+        Test that hits, misses, sets and deletes are counted once per
+        key, including through get_many() and set_many().
+        """
+        fake = caches['default']
+        fake.set_many({'a': 1, 'b': 2})
+        fake.get_many(['a', 'b', 'c'])
+        fake.get('a')
+        fake.get('c')
+        fake.delete('a')
+        self.assertEqual(fake.stats, {
+            'hits': 3,
+            'misses': 2,
+            'sets': 2,
+            'deletes': 1,
+            'hit_rate': 0.6,
+        })
+
+
+class CacheStatsViewTests(TestCase):
+    """
+    Tests for the cache stats page.
+    """
+
+    def test_cache_stats_are_shown_to_staff(self):
+        """
+        Test that staff see the default cache and others are sent to
+        the admin login.
+        """
+        response = self.client.get('/admin/cache-stats/')
+        self.assertEqual(response.status_code, 302)
+
+        user = CustomUser.objects.create_superuser(
+            email='staff@example.com',
+            username='staffuser',
+            password='password',
+        )
+        self.client.force_login(user)
+        response = self.client.get('/admin/cache-stats/')
+        self.assertContains(
+            response, settings.CACHES['default']['BACKEND'])
+        self.assertContains(response, 'Hit rate')
+
+
+class FakeConnection:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(TestCase):
+    """
+    Tests for the pool of database connections shared by threads.
+    """
+
+    def setUp(self):
+        db_metrics.reset()
+
+    def test_returned_connections_are_reused(self):
+        """
+        Test that a returned connection is handed out again instead
+        of opening a new one.
+        """
+        pool = ConnectionPool(max_size=2, timeout=1)
+        first = pool.get(FakeConnection)
+        pool.put(first)
+        self.assertIs(pool.get(FakeConnection), first)
+        metrics = db_metrics.get()
+        self.assertEqual(metrics['opened'], 1)
+        self.assertEqual(metrics['reused'], 1)
+        self.assertEqual(metrics['waits'], 2)
+
+    def test_full_pool_waits_for_a_connection(self):
+        """
+        Test that a thread waits for a connection when the pool is
+        full, and gives up after the timeout.
+        """
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        first = pool.get(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.get(FakeConnection)
+
+        pool.timeout = 5
+        timer = threading.Timer(0.05, pool.put, [first])
+        timer.start()
+        self.assertIs(pool.get(FakeConnection), first)
+        timer.join()
+        self.assertGreater(db_metrics.get()['max_wait_ms'], 0)
+
+    def test_discarded_connections_free_their_place(self):
+        """
+        Test that a broken connection is closed and a new one can be
+        opened in its place.
+        """
+        pool = ConnectionPool(max_size=1, timeout=0)
+        first = pool.get(FakeConnection)
+        pool.discard(first)
+        self.assertTrue(first.closed)
+        self.assertIsNot(pool.get(FakeConnection), first)
+
+
+class HealthCheckedConnection(FakeConnection):
+    usable = True
+
+
+class PoolHealthCheckTests(TestCase):
+    """
+    Tests for checking pooled connections as they are handed out.
+    """
+
+    def setUp(self):
+        db_metrics.reset()
+        self.pool = ConnectionPool(
+            max_size=1, timeout=0, health_check_after=30,
+            is_usable=lambda connection: connection.usable)
+
+    def test_dropped_idle_connection_is_replaced(self):
+        """
+        Test that a connection idle for too long that the database has
+        dropped is closed, and a new one opened in its place.
+        """
+        first = self.pool.get(HealthCheckedConnection)
+        self.pool.put(first)
+        first.usable = False
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 60):
+            second = self.pool.get(HealthCheckedConnection)
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        metrics = db_metrics.get()
+        self.assertEqual(metrics['health_checks'], 1)
+        self.assertEqual(metrics['unusable'], 1)
+        self.assertEqual(metrics['opened'], 2)
+
+    def test_recently_returned_connection_is_not_checked(self):
+        """
+        Test that a connection returned recently is handed out again
+        without a check.
+        """
+        first = self.pool.get(HealthCheckedConnection)
+        self.pool.put(first)
+        first.usable = False
+        self.assertIs(self.pool.get(HealthCheckedConnection), first)
+        self.assertEqual(db_metrics.get()['health_checks'], 0)
+
+
+class DatabaseConnectionMiddlewareTests(TestCase):
+    """
+    Tests for health checking persistent connections.
+    """
+
+    def setUp(self):
+        db_metrics.reset()
+        connection.ensure_connection()
+
+    def tearDown(self):
+        if hasattr(connection, 'last_used'):
+            del connection.last_used
+
+    def test_idle_connection_that_was_dropped_is_closed(self):
+        """
+        Test that a connection idle for too long is checked before
+        the request, and closed if the database has dropped it.
+        """
+        connection.last_used = 0
+        with mock.patch.object(connection, 'is_usable',
+                               return_value=False), \
+                mock.patch.object(connection, 'close') as close:
+            self.client.get('/careers/')
+        close.assert_called_once()
+        metrics = db_metrics.get()
+        self.assertEqual(metrics['health_checks'], 1)
+        self.assertEqual(metrics['unusable'], 1)
+
+    def test_recently_used_connection_is_reused_unchecked(self):
+        """
+        Test that a connection used recently is reused without a
+        health check.
+        """
+        self.client.get('/careers/')
+        with mock.patch.object(connection, 'is_usable') as is_usable:
+            self.client.get('/careers/')
+        is_usable.assert_not_called()
+        self.assertEqual(db_metrics.get()['reused'], 2)
+
+
+class RequestMetricsTests(TestCase):
+    """
+    Tests for the sampled request metrics.
+    """
+
+    def setUp(self):
+        request_metrics.reset()
+
+    def test_histogram_percentiles(self):
+        """
+        Test that percentiles are the upper bound of their bucket.
+        """
+        histogram = Histogram([1, 10, 100])
+        for value in [0.5] * 90 + [50] * 9 + [500]:
+            histogram.add(value)
+        self.assertEqual(histogram.percentile(0.5), 1)
+        self.assertEqual(histogram.percentile(0.95), 100)
+        self.assertEqual(histogram.percentile(1), float('inf'))
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1,
+                       PAGE_CACHE_ENABLED=False)
+    def test_sampled_requests_are_recorded_and_logged(self):
+        """
+        Test that a sampled request records its queries, template
+        time and size against its view, and logs a JSON line.
+        """
+        with self.assertLogs('stackportfolio.requests') as logs:
+            response = self.client.get('/projects/')
+        summary = request_metrics.summary()['view_all_projects']
+        self.assertEqual(summary['requests'], 1)
+        self.assertGreater(summary['queries']['mean'], 0)
+        self.assertIsNotNone(summary['template_ms']['mean'])
+        self.assertEqual(
+            summary['response_bytes']['mean'], len(response.content))
+        self.assertIn('"view": "view_all_projects"', logs.output[0])
+
+    def test_nothing_is_sampled_under_the_test_runner(self):
+        """
+        Test that other tests' requests aren't sampled by default.
+        """
+        self.client.get('/projects/')
+        self.assertEqual(request_metrics.summary(), {})
+
+    def test_metrics_are_shown_to_staff(self):
+        """
+        Test that staff get the metrics as JSON.
+        """
+        user = CustomUser.objects.create_superuser(
+            email='staff@example.com',
+            username='staffuser',
+            password='password',
+        )
+        self.client.force_login(user)
+        request_metrics.add('careers', {'latency_ms': 12.5, 'queries': 3})
+        response = self.client.get('/admin/request-metrics/')
+        self.assertEqual(response.json()['sample_rate'], 0)
+        self.assertEqual(
+            response.json()['views']['careers']['requests'], 1)
+
+
+class BenchmarkConnectionsTests(TransactionTestCase):
+    """
+    Tests for the benchmark_connections command, which closes
+    connections so can't run inside a test transaction.
+    """
+
+    def test_benchmark_shows_latency_for_each_run(self):
+        """
+        Test that the benchmark times requests with and without
+        persistent connections and restores the connection settings.
+        """
+        max_age = connection.settings_dict['CONN_MAX_AGE']
+        out = StringIO()
+        call_command('benchmark_connections', requests=3, stdout=out)
+        output = out.getvalue()
+        self.assertIn('New connection per request', output)
+        self.assertIn('Persistent connection', output)
+        self.assertEqual(output.count('median'), 2)
+        self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], max_age)
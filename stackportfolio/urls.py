@@ -19,9 +19,22 @@ from django.views.generic import TemplateView
 from custom_account.views import IndexView
 from project.views import ProjectListView
 from job_post.views import JobPostListView
+from .views import CacheStatsView, DatabaseStatsView, RequestMetricsView
 
 
 urlpatterns = [
+    path(
+        'admin/cache-stats/',
+        CacheStatsView.as_view(),
+        name='cache_stats'),
+    path(
+        'admin/db-stats/',
+        DatabaseStatsView.as_view(),
+        name='database_stats'),
+    path(
+        'admin/request-metrics/',
+        RequestMetricsView.as_view(),
+        name='request_metrics'),
     path(
         'admin/',
         admin.site.urls),
@@ -54,6 +67,12 @@ urlpatterns = [
     path(
         'search/',
         include('search_and_filter.urls')),
+    path(
+        'api/v1/',
+        include('api.urls')),
+    path(
+        'api/tech/',
+        include('technology.urls')),
     path(
         'projects/',
         ProjectListView.as_view(),
@@ -0,0 +1,119 @@
+import atexit
+import hashlib
+import logging
+import threading
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import Case, F, IntegerField, Value, When
+from .page_cache import add_page_view
+from .periodic import start_periodic_task
+
+logger = logging.getLogger('stackportfolio.view_counts')
+
+
+class ViewCountBuffer:
+    """
+    Collects view counts in memory and writes them to the database
+    with one UPDATE per model, instead of one UPDATE per page view.
+    The web process flushes every VIEW_COUNT_FLUSH_INTERVAL seconds
+    on a background thread, and anything left is written when the
+    process exits.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def record(self, instance):
+        """
+        Counts a view of the instance.
+        """
+        with self.lock:
+            counts = self.pending.setdefault(type(instance), Counter())
+            counts[instance.pk] += 1
+
+    def flush(self):
+        """
+        Adds the buffered counts to view_count with a single UPDATE
+        per model. Counts that fail to be written are put back, to be
+        written by the next flush.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+
+        for model, counts in pending.items():
+            increments = Case(
+                *[When(pk=pk, then=Value(count))
+                  for pk, count in counts.items()],
+                default=Value(0),
+                output_field=IntegerField())
+            try:
+                model.objects.filter(pk__in=list(counts)).update(
+                    view_count=F('view_count') + increments)
+            except DatabaseError:
+                logger.exception(
+                    'Error saving %s view counts for %s rows',
+                    model._meta.label, len(counts))
+                with self.lock:
+                    self.pending.setdefault(model, Counter()).update(counts)
+
+
+view_count_buffer = ViewCountBuffer()
+
+
+def start_view_count_flusher():
+    return start_periodic_task(
+        'view-count-flusher',
+        getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 60),
+        view_count_buffer.flush)
+
+
+@atexit.register
+def flush_view_counts_on_exit():
+    """
+    Writes any buffered views when the worker shuts down. A worker
+    that is killed loses at most one flush interval of views.
+    """
+    view_count_buffer.flush()
+
+
+def viewer_key(request):
+    """
+    Identifies the viewer by session, or by IP address and user agent
+    for visitors without a session so one isn't created just to
+    count views.
+    """
+    session_key = request.session.session_key
+    if session_key:
+        return session_key
+    viewer = '{}|{}'.format(
+        request.META.get('REMOTE_ADDR', ''),
+        request.META.get('HTTP_USER_AGENT', ''))
+    return hashlib.sha1(viewer.encode()).hexdigest()
+
+
+def record_view(request, instance):
+    """
+    Counts a view of the instance, once per viewer within
+    VIEW_COUNT_DEDUPE_TIMEOUT seconds.
+    """
+    key = 'viewed:{}:{}:{}'.format(
+        instance._meta.label_lower, instance.pk, viewer_key(request))
+    timeout = getattr(settings, 'VIEW_COUNT_DEDUPE_TIMEOUT', 60 * 30)
+    if cache.add(key, True, timeout):
+        view_count_buffer.record(instance)
+
+
+class ViewCountMixin:
+    """
+    Counts a view of the detail view's object on each GET, including
+    GETs served from the page cache.
+    """
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        record_view(request, self.object)
+        add_page_view(self.object)
+        return response
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.generic import TemplateView
+from .db_connections import db_metrics
+from .request_metrics import request_metrics
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class CacheStatsView(TemplateView):
+    """
+    Shows staff how each cache is configured and how often it is hit
+    in the worker that serves the page.
+    """
+    template_name = 'admin/cache_stats.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = 'Cache stats'
+        context['caches'] = [{
+            'alias': alias,
+            'backend': config['BACKEND'],
+            'location': config.get('LOCATION', ''),
+            'key_prefix': config.get('KEY_PREFIX', ''),
+            'version': config.get('VERSION', 1),
+            'stats': getattr(caches[alias], 'stats', None),
+        } for alias, config in settings.CACHES.items()]
+        return context
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class DatabaseStatsView(TemplateView):
+    """
+    Shows staff the database connections opened and reused by the
+    worker that serves the page, and the time spent waiting for a
+    pooled connection.
+    """
+    template_name = 'admin/database_stats.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = 'Database connection stats'
+        context['databases'] = [{
+            'alias': alias,
+            'engine': config['ENGINE'],
+            'conn_max_age': config.get('CONN_MAX_AGE', 0),
+            'pool': config.get('POOL'),
+        } for alias, config in settings.DATABASES.items()]
+        context['metrics'] = db_metrics.get()
+        return context
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class RequestMetricsView(View):
+    """
+    Returns the sampled request metrics of the worker that serves the
+    request as JSON, per view.
+    """
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({
+            'sample_rate': getattr(
+                settings, 'REQUEST_METRICS_SAMPLE_RATE', 0.01),
+            'views': request_metrics.summary(),
+        })
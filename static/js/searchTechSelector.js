@@ -3,15 +3,17 @@ document.addEventListener("DOMContentLoaded", () => {
   const techInput = document.querySelector(".tech-input");
   const techDropdown = document.querySelector(".tech-dropdown");
   const techList = document.querySelector(".tech-list");
-  const techListItems = [...document.querySelectorAll("li.tech-list__item")];
   const addedTechContainer = document.querySelector(".added-tech-container"); // contain on the frontend
   const selectedTechContainer = document.getElementById("selectedTechnologies"); // input field to send tech to backend
   const form = document.querySelector("form");
   const submitButton = document.querySelector("button[type='submit']");
+  const suggestUrl = techList.dataset.suggestUrl;
   const selectedTech = [];
-  const allActiveTech = [];
+  const knownTech = new Map(); // lowercased name -> { id, name }
+  const suggestionCache = new Map(); // lowercased query -> suggestions
   let focusedListItemIndex = -1;
   let dropdownVisible = false;
+  let suggestTimeout = null;
 
   const radioButtons = document.querySelectorAll("input[type='radio']");
   for (const radioButton of radioButtons) {
@@ -40,15 +42,102 @@ document.addEventListener("DOMContentLoaded", () => {
     selectedTech.push(techName);
   });
 
-  // loop though techListItems output on DOM
-  // add item and id to the allActiveTech array
-  for (const item of techListItems) {
-    allActiveTech.push({
-      id: item.dataset.techid, // added this to the list item in the html
-      name: item.textContent.trim(),
+  /**
+   * Remembers a tech so names typed in a different case can be
+   * matched to it.
+   * @param {{id: number, name: string}} tech The tech to remember
+   * @returns {void}
+   */
+  const rememberTech = (tech) => {
+    knownTech.set(tech.name.toLowerCase(), tech);
+  };
+
+  // the selected tech is rendered with its id on the button
+  for (const button of addedTechContainer.querySelectorAll(
+    ".added-tech-button[data-techid]"
+  )) {
+    rememberTech({
+      id: button.dataset.techid,
+      name: button.querySelector("strong").textContent.trim(),
     });
   }
 
+  /**
+   * Gets the list items currently rendered in the dropdown.
+   * @returns {HTMLElement[]} The list items
+   */
+  const getListItems = () => [
+    ...techList.querySelectorAll("li.tech-list__item"),
+  ];
+
+  /**
+   * Fetches the approved tech matching a query from the suggest
+   * endpoint. Responses are kept so each query is only fetched once.
+   * @param {string} query The text typed into the tech input
+   * @returns {Promise<Array<{id: number, name: string}>>} The matches
+   */
+  const fetchSuggestions = async (query) => {
+    const key = query.toLowerCase();
+    if (suggestionCache.has(key)) return suggestionCache.get(key);
+
+    try {
+      const response = await fetch(
+        `${suggestUrl}?q=${encodeURIComponent(query)}`
+      );
+      if (!response.ok) return [];
+      const { results } = await response.json();
+      results.forEach(rememberTech);
+      suggestionCache.set(key, results);
+      return results;
+    } catch (error) {
+      return [];
+    }
+  };
+
+  /**
+   * Replaces the dropdown items with the suggestions that
+   * haven't been selected yet.
+   * @param {Array<{id: number, name: string}>} suggestions The suggestions
+   * @returns {void}
+   */
+  const renderSuggestions = (suggestions) => {
+    techList.innerHTML = "";
+    focusedListItemIndex = -1;
+    for (const tech of suggestions) {
+      if (selectedTech.includes(tech.name)) continue;
+      const item = document.createElement("li");
+      const button = document.createElement("button");
+      const span = document.createElement("span");
+      item.classList.add(
+        "cursor-pointer",
+        "w-full",
+        "border-gray-100",
+        "rounded-b",
+        "hover:bg-primary",
+        "hover:text-white",
+        "tech-list__item"
+      );
+      item.dataset.techid = tech.id;
+      button.setAttribute("type", "button");
+      button.classList.add(
+        "flex",
+        "w-full",
+        "items-center",
+        "p-3",
+        "border-transparent",
+        "border-l-2",
+        "relative",
+        "focus:bg-primary",
+        "focus:text-white"
+      );
+      span.classList.add("mx-2", "leading-6");
+      span.textContent = tech.name;
+      button.appendChild(span);
+      item.appendChild(button);
+      techList.appendChild(item);
+    }
+  };
+
   /**
    * Updates the focus state of the list items based on the focusedListItemIndex
    * variable. This runs when the user is on the tech input field and presses the
@@ -57,10 +146,7 @@ document.addEventListener("DOMContentLoaded", () => {
    * @returns {void}
    */
   const updateListItemFocus = () => {
-    const visibleItems = techListItems.filter(
-      (item) => !item.classList.contains("hidden")
-    );
-    for (const [index, item] of visibleItems.entries()) {
+    for (const [index, item] of getListItems().entries()) {
       item.classList.toggle("bg-primary", index === focusedListItemIndex);
       item.classList.toggle("text-white", index === focusedListItemIndex);
     }
@@ -178,14 +264,16 @@ document.addEventListener("DOMContentLoaded", () => {
    * Adds a tech to the selected tech list and updates the hidden inputs
    * fields to send to the backend.
    * @param {string} techName The name of the tech to add
-   * @returns {void}
+   * @returns {Promise<void>}
    */
-  const addTechToSelected = (techName) => {
+  const addTechToSelected = async (techName) => {
     // Check if the tech name matches an existing tech name (ignoring case)
-    // so that different case names don't get added
-    const existingTech = allActiveTech.find(
-      (tech) => tech.name.toLowerCase() === techName.toLowerCase()
-    );
+    // so that different case names don't get added. Typed names that
+    // haven't been suggested yet are looked up first.
+    if (!knownTech.has(techName.toLowerCase())) {
+      await fetchSuggestions(techName);
+    }
+    const existingTech = knownTech.get(techName.toLowerCase());
     const finalTechName = existingTech ? existingTech.name : techName;
 
     // Determine if the tech is custom or existing
@@ -210,32 +298,32 @@ document.addEventListener("DOMContentLoaded", () => {
     e.preventDefault();
   });
 
-  // when a key is pressed in the techInput,
-  // display the dropdown - filter out any non-
-  // matching items
+  // when a key is pressed in the techInput, fetch the
+  // matching tech once typing pauses and display the dropdown
   techInput.addEventListener("input", (e) => {
-    const value = e.target.value.toLowerCase();
-    if (value.length > 0) {
-      techDropdown.classList.remove("hidden");
-    } else {
+    const value = e.target.value.trim();
+    clearTimeout(suggestTimeout);
+    if (value.length === 0) {
       techDropdown.classList.add("hidden");
+      dropdownVisible = false;
+      return;
     }
-    techListItems.filter((item) => {
-      item.textContent.toLowerCase().includes(value) &&
-      !selectedTech.includes(item.textContent.trim())
-        ? item.classList.remove("hidden")
-        : item.classList.add("hidden");
-    });
-    dropdownVisible = techInput.value.length > 0;
+
+    suggestTimeout = setTimeout(async () => {
+      const suggestions = await fetchSuggestions(value);
+      // ignore responses for text that has since changed
+      if (techInput.value.trim() !== value) return;
+      renderSuggestions(suggestions);
+      techDropdown.classList.toggle("hidden", getListItems().length === 0);
+      dropdownVisible = getListItems().length > 0;
+    }, 150);
   });
 
   techInput.addEventListener("keydown", (e) => {
     if (e.key === "Enter") {
       e.preventDefault();
       const inputValue = techInput.value.trim();
-      const visibleItems = techListItems.filter(
-        (item) => !item.classList.contains("hidden")
-      );
+      const visibleItems = getListItems();
 
       if (visibleItems.length > 0 && focusedListItemIndex !== -1) {
         addTechToSelected(
@@ -243,8 +331,9 @@ document.addEventListener("DOMContentLoaded", () => {
         );
         focusedListItemIndex = -1; // Reset the focused item index
       } else if (inputValue) {
-        addTechToSelected(inputValue, true);
+        addTechToSelected(inputValue);
       }
+      clearTimeout(suggestTimeout);
       techInput.value = ""; // Clear the input field
       techDropdown.classList.add("hidden"); // Hide the dropdown again
       dropdownVisible = false;
@@ -253,10 +342,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
     if (!dropdownVisible) return;
 
-    // filter out items that aren't visible
-    const visibleItems = techListItems.filter(
-      (item) => !item.classList.contains("hidden")
-    );
+    const visibleItems = getListItems();
 
     const visibleItemsCount = visibleItems.length;
 
@@ -277,12 +363,8 @@ document.addEventListener("DOMContentLoaded", () => {
     const listItem = e.target.closest(".tech-list__item");
     if (listItem) {
       addTechToSelected(listItem.textContent.trim());
+      listItem.remove();
     }
-
-    listItem.classList.toggle(
-      "hidden",
-      selectedTech.includes(listItem.textContent.trim())
-    );
   });
 
   addedTechContainer.addEventListener("click", (e) => {
@@ -1,4 +1,12 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef
+from django.db.models.functions import Concat, Lower, Substr, Upper
+from custom_account.tech_profiles import recompute_tech_profiles
+from search_and_filter.vectors import update_tech_search_vectors
+from stackportfolio.card_cache import bump_global_card_version
+from stackportfolio.page_cache import bump_page_tags, tech_tag
+from .catalogue import invalidate_tech_catalogue
 from .models import Tech
 
 
@@ -10,29 +18,96 @@ class TechAdmin(admin.ModelAdmin):
     actions = ['approve_tech', 'unapprove_tech',
                'uppercase_tech_name', 'capitalise_tech_name']
 
+    def save_model(self, request, obj, form, change):
+        """
+        Profiles only show approved tech, so they are recomputed for
+        the tech when its approval changes.
+        """
+        super().save_model(request, obj, form, change)
+        if change and 'is_approved' in form.changed_data:
+            recompute_tech_profiles(tech_ids=[obj.pk])
+
     def approve_tech(self, request, queryset):
+        tech_ids = list(queryset.values_list('pk', flat=True))
         queryset.update(is_approved=True)
+        recompute_tech_profiles(tech_ids=tech_ids)
+        bump_page_tags(*(tech_tag(tech_id) for tech_id in tech_ids))
+        bump_global_card_version()
+        invalidate_tech_catalogue()
 
     approve_tech.short_description = 'Approve selected technologies'
 
     def unapprove_tech(self, request, queryset):
+        tech_ids = list(queryset.values_list('pk', flat=True))
         queryset.update(is_approved=False)
+        recompute_tech_profiles(tech_ids=tech_ids)
+        bump_page_tags(*(tech_tag(tech_id) for tech_id in tech_ids))
+        bump_global_card_version()
+        invalidate_tech_catalogue()
 
     unapprove_tech.short_description = 'Unapprove selected technologies'
 
+    def rename_tech(self, request, queryset, rename):
+        """
+        Renames the selected tech to the rename expression with one
+        UPDATE. Tech whose new name is taken, or would be taken by
+        another selected tech, keep their name so the unique
+        constraint holds, and are reported as skipped. The UPDATE
+        skips the save signals, so the search vectors of the rows
+        using the renamed tech are recomputed here.
+        """
+        selected = queryset.values('pk')
+        renamed = Tech.objects.annotate(new_name=rename)
+        changing = renamed.filter(pk__in=selected).exclude(
+            tech_name=F('new_name')).annotate(
+                taken=Exists(
+                    Tech.objects.exclude(pk__in=selected)
+                    .filter(tech_name=OuterRef('new_name'))),
+                shared=Exists(
+                    renamed.filter(pk__in=selected)
+                    .filter(new_name=OuterRef('new_name'))
+                    .exclude(pk=OuterRef('pk'))))
+        tech_ids, skipped = [], []
+        for tech in changing.values('pk', 'tech_name', 'taken', 'shared'):
+            if tech['taken'] or tech['shared']:
+                skipped.append(tech['tech_name'])
+            else:
+                tech_ids.append(tech['pk'])
+
+        if tech_ids:
+            try:
+                with transaction.atomic():
+                    Tech.objects.filter(pk__in=tech_ids).update(
+                        tech_name=rename)
+            except IntegrityError:
+                self.message_user(
+                    request,
+                    'Another tech took one of the new names while '
+                    'renaming, so nothing was renamed.',
+                    messages.ERROR)
+                return
+            update_tech_search_vectors(tech_ids)
+            bump_page_tags(*(tech_tag(tech_id) for tech_id in tech_ids))
+            bump_global_card_version()
+            invalidate_tech_catalogue()
+        if skipped:
+            self.message_user(
+                request,
+                'Skipped tech whose new name is already taken: '
+                f'{", ".join(sorted(skipped))}',
+                messages.WARNING)
+
     def uppercase_tech_name(self, request, queryset):
-        for tech in queryset:
-            tech.tech_name = tech.tech_name.upper()
-            tech.save()
+        self.rename_tech(request, queryset, Upper('tech_name'))
 
     uppercase_tech_name.short_description = (
         'Uppercase tech names of selected technologies'
     )
 
     def capitalise_tech_name(self, request, queryset):
-        for tech in queryset:
-            tech.tech_name = tech.tech_name.capitalize()
-            tech.save()
+        self.rename_tech(request, queryset, Concat(
+            Upper(Substr('tech_name', 1, 1)),
+            Lower(Substr('tech_name', 2))))
 
     capitalise_tech_name.short_description = (
         'Capitalise tech names of selected technologies'
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TechnologyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'technology'
+
+    def ready(self):
+        import technology.signals
@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+CatalogueTech = namedtuple('CatalogueTech', ['id', 'tech_name', 'is_approved'])
+
+
+# The catalogue is stored in the shared cache under its version, so
+# bumping the version makes every process load a fresh copy.
+CATALOGUE_VERSION_KEY = 'tech-catalogue:version'
+
+
+def catalogue_key(version):
+    return f'tech-catalogue:{version}'
+
+
+def new_version():
+    return str(time.time_ns())
+
+
+class TechCatalogue:
+    """
+    An in-process copy of every tech's id, name and approval, for
+    views that list or look up tech without querying the database.
+
+    The copy checks the shared version at most every check_interval
+    seconds. A new version is loaded from the shared cache, or from
+    the database by whichever process gets to it first. A copy older
+    than max_age seconds is loaded from the database again whatever
+    the version says, so changes reach processes that can't see the
+    version being bumped.
+    """
+
+    def __init__(self, check_interval=5, max_age=None):
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self.version = None
+        self.techs = []
+        self.by_id = {}
+        self.by_name = {}
+        self.checked_at = None
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    def is_due_check(self):
+        return (self.checked_at is None or
+                time.monotonic() - self.checked_at > self.check_interval)
+
+    def is_expired(self):
+        if self.loaded_at is None:
+            return True
+        if self.max_age is None:
+            return False
+        return time.monotonic() - self.loaded_at > self.max_age
+
+    def current_version(self):
+        version = cache.get(CATALOGUE_VERSION_KEY)
+        if version is None:
+            cache.add(CATALOGUE_VERSION_KEY, new_version(), None)
+            version = cache.get(CATALOGUE_VERSION_KEY)
+        return version
+
+    def refresh(self):
+        """
+        Loads the current version of the catalogue if this copy is
+        out of date.
+        """
+        from .models import Tech
+
+        version = self.current_version()
+        expired = self.is_expired()
+        if version is not None and version == self.version and not expired:
+            self.checked_at = time.monotonic()
+            return
+
+        rows = None
+        if version and not expired:
+            rows = cache.get(catalogue_key(version))
+        if rows is None:
+            rows = list(Tech.objects.order_by('tech_name').values_list(
+                'id', 'tech_name', 'is_approved'))
+            if version:
+                cache.set(
+                    catalogue_key(version), rows,
+                    getattr(settings, 'TECH_CATALOGUE_TIMEOUT', 60 * 60))
+
+        techs = [CatalogueTech(*row) for row in rows]
+        with self.lock:
+            self.techs = techs
+            self.by_id = {tech.id: tech for tech in techs}
+            self.by_name = {tech.tech_name: tech for tech in techs}
+            self.version = version
+            self.checked_at = self.loaded_at = time.monotonic()
+
+    def ensure_fresh(self):
+        if self.is_due_check():
+            self.refresh()
+        return self
+
+    def invalidate(self):
+        """
+        Makes this process check the shared version on next use.
+        """
+        self.checked_at = None
+
+    def approved(self):
+        """
+        Returns the approved tech, ordered by name.
+        """
+        return [tech for tech in self.techs if tech.is_approved]
+
+    def get(self, tech_id):
+        return self.by_id.get(tech_id)
+
+    def by_names(self, tech_names, approved_only=False):
+        """
+        Returns the named tech that exist, in the order given.
+        """
+        techs = [self.by_name[name] for name in dict.fromkeys(tech_names)
+                 if name in self.by_name]
+        if approved_only:
+            techs = [tech for tech in techs if tech.is_approved]
+        return techs
+
+    def ids_for_names(self, tech_names):
+        return [tech.id for tech in self.by_names(tech_names)]
+
+
+tech_catalogue = TechCatalogue(
+    check_interval=getattr(settings, 'TECH_CATALOGUE_CHECK_INTERVAL', 5),
+    max_age=getattr(settings, 'TECH_CATALOGUE_MAX_AGE', None))
+
+
+def get_tech_catalogue():
+    """
+    Returns the tech catalogue, refreshed if it's been changed.
+    """
+    return tech_catalogue.ensure_fresh()
+
+
+def bump_catalogue_version():
+    cache.set(CATALOGUE_VERSION_KEY, new_version(), None)
+    tech_catalogue.invalidate()
+
+
+def invalidate_tech_catalogue():
+    """
+    Marks the catalogue as changed. The version is bumped again once
+    the transaction commits, so a process that reloaded the catalogue
+    before then doesn't keep a copy without the change.
+    """
+    bump_catalogue_version()
+    transaction.on_commit(bump_catalogue_version)
@@ -0,0 +1,251 @@
+import threading
+import time
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+
+# For each kind of row that can be filtered by tech: the model and
+# m2m field holding the tech, and the column of the through table
+# that identifies the row in the search results.
+INDEXED_RELATIONS = {
+    'projects': ('project.Project', 'technologies', 'project_id'),
+    'job_posts': ('job_post.JobPost', 'technologies', 'jobpost_id'),
+    'users': (
+        'custom_account.TechUserProfile', 'technologies',
+        'techuserprofile__user_id'),
+}
+
+
+# Bitmaps are split into chunks of 2 ** CHUNK_BITS ids, stored as a
+# dict of chunk number to int. A tech used by a few rows with large
+# ids then only costs a few small ints rather than one huge one.
+CHUNK_BITS = 12
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+def bitmap_set(bitmap, row_id):
+    chunk = row_id >> CHUNK_BITS
+    bitmap[chunk] = bitmap.get(chunk, 0) | (1 << (row_id & CHUNK_MASK))
+
+
+def bitmap_unset(bitmap, row_id):
+    chunk = row_id >> CHUNK_BITS
+    if chunk in bitmap:
+        bitmap[chunk] &= ~(1 << (row_id & CHUNK_MASK))
+        if not bitmap[chunk]:
+            del bitmap[chunk]
+
+
+def bitmap_and(first, second):
+    result = {}
+    for chunk in first.keys() & second.keys():
+        bits = first[chunk] & second[chunk]
+        if bits:
+            result[chunk] = bits
+    return result
+
+
+def bitmap_or(first, second):
+    result = dict(first)
+    for chunk, bits in second.items():
+        result[chunk] = result.get(chunk, 0) | bits
+    return result
+
+
+def bitmap_to_ids(bitmap):
+    """
+    Returns the ids of the set bits in a bitmap, in ascending order.
+    """
+    ids = []
+    for chunk in sorted(bitmap):
+        bits = bitmap[chunk]
+        offset = chunk << CHUNK_BITS
+        while bits:
+            lowest_bit = bits & -bits
+            ids.append(offset + lowest_bit.bit_length() - 1)
+            bits ^= lowest_bit
+    return ids
+
+
+class TechBitmapIndex:
+    """
+    Maps each tech id to a bitmap of the ids of the rows using it,
+    so matching all or any of a set of tech is a chain of bitmap
+    intersections or unions.
+    """
+
+    def __init__(self, kind, max_age=None):
+        self.kind = kind
+        self.max_age = max_age
+        self.bitmaps = {}
+        self.row_techs = {}
+        self.built_at = None
+        self.lock = threading.RLock()
+
+    @property
+    def through(self):
+        model_label, field_name, _ = INDEXED_RELATIONS[self.kind]
+        model = apps.get_model(model_label)
+        return getattr(model, field_name).through
+
+    @property
+    def row_column(self):
+        return INDEXED_RELATIONS[self.kind][2]
+
+    def is_stale(self):
+        if self.built_at is None:
+            return True
+        if self.max_age is None:
+            return False
+        return time.monotonic() - self.built_at > self.max_age
+
+    def build(self):
+        """
+        Builds every bitmap from the through table in one query.
+        """
+        rows = self.through.objects.values_list(
+            self.row_column, 'tech_id').iterator()
+        with self.lock:
+            self.bitmaps = {}
+            self.row_techs = {}
+            for row_id, tech_id in rows:
+                self._set(row_id, tech_id)
+            self.built_at = time.monotonic()
+
+    def ensure_built(self):
+        if self.is_stale():
+            self.build()
+
+    def invalidate(self):
+        """
+        Forces a rebuild on next use.
+        """
+        self.built_at = None
+
+    def _set(self, row_id, tech_id):
+        bitmap_set(self.bitmaps.setdefault(tech_id, {}), row_id)
+        self.row_techs.setdefault(row_id, set()).add(tech_id)
+
+    def _unset(self, row_id, tech_id):
+        if tech_id in self.bitmaps:
+            bitmap_unset(self.bitmaps[tech_id], row_id)
+        self.row_techs.get(row_id, set()).discard(tech_id)
+
+    def add(self, row_id, tech_ids):
+        if self.built_at is None:
+            return
+        with self.lock:
+            for tech_id in tech_ids:
+                self._set(row_id, tech_id)
+
+    def remove(self, row_id, tech_ids):
+        if self.built_at is None:
+            return
+        with self.lock:
+            for tech_id in tech_ids:
+                self._unset(row_id, tech_id)
+
+    def remove_row(self, row_id):
+        """
+        Clears a row from every bitmap, e.g. when it is deleted.
+        """
+        if self.built_at is None:
+            return
+        with self.lock:
+            for tech_id in list(self.row_techs.get(row_id, ())):
+                self._unset(row_id, tech_id)
+            self.row_techs.pop(row_id, None)
+
+    def count(self, tech_id):
+        """
+        Returns the number of rows using a tech.
+        """
+        self.ensure_built()
+        with self.lock:
+            return sum(bin(bits).count('1')
+                       for bits in self.bitmaps.get(tech_id, {}).values())
+
+    def match(self, tech_ids, match_type):
+        """
+        Returns the ids of the rows with all (or any) of the tech.
+        """
+        self.ensure_built()
+        with self.lock:
+            bitmaps = [self.bitmaps.get(tech_id, {}) for tech_id in tech_ids]
+            if not bitmaps:
+                return []
+
+            combine = bitmap_and if match_type == 'all' else bitmap_or
+            result = bitmaps[0]
+            for bitmap in bitmaps[1:]:
+                result = combine(result, bitmap)
+            return bitmap_to_ids(result)
+
+
+tech_indexes = {}
+tech_indexes_lock = threading.Lock()
+
+
+def get_tech_index(kind):
+    """
+    Returns the shared index for a kind of row, creating it on
+    first use.
+    """
+    if kind not in tech_indexes:
+        with tech_indexes_lock:
+            if kind not in tech_indexes:
+                tech_indexes[kind] = TechBitmapIndex(
+                    kind,
+                    max_age=getattr(settings, 'TECH_INDEX_MAX_AGE', None))
+    return tech_indexes[kind]
+
+
+def apply_m2m_change(kind, row_id, action, reverse, pk_set):
+    """
+    Applies an m2m_changed signal for the tech field to the index,
+    once the transaction commits, so a rolled back change is never
+    matched. When the change is made from the Tech side, row_id is
+    the tech id and pk_set holds the rows instead.
+    """
+    pk_set = set(pk_set or ())
+    transaction.on_commit(
+        lambda: _apply_m2m_change(kind, row_id, action, reverse, pk_set))
+
+
+def _apply_m2m_change(kind, row_id, action, reverse, pk_set):
+    index = get_tech_index(kind)
+    if action == 'post_clear':
+        if reverse:
+            index.invalidate()
+        else:
+            index.remove_row(row_id)
+        return
+
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+
+    if reverse:
+        for other_row_id in pk_set:
+            if action == 'post_add':
+                index.add(other_row_id, [row_id])
+            else:
+                index.remove(other_row_id, [row_id])
+    elif action == 'post_add':
+        index.add(row_id, pk_set)
+    else:
+        index.remove(row_id, pk_set)
+
+
+def remove_from_tech_index(kind, row_id):
+    """
+    Clears a deleted row from the index once the transaction commits.
+    """
+    transaction.on_commit(lambda: get_tech_index(kind).remove_row(row_id))
+
+
+def invalidate_tech_index(kind):
+    """
+    Rebuilds the index on next use after the transaction commits.
+    """
+    transaction.on_commit(get_tech_index(kind).invalidate)
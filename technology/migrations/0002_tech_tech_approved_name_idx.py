@@ -0,0 +1,17 @@
+# Generated by Django 3.2.22 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('technology', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tech',
+            index=models.Index(fields=['is_approved', 'tech_name'], name='tech_approved_name_idx'),
+        ),
+    ]
@@ -12,5 +12,15 @@ class Tech(models.Model):
     tech_name = models.CharField(max_length=80, unique=True)
     is_approved = models.BooleanField(default=False)
 
+    class Meta:
+        """
+        Meta class for the tech model.
+        """
+        indexes = [
+            models.Index(
+                fields=["is_approved", "tech_name"],
+                name="tech_approved_name_idx"),
+        ]
+
     def __str__(self):
         return self.tech_name
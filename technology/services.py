@@ -0,0 +1,46 @@
+from .catalogue import get_tech_catalogue, invalidate_tech_catalogue
+from .models import Tech
+
+
+def parse_tech_names(raw_names):
+    """
+    Splits the comma separated tech names posted by the tech
+    selector, dropping blanks and repeats.
+    """
+    names = (name.strip() for name in raw_names.split(','))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def resolve_tech_names(tech_names):
+    """
+    Returns the ids of the named tech, adding any that aren't in
+    the database yet as unapproved. Takes one insert and one lookup
+    however many names there are.
+
+    bulk_create doesn't send post_save, so the catalogue is
+    invalidated here when there are names it doesn't know.
+    """
+    tech_names = list(dict.fromkeys(tech_names))
+    if not tech_names:
+        return []
+    Tech.objects.bulk_create(
+        [Tech(tech_name=tech_name, is_approved=False)
+         for tech_name in tech_names],
+        ignore_conflicts=True)
+    known = get_tech_catalogue().by_names(tech_names)
+    if len(known) < len(tech_names):
+        invalidate_tech_catalogue()
+    return list(Tech.objects.filter(
+        tech_name__in=tech_names).values_list('id', flat=True))
+
+
+def assign_technologies(instance, technologies, new_tech_names=()):
+    """
+    Sets the tech on a project or job post to the selected tech plus
+    the new tech names. set() only adds and removes the difference,
+    so the m2m_changed receivers run once per change rather than once
+    per tech.
+    """
+    tech_ids = {getattr(tech, 'pk', tech) for tech in technologies or ()}
+    tech_ids.update(resolve_tech_names(new_tech_names))
+    instance.technologies.set(tech_ids)
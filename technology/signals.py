@@ -0,0 +1,31 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from technology.models import Tech
+from stackportfolio.card_cache import bump_global_card_version
+from stackportfolio.page_cache import bump_page_tags, tech_tag
+from .catalogue import invalidate_tech_catalogue
+
+
+@receiver(post_save, sender=Tech)
+@receiver(post_delete, sender=Tech)
+def invalidate_cards_on_tech_change(sender, instance, **kwargs):
+    """
+    Tech badges show the tech name and whether it is approved,
+    so any card could be affected.
+    """
+    bump_global_card_version()
+
+
+@receiver(post_save, sender=Tech)
+@receiver(post_delete, sender=Tech)
+def invalidate_catalogue_on_tech_change(sender, instance, **kwargs):
+    invalidate_tech_catalogue()
+
+
+@receiver(post_save, sender=Tech)
+@receiver(post_delete, sender=Tech)
+def invalidate_pages_on_tech_change(sender, instance, **kwargs):
+    """
+    Drop the cached pages showing the tech.
+    """
+    bump_page_tags(tech_tag(instance.pk))
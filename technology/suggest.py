@@ -0,0 +1,86 @@
+import heapq
+import threading
+from bisect import bisect_left
+from .catalogue import get_tech_catalogue
+from .index import get_tech_index
+
+
+# Usage on projects and job posts ranks the suggestions.
+POPULARITY_KINDS = ('projects', 'job_posts')
+
+# Sorts after any key starting with a prefix, ending its slice.
+LAST_CHARACTER = chr(0x10ffff)
+
+
+def word_starts(name):
+    """
+    Returns the offset of each word in a name, so "Tailwind CSS"
+    can be found by typing "css" as well as "tail".
+    """
+    return [i for i, char in enumerate(name)
+            if char.isalnum() and (i == 0 or not name[i - 1].isalnum())]
+
+
+class TechSuggestIndex:
+    """
+    A sorted list of the lowercased approved tech names, plus each
+    name from the start of every later word. The names starting with
+    a prefix are then a contiguous slice found by bisection.
+    """
+
+    def __init__(self, catalogue_techs):
+        self.catalogue_techs = catalogue_techs
+        techs = [tech for tech in catalogue_techs if tech.is_approved]
+        self.techs = {tech.id: tech for tech in techs}
+        entries = sorted(
+            (tech.tech_name.lower()[start:], tech.id)
+            for tech in techs
+            for start in word_starts(tech.tech_name.lower()) or [0])
+        self.keys = [key for key, _ in entries]
+        self.tech_ids = [tech_id for _, tech_id in entries]
+
+    def matching_ids(self, prefix):
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + LAST_CHARACTER, lo=start)
+        return set(self.tech_ids[start:end])
+
+    def suggest(self, query, limit=10):
+        """
+        Returns up to limit approved tech with a word starting with
+        the query, most used first, then those whose whole name
+        starts with it, then by name.
+        """
+        prefix = query.strip().lower()
+        if not prefix:
+            return []
+        tech_ids = self.matching_ids(prefix)
+        indexes = [get_tech_index(kind) for kind in POPULARITY_KINDS]
+
+        def rank(tech_id):
+            name = self.techs[tech_id].tech_name.lower()
+            usage = sum(index.count(tech_id) for index in indexes)
+            return (-usage, not name.startswith(prefix), name)
+
+        return [self.techs[tech_id]
+                for tech_id in heapq.nsmallest(limit, tech_ids, key=rank)]
+
+
+suggest_index = None
+suggest_index_lock = threading.Lock()
+
+
+def get_suggest_index():
+    """
+    Returns the suggestion index for the tech catalogue, rebuilding
+    it whenever the catalogue has been reloaded.
+    """
+    global suggest_index
+    catalogue = get_tech_catalogue()
+    index = suggest_index
+    if index is None or index.catalogue_techs is not catalogue.techs:
+        with suggest_index_lock:
+            index = suggest_index
+            if index is None or index.catalogue_techs is not catalogue.techs:
+                index = TechSuggestIndex(catalogue.techs)
+                suggest_index = index
+    return index
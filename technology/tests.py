@@ -1,5 +1,18 @@
-from django.test import TestCase
+from unittest import mock
+from django.contrib.admin import AdminSite
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from custom_account.models import CustomUser, TechUserProfile
+from project.models import Project
+from search_and_filter.vectors import TECH_RELATIONS, vectors_supported
+from technology.admin import TechAdmin
+from technology.catalogue import TechCatalogue, get_tech_catalogue
+from technology.index import bitmap_to_ids, get_tech_index, tech_indexes
 from technology.models import Tech
+from technology.services import (assign_technologies, parse_tech_names,
+                                 resolve_tech_names)
 
 
 class TechnologyTest(TestCase):
@@ -17,3 +30,420 @@ class TechnologyTest(TestCase):
             is_approved=True
         )
         self.assertTrue(isinstance(tech, Tech))
+
+
+class TechIndexTests(TestCase):
+    """
+    Tests for the tech bitmap index used by the search filters.
+    """
+
+    def setUp(self):
+        tech_indexes.clear()
+        self.user = CustomUser.objects.create_user(
+            username='indexuser',
+            first_name='Index',
+            last_name='User',
+            email='indexuser@example.com',
+            password='password',
+        )
+        TechUserProfile.objects.create(user=self.user)
+        self.django = Tech.objects.create(tech_name='Django')
+        self.python = Tech.objects.create(tech_name='Python')
+
+        self.first = Project.objects.create(name='First', user=self.user)
+        self.second = Project.objects.create(name='Second', user=self.user)
+        self.first.technologies.add(self.django, self.python)
+        self.second.technologies.add(self.python)
+
+    def tearDown(self):
+        tech_indexes.clear()
+
+    def test_bitmap_to_ids_across_chunks(self):
+        """
+        Test that ids in different chunks are all returned in order.
+        """
+        bitmap = {0: 0b101, 3: 1}
+        self.assertEqual(bitmap_to_ids(bitmap), [0, 2, 3 << 12])
+
+    def test_match_all_and_any(self):
+        """
+        Test that all is an intersection and any is a union.
+        """
+        index = get_tech_index('projects')
+        tech_ids = [self.django.id, self.python.id]
+        self.assertEqual(index.match(tech_ids, 'all'), [self.first.id])
+        self.assertEqual(
+            index.match(tech_ids, 'any'),
+            sorted([self.first.id, self.second.id]))
+
+    def test_index_follows_m2m_changes(self):
+        """
+        Test that the m2m_changed signals keep a built index current
+        once the transaction commits.
+        """
+        index = get_tech_index('projects')
+        index.build()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.second.technologies.add(self.django)
+            # Nothing changes until the transaction commits.
+            self.assertEqual(
+                index.match([self.django.id], 'all'), [self.first.id])
+        self.assertEqual(
+            index.match([self.django.id], 'all'),
+            sorted([self.first.id, self.second.id]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.django.projects.remove(self.first)
+        self.assertEqual(
+            index.match([self.django.id], 'all'), [self.second.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.second.technologies.clear()
+        self.assertEqual(index.match([self.django.id], 'all'), [])
+
+        first_id = self.first.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.delete()
+        self.assertEqual(index.match([self.python.id], 'any'), [])
+        self.assertNotIn(first_id, index.row_techs)
+
+    def test_search_filters_by_tech(self):
+        """
+        Test that the search page filters projects by tech.
+        """
+        response = self.client.get('/search/', {
+            'type': 'projects',
+            'selectedTechnologies': 'Django,Python',
+            'tech_match_type': 'all',
+        })
+        self.assertEqual(list(response.context['object_list']), [self.first])
+
+        response = self.client.get('/search/', {
+            'type': 'projects',
+            'selectedTechnologies': 'Django,Python',
+            'tech_match_type': 'any',
+        })
+        self.assertEqual(len(response.context['object_list']), 2)
+
+    @override_settings(TECH_FILTER_MAX_IDS=1)
+    def test_large_matches_are_filtered_in_the_database(self):
+        """
+        Test that when more rows match than are sent as ids, the
+        database matches the tech instead, with the same results.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/search/', {
+                'type': 'projects',
+                'selectedTechnologies': 'Python',
+                'tech_match_type': 'all',
+            })
+        self.assertEqual(len(response.context['object_list']), 2)
+        self.assertTrue(any(
+            'EXISTS' in query['sql'] for query in queries.captured_queries))
+
+        response = self.client.get('/search/', {
+            'type': 'projects',
+            'selectedTechnologies': 'Django,Python',
+            'tech_match_type': 'all',
+        })
+        self.assertEqual(list(response.context['object_list']), [self.first])
+
+        response = self.client.get('/search/', {
+            'type': 'projects',
+            'selectedTechnologies': 'Django,Python',
+            'tech_match_type': 'any',
+        })
+        self.assertEqual(len(response.context['object_list']), 2)
+
+
+class TechAssignmentTests(TestCase):
+    """
+    Tests for assigning tech to projects and job posts.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            first_name='Test',
+            last_name='User',
+            email='testuser@example.com',
+            password='password',
+        )
+        TechUserProfile.objects.create(user=self.user)
+        self.techs = [
+            Tech.objects.create(tech_name=f'Tech {i}', is_approved=True)
+            for i in range(10)]
+
+    def test_parse_tech_names(self):
+        """
+        Test that blanks and repeats are dropped from posted names.
+        """
+        self.assertEqual(
+            parse_tech_names(' Django, ,Flask,Django,'), ['Django', 'Flask'])
+        self.assertEqual(parse_tech_names(''), [])
+
+    def test_resolve_adds_new_tech_as_unapproved(self):
+        """
+        Test that existing tech is reused and new tech is added
+        unapproved.
+        """
+        get_tech_catalogue()
+        with self.assertNumQueries(2):
+            tech_ids = resolve_tech_names(['Tech 0', 'Brand New'])
+        new_tech = Tech.objects.get(tech_name='Brand New')
+        self.assertFalse(new_tech.is_approved)
+        self.assertEqual(set(tech_ids), {self.techs[0].pk, new_tech.pk})
+
+    def assignment_queries(self, project, techs, new_tech_names):
+        get_tech_catalogue()
+        with CaptureQueriesContext(connection) as queries:
+            assign_technologies(project, techs, new_tech_names)
+        return len(queries)
+
+    def test_assignment_queries_do_not_grow_with_tech(self):
+        """
+        Test that assigning tech takes the same number of queries
+        for a few tech as for many.
+        """
+        few = Project.objects.create(name='Few', user=self.user)
+        many = Project.objects.create(name='Many', user=self.user)
+
+        self.assertEqual(
+            self.assignment_queries(few, self.techs[:2], ['New 0']),
+            self.assignment_queries(
+                many, self.techs, [f'New {i}' for i in range(1, 9)]))
+        self.assertEqual(many.technologies.count(), 18)
+
+        # Replacing tech only removes and adds the difference.
+        assign_technologies(many, self.techs[5:], ['New 1'])
+        self.assertEqual(
+            set(many.technologies.values_list('tech_name', flat=True)),
+            {f'Tech {i}' for i in range(5, 10)} | {'New 1'})
+
+
+class TechCatalogueTests(TestCase):
+    """
+    Tests for the cached tech catalogue.
+    """
+
+    def setUp(self):
+        self.django = Tech.objects.create(
+            tech_name='Django', is_approved=True)
+        self.flask = Tech.objects.create(tech_name='Flask')
+
+    def test_catalogue_is_served_without_queries(self):
+        """
+        Test that a loaded catalogue is used without querying.
+        """
+        get_tech_catalogue()
+        with self.assertNumQueries(0):
+            catalogue = get_tech_catalogue()
+            self.assertEqual(
+                [tech.tech_name for tech in catalogue.approved()],
+                ['Django'])
+            self.assertEqual(
+                catalogue.ids_for_names(['Flask', 'Django', 'Missing']),
+                [self.flask.pk, self.django.pk])
+            self.assertEqual(
+                catalogue.by_names(['Flask', 'Django'], approved_only=True),
+                [catalogue.get(self.django.pk)])
+
+    def test_catalogue_follows_tech_saves(self):
+        """
+        Test that saving or deleting a tech invalidates the catalogue.
+        """
+        get_tech_catalogue()
+        self.flask.is_approved = True
+        self.flask.save()
+        self.assertEqual(
+            [tech.tech_name for tech in get_tech_catalogue().approved()],
+            ['Django', 'Flask'])
+
+        self.django.delete()
+        self.assertIsNone(get_tech_catalogue().get(self.django.pk))
+
+    def test_catalogue_follows_admin_actions(self):
+        """
+        Test that the bulk approve and unapprove actions invalidate
+        the catalogue.
+        """
+        tech_admin = TechAdmin(Tech, AdminSite())
+        get_tech_catalogue()
+        tech_admin.approve_tech(None, Tech.objects.filter(pk=self.flask.pk))
+        self.assertTrue(get_tech_catalogue().get(self.flask.pk).is_approved)
+
+        tech_admin.unapprove_tech(None, Tech.objects.all())
+        self.assertEqual(get_tech_catalogue().approved(), [])
+
+    def test_catalogue_knows_tech_added_in_bulk(self):
+        """
+        Test that tech added by the tech selector is in the catalogue.
+        """
+        get_tech_catalogue()
+        resolve_tech_names(['Brand New'])
+        self.assertEqual(
+            len(get_tech_catalogue().ids_for_names(['Brand New'])), 1)
+
+    def test_catalogue_is_reloaded_after_max_age(self):
+        """
+        Test that a worker that can't see the version being bumped
+        still picks up changes once its copy is max_age seconds old.
+        """
+        def load(catalogue, process_cache):
+            with mock.patch('technology.catalogue.cache', process_cache):
+                return catalogue.ensure_fresh()
+
+        first_cache = LocMemCache('first', {})
+        second_cache = LocMemCache('second', {})
+        first = TechCatalogue(check_interval=0, max_age=60)
+        second = TechCatalogue(check_interval=0, max_age=60)
+        load(first, first_cache)
+        load(second, second_cache)
+
+        with mock.patch('technology.catalogue.cache', first_cache):
+            self.flask.is_approved = True
+            self.flask.save()
+        self.assertEqual(len(load(first, first_cache).approved()), 2)
+        self.assertEqual(len(load(second, second_cache).approved()), 1)
+
+        second.loaded_at -= 61
+        self.assertEqual(len(load(second, second_cache).approved()), 2)
+
+
+class TechSuggestTests(TestCase):
+    """
+    Tests for the tech suggestions shown by the tech selectors.
+    """
+
+    def setUp(self):
+        tech_indexes.clear()
+        self.user = CustomUser.objects.create_user(
+            username='suggestuser',
+            first_name='Suggest',
+            last_name='User',
+            email='suggestuser@example.com',
+            password='password',
+        )
+        TechUserProfile.objects.create(user=self.user)
+        self.tailwind = Tech.objects.create(
+            tech_name='Tailwind CSS', is_approved=True)
+        self.css = Tech.objects.create(tech_name='CSS', is_approved=True)
+        self.django = Tech.objects.create(
+            tech_name='Django', is_approved=True)
+        self.draft = Tech.objects.create(tech_name='Dart')
+
+        project = Project.objects.create(name='Styled', user=self.user)
+        project.technologies.add(self.tailwind)
+
+    def tearDown(self):
+        tech_indexes.clear()
+
+    def suggest(self, query, **params):
+        response = self.client.get(
+            '/api/tech/suggest', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [tech['name'] for tech in response.json()['results']]
+
+    def test_suggestions_match_the_start_of_any_word(self):
+        """
+        Test that tech is matched on the start of each word and that
+        unapproved tech isn't suggested.
+        """
+        self.assertEqual(self.suggest('dj'), ['Django'])
+        self.assertEqual(self.suggest('D'), ['Django'])
+        self.assertEqual(self.suggest('wind'), [])
+        self.assertEqual(self.suggest(''), [])
+
+    def test_suggestions_are_ranked_by_usage(self):
+        """
+        Test that the most used tech is suggested first.
+        """
+        self.assertEqual(self.suggest('css'), ['Tailwind CSS', 'CSS'])
+        self.assertEqual(self.suggest('css', limit=1), ['Tailwind CSS'])
+
+    def test_suggestions_follow_the_catalogue(self):
+        """
+        Test that newly approved tech is suggested.
+        """
+        self.assertEqual(self.suggest('da'), [])
+        self.draft.is_approved = True
+        self.draft.save()
+        self.assertEqual(self.suggest('da'), ['Dart'])
+
+    def test_suggestions_can_be_cached(self):
+        """
+        Test that suggestions are sent with cache headers.
+        """
+        response = self.client.get('/api/tech/suggest', {'q': 'dj'})
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=', response['Cache-Control'])
+
+
+class TechAdminRenameTests(TestCase):
+    """
+    Tests for the admin actions renaming tech in bulk.
+    """
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(
+            email='admin@example.com',
+            username='adminuser',
+            password='password',
+        )
+        self.client.force_login(self.admin)
+
+    def run_action(self, action, techs):
+        return self.client.post('/admin/technology/tech/', {
+            'action': action,
+            '_selected_action': [tech.pk for tech in techs],
+        }, follow=True)
+
+    def names(self):
+        return sorted(Tech.objects.values_list('tech_name', flat=True))
+
+    def test_uppercase_in_one_update(self):
+        """
+        Test that the selected tech are renamed with one query to find
+        them and one UPDATE, and the catalogue sees the new names.
+        """
+        techs = [Tech.objects.create(tech_name=name)
+                 for name in ('django', 'Flask', 'SQL')]
+        get_tech_catalogue()
+        tech_admin = TechAdmin(Tech, AdminSite())
+        # The SELECT and UPDATE, and the savepoint around the UPDATE,
+        # then on PostgreSQL an UPDATE of the search vectors per model.
+        queries = 4 + (len(TECH_RELATIONS) if vectors_supported() else 0)
+        with self.assertNumQueries(queries):
+            tech_admin.uppercase_tech_name(None, Tech.objects.all())
+        self.assertEqual(self.names(), ['DJANGO', 'FLASK', 'SQL'])
+        self.assertEqual(
+            get_tech_catalogue().get(techs[0].pk).tech_name, 'DJANGO')
+
+    def test_capitalise(self):
+        """
+        Test that capitalising lowercases all but the first letter.
+        """
+        Tech.objects.create(tech_name='dJANGO')
+        TechAdmin(Tech, AdminSite()).capitalise_tech_name(
+            None, Tech.objects.all())
+        self.assertEqual(self.names(), ['Django'])
+
+    def test_names_already_taken_are_skipped(self):
+        """
+        Test that tech whose new name is taken by another tech, or by
+        another selected tech, keep their names and are reported,
+        while the rest are renamed.
+        """
+        react = Tech.objects.create(tech_name='react')
+        Tech.objects.create(tech_name='REACT')
+        vue = Tech.objects.create(tech_name='vue')
+        other_vue = Tech.objects.create(tech_name='Vue')
+        flask = Tech.objects.create(tech_name='flask')
+        response = self.run_action(
+            'uppercase_tech_name', [react, vue, other_vue, flask])
+        self.assertEqual(
+            self.names(), ['FLASK', 'REACT', 'Vue', 'react', 'vue'])
+        self.assertContains(
+            response,
+            'Skipped tech whose new name is already taken: Vue, react, vue')
@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import TechSuggestView
+
+
+app_name = 'technology'
+
+urlpatterns = [
+    path('suggest', TechSuggestView.as_view(), name='tech_suggest'),
+]
@@ -1,3 +1,28 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views import View
+from .suggest import get_suggest_index
 
-# Create your views here.
+
+class TechSuggestView(View):
+    """
+    Returns the approved tech matching what has been typed into a
+    tech selector, as JSON.
+    """
+    max_limit = 20
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = int(request.GET.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = min(max(limit, 1), self.max_limit)
+
+        techs = get_suggest_index().suggest(request.GET.get('q', ''), limit)
+        response = JsonResponse({'results': [
+            {'id': tech.id, 'name': tech.tech_name} for tech in techs]})
+        patch_cache_control(
+            response, public=True,
+            max_age=getattr(settings, 'TECH_SUGGEST_MAX_AGE', 60))
+        return response